@@ -0,0 +1,377 @@
+"""
+Approximate Functions from Lookup Tables
+
+Fast approximations of sin, cos, tan, exp and log for workloads that
+only need about six correct decimals (the calculator rounds results to
+six anyway):
+
+    from approx import approximate, approx_sin
+    approximate("sin", values)      # whole array at once -> BatchResult
+    approx_sin(0.5)                 # one value
+    python approx.py                # accuracy report and throughput
+
+Every function is reduced to a short range and read from a table of
+cubic Hermite segments (value and derivative matched at every knot),
+evaluated with Horner's rule:
+
+- sin, cos: x is reduced modulo 2*pi onto a table of sin; cos(x) is
+  sin(x + pi/2), a fixed shift of a quarter of the table, and tan(x) is
+  sin(x) / cos(x) from the same table
+- exp: x = k*ln2 + r with 0 <= r < ln2, so exp(x) = 2**k * exp(r)
+- log: x = m * 2**e with 1 <= m < 2, so log(x) = e*ln2 + log(m)
+
+With 1024 segments per table (4 coefficients each, 32 KiB, small enough
+to stay in the CPU cache) the error is around 1e-12, far below the
+rounding; `accuracy_report()` measures it against the math module.
+Arguments outside the reduced ranges (|x| beyond REDUCTION_LIMIT for
+the trigonometric functions, overflow or underflow for exp, x <= 0 for
+log, inf and NaN) are passed to the exact functions instead.
+
+The speed comes from the batched path. With NumPy installed every step
+is a whole-array operation (a table gather and three multiply-adds per
+element), which is many times faster than calling math.sin per element.
+Without NumPy, approximate() simply maps the math functions: a table
+lookup written in Python cannot beat a single C call. Either way domain
+errors never raise: like vectorized.evaluate_batch, approximate()
+returns a BatchResult with NaN and an error flag in the failed rows.
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import math
+import random
+import time
+from array import array
+
+from vectorized import DEFAULT_CHUNK_SIZE, BatchResult, _as_float_array, load_numpy
+
+DEFAULT_SEGMENTS = 1024         # per table; must be a power of two
+REDUCTION_LIMIT = 1e6           # larger |x| lose digits in the reduction
+EXP_RANGE = (-708.0, 709.0)     # beyond this 2**k under- or overflows
+INV_LN2 = 1 / math.log(2)
+LN2_HI = 6.93147180369123816490e-01     # ln2 split in two (Cody-Waite), so
+LN2_LO = 1.90821492927058770002e-10     # k * LN2_HI is exact for |k| < 2**21
+
+FUNCTIONS = ("sin", "cos", "tan", "exp", "log")
+
+
+class Table:
+    """
+    Cubic Hermite segments of func over [start, start + width).
+
+    Segment i covers start + (i + u) * width / segments for 0 <= u < 1
+    and is c0[i] + u*(c1[i] + u*(c2[i] + u*c3[i])).
+    """
+
+    def __init__(self, func, derivative, start, width, segments=DEFAULT_SEGMENTS):
+        if segments < 4 or segments & (segments - 1):
+            raise ValueError("segments must be a power of two >= 4")
+        self.start = start
+        self.segments = segments
+        self.mask = segments - 1
+        self.scale = segments / width
+        step = width / segments
+
+        knots = [start + i * step for i in range(segments + 1)]
+        values = [func(x) for x in knots]
+        slopes = [derivative(x) * step for x in knots]
+        self.c0, self.c1, self.c2, self.c3 = (array("d") for _ in range(4))
+        for i in range(segments):
+            y0, y1, d0, d1 = values[i], values[i + 1], slopes[i], slopes[i + 1]
+            self.c0.append(y0)
+            self.c1.append(d0)
+            self.c2.append(3 * (y1 - y0) - 2 * d0 - d1)
+            self.c3.append(2 * (y0 - y1) + d0 + d1)
+        self._numpy = None
+
+    def segment(self, i, u):
+        """Value of segment i at 0 <= u < 1"""
+        return self.c0[i] + u * (self.c1[i] + u * (self.c2[i] + u * self.c3[i]))
+
+    def gather(self, np, index, u):
+        """segment() for arrays of indices and offsets"""
+        if self._numpy is None:
+            self._numpy = [_as_float_array(c, np) for c in (self.c0, self.c1, self.c2, self.c3)]
+        c0, c1, c2, c3 = self._numpy
+        result = c3.take(index)
+        result *= u
+        result += c2.take(index)
+        result *= u
+        result += c1.take(index)
+        result *= u
+        result += c0.take(index)
+        return result
+
+
+SIN = Table(math.sin, math.cos, 0.0, 2 * math.pi)
+EXP = Table(math.exp, math.exp, 0.0, math.log(2))
+LOG = Table(math.log, lambda x: 1 / x, 1.0, 1.0)
+QUARTER = DEFAULT_SEGMENTS // 4     # pi/2 in SIN segments
+
+
+# SCALAR FUNCTIONS
+def _sin_segment(x, shift):
+    t = x * SIN.scale
+    i = math.floor(t)
+    return SIN.segment((i + shift) & SIN.mask, t - i)
+
+
+def approx_sin(x):
+    if not -REDUCTION_LIMIT < x < REDUCTION_LIMIT:
+        return math.sin(x)
+    return _sin_segment(x, 0)
+
+
+def approx_cos(x):
+    if not -REDUCTION_LIMIT < x < REDUCTION_LIMIT:
+        return math.cos(x)
+    return _sin_segment(x, QUARTER)
+
+
+def approx_tan(x):
+    if not -REDUCTION_LIMIT < x < REDUCTION_LIMIT:
+        return math.tan(x)
+    sin, cos = _sin_segment(x, 0), _sin_segment(x, QUARTER)
+    return sin / cos if cos else math.copysign(math.inf, sin)
+
+
+def approx_exp(x):
+    if not EXP_RANGE[0] < x < EXP_RANGE[1]:
+        return math.exp(x)
+    k = math.floor(x * INV_LN2)
+    t = (x - k * LN2_HI - k * LN2_LO) * EXP.scale
+    i = min(max(int(t), 0), EXP.mask)
+    return math.ldexp(EXP.segment(i, t - i), k)
+
+
+def approx_log(x):
+    if not 0 < x < math.inf:
+        return math.log(x)
+    m, e = math.frexp(x)            # 0.5 <= m < 1, exact
+    t = (2 * m - 1) * LOG.scale     # exact as well: scale is a power of two
+    i = int(t)
+    return (e - 1) * LN2_HI + (e - 1) * LN2_LO + LOG.segment(i, t - i)
+
+
+SCALAR = {
+    "sin": approx_sin,
+    "cos": approx_cos,
+    "tan": approx_tan,
+    "exp": approx_exp,
+    "log": approx_log,
+}
+
+
+# BATCHED FUNCTIONS (NumPy)
+def _numpy_sin_segment(np, x, shift):
+    t = x * SIN.scale
+    index = np.floor(t)
+    u = t - index
+    index = index.astype(np.int64)
+    index += shift
+    index &= SIN.mask
+    return SIN.gather(np, index, u)
+
+
+def _numpy_sin(np, x):
+    return _numpy_sin_segment(np, x, 0)
+
+
+def _numpy_cos(np, x):
+    return _numpy_sin_segment(np, x, QUARTER)
+
+
+def _numpy_tan(np, x):
+    return _numpy_sin_segment(np, x, 0) / _numpy_sin_segment(np, x, QUARTER)
+
+
+def _numpy_exp(np, x):
+    k = np.floor(x * INV_LN2)
+    t = (x - k * LN2_HI - k * LN2_LO) * EXP.scale
+    index = np.clip(t.astype(np.int64), 0, EXP.mask)
+    return np.ldexp(EXP.gather(np, index, t - index), k.astype(np.int32))
+
+
+def _numpy_log(np, x):
+    m, e = np.frexp(x)
+    t = (2 * m - 1) * LOG.scale
+    index = t.astype(np.int64)
+    e = (e - 1).astype(np.float64)
+    return e * LN2_HI + e * LN2_LO + LOG.gather(np, index, t - index)
+
+
+# name -> (table version, exact ufunc name, test for arguments the table handles)
+_NUMPY = {
+    "sin": (_numpy_sin, "sin", lambda np, x: np.abs(x) < REDUCTION_LIMIT),
+    "cos": (_numpy_cos, "cos", lambda np, x: np.abs(x) < REDUCTION_LIMIT),
+    "tan": (_numpy_tan, "tan", lambda np, x: np.abs(x) < REDUCTION_LIMIT),
+    "exp": (_numpy_exp, "exp", lambda np, x: (x > EXP_RANGE[0]) & (x < EXP_RANGE[1])),
+    "log": (_numpy_log, "log", lambda np, x: (x > 0) & (x < math.inf)),
+}
+
+
+def _numpy_approximate(np, name, x):
+    """Table version of `name` over an array; exact ufunc where the table does not apply"""
+    func, exact, in_range = _NUMPY[name]
+    inside = in_range(np, x)
+    if inside.all():
+        return func(np, x)
+    result = func(np, np.where(inside, x, 1.0))
+    outside = ~inside
+    result[outside] = getattr(np, exact)(x[outside])
+    return result
+
+
+def numpy_functions(np):
+    """Table versions of the vectorized expression functions (see vectorized.py)"""
+
+    def table_function(name):
+        def func(x):
+            x = np.asarray(x, dtype=np.float64)
+            if x.ndim == 0:     # a constant argument
+                return _numpy_approximate(np, name, x.reshape(1))[0]
+            return _numpy_approximate(np, name, x)
+        return func
+
+    functions = {name: table_function(name) for name in FUNCTIONS}
+    approx_log = functions["log"]
+
+    def log(x, base=None):
+        if base is None:
+            return approx_log(x)
+        return approx_log(x) / approx_log(base)
+
+    functions["log"] = log
+    return functions
+
+
+def approximate(name, values, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Applies the approximation of `name` to every value.
+
+    values may be a NumPy array, array.array or any sequence of numbers.
+    Returns a vectorized.BatchResult: float64 ndarray values and a bool
+    error mask with NumPy, otherwise array('d') of the exact results and
+    a bytearray of 0/1 flags (see the module docstring).
+    """
+    if name not in SCALAR:
+        raise ValueError(f"No approximation for {name!r}; choose from {', '.join(FUNCTIONS)}")
+
+    np = load_numpy()
+    if np is None:
+        return _exact_python(getattr(math, name), values)
+
+    x = _as_float_array(values, np)
+    result = np.empty(len(x), dtype=np.float64)
+    with np.errstate(all="ignore"):
+        # Chunks keep the temporaries in the CPU cache
+        for start in range(0, len(x), chunk_size):
+            stop = start + chunk_size
+            result[start:stop] = _numpy_approximate(np, name, x[start:stop])
+    errors = ~np.isfinite(result)
+    result[errors] = np.nan
+    return BatchResult(result, errors)
+
+
+def _exact_python(func, values):
+    """math function per element, NaN and an error flag where it fails"""
+    values = list(values)
+    results = array("d", bytes(8 * len(values)))
+    errors = bytearray(len(values))
+    for i, value in enumerate(values):
+        try:
+            result = func(value)
+        except (ValueError, OverflowError):
+            result = math.nan
+        if math.isfinite(result):
+            results[i] = result
+        else:
+            results[i] = math.nan
+            errors[i] = 1
+    return BatchResult(results, errors)
+
+
+# ACCURACY REPORT
+# name -> sampler(rng) returning one argument from the range that is checked
+REPORT_DOMAINS = {
+    "sin": lambda rng: rng.uniform(-1000, 1000),
+    "cos": lambda rng: rng.uniform(-1000, 1000),
+    "tan": lambda rng: rng.uniform(-1.5, 1.5),
+    "exp": lambda rng: rng.uniform(-700, 700),
+    "log": lambda rng: 10 ** rng.uniform(-300, 300),
+}
+
+
+def accuracy_report(samples=100000, seed=0):
+    """
+    Compares every approximation with the math module on random arguments.
+
+    The error of one result is |approx - exact| / max(1, |exact|):
+    absolute for small results, relative for large ones (exp).
+    Returns {name: {"max_error", "max_rel_error", "mean_error", "worst_input"}}.
+    """
+    rng = random.Random(seed)
+    report = {}
+    for name, sampler in REPORT_DOMAINS.items():
+        approx, exact = SCALAR[name], getattr(math, name)
+        max_error = max_rel = total = 0.0
+        worst = None
+        for _ in range(samples):
+            x = sampler(rng)
+            expected = exact(x)
+            difference = abs(approx(x) - expected)
+            error = difference / max(1.0, abs(expected))
+            total += error
+            if expected:
+                max_rel = max(max_rel, difference / abs(expected))
+            if error > max_error or worst is None:
+                max_error, worst = error, x
+        report[name] = {
+            "max_error": max_error,
+            "max_rel_error": max_rel,
+            "mean_error": total / samples,
+            "worst_input": worst,
+        }
+    return report
+
+
+def format_report(report):
+    lines = [f"{'function':<10}{'max error':>12}{'max rel err':>14}{'mean error':>12}  worst input"]
+    for name, entry in report.items():
+        lines.append(f"{name:<10}{entry['max_error']:>12.3e}{entry['max_rel_error']:>14.3e}"
+                     f"{entry['mean_error']:>12.3e}  {entry['worst_input']:.6g}")
+    return "\n".join(lines)
+
+
+def throughput(name="sin", size=1 << 20):
+    """Elements per second: approximate() vs math per element (and NumPy's own ufunc)"""
+    values = array("d", (random.uniform(0.1, 10) for _ in range(size)))
+    exact = getattr(math, name)
+    timings = {
+        "math per element": lambda: [exact(x) for x in values],
+        "approximate()": lambda: approximate(name, values),
+    }
+    np = load_numpy()
+    if np is not None:
+        column = _as_float_array(values, np)
+        timings[f"numpy.{name}"] = lambda: getattr(np, name)(column)
+
+    rates = {}
+    for label, func in timings.items():
+        started = time.perf_counter()
+        func()
+        rates[label] = size / (time.perf_counter() - started)
+    return rates
+
+
+def main():
+    print(format_report(accuracy_report()))
+    print()
+    for name in FUNCTIONS:
+        rates = throughput(name)
+        print(f"{name}: " + ", ".join(f"{label} {rate / 1e6:.1f}M/s" for label, rate in rates.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+"""
+Headless Batch Mode for the Scientific Calculator
+
+Reads one expression per line from stdin or a file and writes one result
+per line, with no prompts, menus or screen clears:
+
+    python calculator_oops.py --batch expressions.txt
+    cat expressions.txt | python calculator.py --batch > results.txt
+
+Input is processed as a pipeline of generators (read -> evaluate ->
+format), so memory use stays constant however large the input is and
+results are written as soon as they are produced. Lines that fail are
+written as "error: <reason>" so output line N always belongs to input
+line N. Blank lines and lines starting with # are skipped.
+
+With --op NAME every line instead holds the operands of one registry
+operation (see operations.py), separated by spaces:
+
+    printf "1000\n0.01\n" | python calculator.py --batch --op log10
+
+With --reduce sum, product or stats the whole input is instead one
+stream of operands (separated by whitespace or commas, any number per
+line) and a single result is written, computed in constant memory by
+reductions.py and stats.py:
+
+    python calculator.py --batch numbers.txt --reduce sum
+    python calculator.py --batch data.txt --reduce stats --workers 8
+
+With --workers N the evaluation is spread over N processes (see
+parallel.py); output order is unchanged. --memoize SIZE puts LRU caches
+of SIZE entries in front of the pure scientific functions (see memo.py),
+which pays off when the same arguments come back often.
+
+Every line goes through a guard.Guard first, as in server.py: a line
+whose result would be too large (9**9**9**9) is refused at once, and
+one that is merely expensive runs in a worker process that is killed
+after --timeout seconds. Either way the line gets an error row and the
+run goes on.
+
+Inputs and outputs named *.npy or *.f64 (or chosen with --in-format
+and --out-format) are binary float64 columns instead of text, see
+columnar.py. Each row then holds the operands of --op, or the values
+of the variables of one --expr expression, and is evaluated a whole
+chunk of rows at a time by vectorized.py. Undefined results are NaN
+in binary output and "error: undefined" in text output:
+
+    python calculator.py --batch operands.npy --op power -o results.npy
+    python calculator.py --batch xy.f64 --expr "log(x) * y" --vars x,y -o out.f64
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import argparse
+import math
+import sys
+from array import array
+
+from columnar import FORMATS, detect_format
+from expression import cached_expression
+from guard import DEFAULT_TIMEOUT, Guard
+from operations import OPERATIONS, parse_operands
+
+OUTPUT_BUFFER_SIZE = 1 << 16
+
+# Binary --op input: operations without an expression function of their
+# own, written over the operand columns a and b
+COLUMN_VARIABLES = ("a", "b")
+INFIX_EXPRESSIONS = {
+    "subtraction": "a - b",
+    "division": "a / b",
+    "modulus": "a % b",
+    "power": "a ** b",
+}
+
+
+# PIPELINE STAGES
+def read_expressions(stream):
+    """Yields stripped expressions, skipping blank lines and comments"""
+    for line in stream:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line
+
+
+def evaluate_expressions(expressions, guard):
+    """Yields (expression, result, error) for every expression, evaluated through `guard`"""
+    for expression in expressions:
+        try:
+            yield expression, guard.evaluate(expression), None
+        except Exception as error:
+            yield expression, None, error
+
+
+def evaluate_operation(lines, name, guard):
+    """Yields (line, result, error) for every line of operands of one operation"""
+    operation = OPERATIONS[name]
+    for line in lines:
+        try:
+            yield line, guard.calculate(name, *parse_operands(operation, line.split())), None
+        except Exception as error:
+            yield line, None, error
+
+
+def format_results(results):
+    """Yields one output line per evaluated expression"""
+    for expression, result, error in results:
+        if error is None:
+            try:
+                yield f"{result}\n"
+                continue
+            except ValueError as formatting:    # an integer too long for str()
+                error = formatting
+        yield f"error: {str(error) or type(error).__name__}\n"
+
+
+def run_batch(source, output, pool=None, operation=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Streams expressions from `source` to results in `output`.
+
+    pool is an optional parallel.ParallelEvaluator to spread the work
+    over several processes. operation is an optional registry name; each
+    line then holds that operation's operands. timeout is the number of
+    seconds an expensive line may run (None = no limit). Returns the
+    number of lines that failed.
+    """
+    expressions = read_expressions(source)
+    guard = None
+    if pool is None:
+        guard = Guard(workers=1, timeout=timeout)
+        if operation is None:
+            results = evaluate_expressions(expressions, guard)
+        else:
+            results = evaluate_operation(expressions, operation, guard)
+        lines = format_results(results)
+    else:
+        lines = pool.evaluate(expressions, operation, timeout)
+
+    failures = 0
+    write = output.write
+    try:
+        for line in lines:
+            if line.startswith("error:"):
+                failures += 1
+            write(line)
+    finally:
+        if guard is not None:
+            guard.close()
+    output.flush()
+    return failures
+
+
+def run_reduction(source, output, name, pool=None):
+    """
+    Writes the sum, product or statistics of every operand in `source`;
+    returns 1 on failure. pool is only used for statistics.
+    """
+    from reductions import stream_product, stream_sum
+    try:
+        if name == "stats":
+            from stats import summarize
+            summary = summarize(source, pool).summary()
+            result = " ".join(f"{key}={round(value, 6)}" for key, value in summary.items())
+        elif name == "sum":
+            result = round(stream_sum(source), 6)
+        else:
+            product = stream_product(source)
+            result = product if product.value == 0 or not math.isfinite(product.value) else round(product.value, 6)
+    except Exception as error:
+        output.write(f"error: {str(error) or type(error).__name__}\n")
+        return 1
+    output.write(f"{result}\n")
+    output.flush()
+    return 0
+
+
+# BINARY COLUMNS
+def operation_expression(name):
+    """Expression computing an operation over the columns a, b (None for n-ary operations)"""
+    operation = OPERATIONS[name]
+    if name in INFIX_EXPRESSIONS:
+        return INFIX_EXPRESSIONS[name]
+    if operation.expression:
+        return f"{name}({', '.join(COLUMN_VARIABLES[:operation.arity])})"
+    return None
+
+
+def _apply_rows(name, values, width):
+    """BatchResult of an n-ary operation on every row of a flat chunk"""
+    from vectorized import BatchResult
+    operation = OPERATIONS[name]
+    check, func = operation.check, operation.func
+    rows = len(values) // width
+    results = array("d", bytes(8 * rows))
+    errors = bytearray(rows)
+    for row in range(rows):
+        operands = values[row * width:(row + 1) * width].tolist()
+        try:
+            result = math.nan if check and check(operands) else float(func(operands))
+        except (ArithmeticError, ValueError):
+            result = math.nan
+        if math.isfinite(result):
+            results[row] = result
+        else:
+            results[row] = math.nan
+            errors[row] = 1
+    return BatchResult(results, errors)
+
+
+def evaluate_columns(chunks, width, expression=None, variables=None, operation=None):
+    """
+    Yields a vectorized.BatchResult for every chunk of rows (flat float64
+    buffers, `width` values per row). Rows hold the values of
+    `variables` for `expression`, or the operands of `operation`.
+    """
+    from columnar import split_columns
+    from vectorized import evaluate_batch, load_numpy
+    if operation is not None:
+        expression = operation_expression(operation)
+        variables = COLUMN_VARIABLES[:width]
+    np = load_numpy()
+    for chunk in chunks:
+        if expression is None:
+            yield _apply_rows(operation, chunk, width)
+        else:
+            columns = dict(zip(variables, split_columns(chunk, width, np)))
+            yield evaluate_batch(expression, columns, len(chunk))
+
+
+def count_errors(result):
+    """Number of failed rows in a BatchResult"""
+    if isinstance(result.errors, bytearray):
+        return result.errors.count(1)
+    return int(result.errors.sum())
+
+
+def format_values(result):
+    """Text output of one chunk of results"""
+    return "".join(f"{round(value, 6)}\n" if value == value else "error: undefined\n"
+                   for value in result.values.tolist())
+
+
+def run_columns(reader, output, out_format, expression=None, variables=None, operation=None):
+    """
+    Evaluates every row of a columnar.ColumnReader into `output`: a
+    binary stream for f64 and npy, a text stream for text. Returns the
+    number of rows that failed.
+    """
+    from columnar import ColumnWriter
+    if expression is not None:
+        variables = variables or cached_expression(expression).variables
+        if len(variables) != reader.width:
+            raise ValueError(f"{len(variables)} variable(s) {list(variables)} "
+                             f"but {reader.width} value(s) per row")
+    else:
+        arity = OPERATIONS[operation].arity
+        if arity is not None and operation_expression(operation) is None:
+            raise ValueError(f"{operation} needs text input")
+        if arity not in (None, reader.width):
+            raise ValueError(f"{operation} needs {arity} value(s) per row, "
+                             f"the input has {reader.width}")
+    results = evaluate_columns(reader.chunks(), reader.width, expression, variables, operation)
+
+    failures = 0
+    if out_format == "text":
+        for result in results:
+            failures += count_errors(result)
+            output.write(format_values(result))
+        output.flush()
+        return failures
+    with ColumnWriter(output, out_format, reader.rows) as writer:
+        for result in results:
+            failures += count_errors(result)
+            writer.write(result.values)
+    return failures
+
+
+# COMMAND LINE ENTRY POINT
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Evaluate one expression per line without the interactive menu")
+    parser.add_argument("--batch", nargs="?", const="-", default="-", metavar="FILE",
+                        help="file to read expressions from (default: stdin)")
+    parser.add_argument("--output", "-o", default="-", metavar="FILE",
+                        help="file to write results to (default: stdout)")
+    parser.add_argument("--op", choices=sorted(OPERATIONS), metavar="NAME",
+                        help="apply one operation to the operands on each line")
+    parser.add_argument("--reduce", choices=("sum", "product", "stats"),
+                        help="write the sum, product or statistics of all operands in the input")
+    parser.add_argument("--workers", "-j", type=int, default=0, metavar="N",
+                        help="evaluate in N worker processes (0 = in this process)")
+    parser.add_argument("--chunk-size", type=int, default=4096, metavar="N",
+                        help="expressions sent to a worker at a time (default: 4096)")
+    parser.add_argument("--max-pending", type=int, default=None, metavar="N",
+                        help="chunks in flight before reading pauses (default: 2 per worker)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, metavar="SECONDS",
+                        help=f"time limit of an expensive line (default: {DEFAULT_TIMEOUT:g})")
+    parser.add_argument("--memoize", type=int, nargs="?", const=1024, default=None, metavar="SIZE",
+                        help="cache every pure scientific function (memo.py) with SIZE entries")
+    binary = parser.add_argument_group("binary columns (see columnar.py)")
+    binary.add_argument("--in-format", choices=FORMATS,
+                        help="input format (default: from the extension, .npy or .f64, else text)")
+    binary.add_argument("--out-format", choices=FORMATS,
+                        help="output format (default: from the extension, .npy or .f64, else text)")
+    binary.add_argument("--expr", metavar="EXPRESSION",
+                        help="evaluate one expression per row of binary input")
+    binary.add_argument("--vars", metavar="X,Y,...",
+                        help="variables of --expr in column order (default: order of first use)")
+    binary.add_argument("--width", type=int, default=None, metavar="N",
+                        help="values per row of raw f64 input (default: the operation's arity)")
+    return parser
+
+
+def _open_output(path):
+    if path == "-":
+        return sys.stdout
+    return open(path, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE)
+
+
+def _make_pool(args):
+    if not args.workers:
+        return None
+    from parallel import ParallelEvaluator
+    initializer, initargs = None, ()
+    if args.memoize is not None:
+        import memo     # the workers need their own caches
+        initializer, initargs = memo.enable, (args.memoize, {"factorial": args.memoize})
+    return ParallelEvaluator(args.workers, args.chunk_size, args.max_pending, initializer, initargs)
+
+
+def main_columns(args, in_format, out_format):
+    """Batch mode over binary operand columns, returns 0 if every row succeeded and 1 otherwise"""
+    from columnar import ColumnReader
+    variables = tuple(args.vars.split(",")) if args.vars else None
+    output = pool = None
+    try:
+        if args.expr:
+            width = len(variables or cached_expression(args.expr).variables)
+        elif args.op:
+            width = args.width or OPERATIONS[args.op].arity
+        else:
+            width = args.width
+        with ColumnReader(args.batch, in_format, width) as reader:
+            if args.reduce:
+                output, pool = _open_output(args.output), _make_pool(args)
+                failures = run_reduction(reader, output, args.reduce, pool)
+            elif out_format == "text":
+                output = _open_output(args.output)
+                failures = run_columns(reader, output, out_format, args.expr, variables, args.op)
+            else:
+                failures = run_columns(reader, args.output, out_format, args.expr, variables, args.op)
+    except (OSError, ValueError, ArithmeticError) as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_pending=True)
+        if output not in (None, sys.stdout):
+            output.close()
+    if failures and not args.reduce:
+        print(f"{failures} row(s) undefined", file=sys.stderr)
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    """Runs batch mode, returns 0 if every line succeeded and 1 otherwise"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.memoize is not None:
+        if args.memoize < 0:
+            parser.error("--memoize needs a size >= 0")
+        import memo
+        memo.enable(args.memoize, {"factorial": args.memoize})
+
+    in_format = detect_format(args.batch, args.in_format)
+    out_format = detect_format(args.output, args.out_format)
+    if args.op and args.expr:
+        parser.error("--op and --expr cannot be combined")
+    if in_format != "text":
+        if not (args.op or args.expr or args.reduce):
+            parser.error("binary input needs --op, --expr or --reduce")
+        if args.reduce and out_format != "text":
+            parser.error("--reduce writes text output")
+        return main_columns(args, in_format, out_format)
+    if args.expr or out_format != "text":
+        parser.error("--expr and binary output need binary input (f64 or npy)")
+
+    if args.reduce:
+        source = sys.stdin.buffer if args.batch == "-" else open(args.batch, "rb")
+    else:
+        source = sys.stdin if args.batch == "-" else open(args.batch, encoding="utf-8")
+    output = _open_output(args.output)
+    pool = _make_pool(args)
+
+    try:
+        if args.reduce:
+            failures = run_reduction(source, output, args.reduce, pool)
+        else:
+            failures = run_batch(source, output, pool, args.op, args.timeout)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_pending=True)
+        if source not in (sys.stdin, sys.stdin.buffer):
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
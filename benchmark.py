@@ -0,0 +1,268 @@
+"""
+Benchmark Suite for the Scientific Calculator
+
+Drives every calculator operation and a set of sample expressions
+headlessly (no input() anywhere) and reports, per operation:
+
+- ops/sec     calls per second over the measuring window
+- p50 / p99   per-call latency percentiles in microseconds
+- peak KiB    peak memory allocated during a fixed number of calls
+
+Usage:
+    python benchmark.py                          # run everything, print a table
+    python benchmark.py --filter expr            # only benchmarks whose name contains "expr"
+    python benchmark.py --save baseline.json     # store results as a baseline
+    python benchmark.py --compare baseline.json --threshold 0.15
+    python benchmark.py --startup                # cold-start time against a budget
+    python benchmark.py --memoize 1024           # with memo.py caches on every pure function
+
+With --compare the exit code is 1 when any operation got slower than the
+baseline by more than the threshold (ops/sec down or p50 up by that
+fraction), so it can gate a CI job. With --startup it is 1 when the
+median cold start of any command exceeds the budget.
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from calculator_oops import ScientificCalculator
+from expression import compile_expression
+
+DEFAULT_DURATION = 0.5      # seconds measured per benchmark
+DEFAULT_THRESHOLD = 0.10    # allowed slowdown before --compare fails
+WARMUP_CALLS = 200
+MEMORY_CALLS = 1000
+
+STARTUP_RUNS = 10
+STARTUP_BUDGET_MS = 100     # median cold start allowed per command
+
+# name -> (python arguments, stdin); each runs in a fresh interpreter
+STARTUP_COMMANDS = {
+    "python_only": (["-c", "pass"], None),
+    "import_oop": (["-c", "import calculator_oops"], None),
+    "import_procedural": (["-c", "import calculator"], None),
+    "batch_one_line": (["calculator_oops.py", "--batch"], "sqrt(2) * pi\n"),
+    "one_shot_expr": (["calc.py", "sqrt(2) * pi"], None),
+    "one_shot_op": (["calc.py", "--op", "log10", "1000"], None),
+}
+
+SAMPLE_EXPRESSIONS = {
+    "expr_simple": "2 + 3 * 4",
+    "expr_functions": "23 + 23 - 3 / 2 * 2 + sin(0) + cos(0)",
+    "expr_nested": "sqrt(abs(log(10) * tan(1))) ** 2 / log10(1000)",
+}
+
+
+# BENCHMARK CASES
+def build_cases(calc):
+    """Returns (name, zero-argument callable) for every operation"""
+    cases = [
+        ("addition", lambda: calc.calculate("addition", [1.5, 2.25, 3.125])),
+        ("subtraction", lambda: calc.calculate("subtraction", 7.5, 2.25)),
+        ("multiplication", lambda: calc.calculate("multiplication", [1.5, 2.25, 3.125])),
+        ("division", lambda: calc.calculate("division", 7.5, 2.5)),
+        ("modulus", lambda: calc.calculate("modulus", 7.5, 2.0)),
+        ("power", lambda: calc.calculate("power", 2.0, 10.0)),
+        ("sqrt", lambda: calc.calculate("sqrt", 2.0)),
+        ("pow", lambda: calc.calculate("pow", 2.0, 0.5)),
+        ("log", lambda: calc.calculate("log", 10.0)),
+        ("log10", lambda: calc.calculate("log10", 1000.0)),
+        ("sin", lambda: calc.calculate("sin", 1.0)),
+        ("cos", lambda: calc.calculate("cos", 1.0)),
+        ("tan", lambda: calc.calculate("tan", 1.0)),
+        ("factorial", lambda: calc.calculate("factorial", 20)),
+        ("factorial_large", lambda: calc.calculate("factorial", 5000)),
+        ("abs", lambda: calc.calculate("abs", -2.5)),
+        ("exp", lambda: calc.calculate("exp", 1.0)),
+    ]
+    for name, expression in SAMPLE_EXPRESSIONS.items():
+        cases.append((name, lambda expression=expression: calc.evaluate(expression)))
+    cases.append(("expr_compile", lambda: compile_expression(SAMPLE_EXPRESSIONS["expr_nested"])))
+    cases.append(("expr_variables", lambda: calc.evaluate("x ** 2 + sin(y)", x=1.5, y=0.5)))
+    cases.append(("solve_newton", lambda: calc.solve("x ** 3 - 2 * x - 5", guess=2)))
+    cases.append(("solve_brent", lambda: calc.solve("cos(x) - x", bracket=(0, 1))))
+    cases.append(("integrate", lambda: calc.integrate("sin(x) ** 2 * exp(-x / 5)", 0, 50)))
+    return cases
+
+
+# MEASUREMENT
+def percentile(sorted_values, fraction):
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def measure(func, duration=DEFAULT_DURATION):
+    """Times individual calls of `func` for about `duration` seconds"""
+    for _ in range(WARMUP_CALLS):
+        func()
+
+    clock = time.perf_counter_ns
+    latencies = []
+    record = latencies.append
+    deadline = clock() + int(duration * 1e9)
+    started = clock()
+    while True:
+        before = clock()
+        func()
+        after = clock()
+        record(after - before)
+        if after >= deadline:
+            break
+    elapsed = (clock() - started) / 1e9
+
+    tracemalloc.start()
+    for _ in range(MEMORY_CALLS):
+        func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "ops_per_sec": len(latencies) / elapsed,
+        "p50_us": percentile(latencies, 0.50) / 1000,
+        "p99_us": percentile(latencies, 0.99) / 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+def run_benchmarks(name_filter=None, duration=DEFAULT_DURATION):
+    """Runs every (matching) benchmark and returns {name: metrics}"""
+    calc = ScientificCalculator()
+    results = {}
+    for name, func in build_cases(calc):
+        if name_filter and name_filter not in name:
+            continue
+        results[name] = measure(func, duration)
+    return results
+
+
+def measure_startup(runs=STARTUP_RUNS):
+    """Wall-clock time of fresh interpreters running each startup command"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    for name, (args, stdin) in STARTUP_COMMANDS.items():
+        times = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            subprocess.run([sys.executable, *args], cwd=here, input=stdin, text=True,
+                           stdout=subprocess.DEVNULL, check=True)
+            times.append((time.perf_counter() - started) * 1000)
+        results[name] = {"median_ms": statistics.median(times), "max_ms": max(times)}
+    return results
+
+
+# REPORTING
+def format_table(results, baseline=None):
+    lines = [f"{'operation':<18}{'ops/sec':>14}{'p50 us':>10}{'p99 us':>10}{'peak KiB':>10}"
+             + ("   vs baseline" if baseline else "")]
+    for name, r in results.items():
+        line = (f"{name:<18}{r['ops_per_sec']:>14,.0f}{r['p50_us']:>10.2f}"
+                f"{r['p99_us']:>10.2f}{r['peak_kib']:>10.1f}")
+        if baseline and name in baseline:
+            change = r["ops_per_sec"] / baseline[name]["ops_per_sec"] - 1
+            line += f"   {change:+.1%}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def format_startup(results, budget=STARTUP_BUDGET_MS):
+    lines = [f"{'startup':<18}{'median ms':>12}{'max ms':>10}"]
+    for name, r in results.items():
+        flag = "   over budget" if r["median_ms"] > budget else ""
+        lines.append(f"{name:<18}{r['median_ms']:>12.1f}{r['max_ms']:>10.1f}{flag}")
+    return "\n".join(lines)
+
+
+def find_regressions(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Returns a message for every benchmark slower than baseline by > threshold"""
+    regressions = []
+    for name, r in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]
+        if r["ops_per_sec"] < base["ops_per_sec"] * (1 - threshold):
+            regressions.append(f"{name}: ops/sec {base['ops_per_sec']:,.0f} -> {r['ops_per_sec']:,.0f}")
+        elif r["p50_us"] > base["p50_us"] * (1 + threshold):
+            regressions.append(f"{name}: p50 {base['p50_us']:.2f}us -> {r['p50_us']:.2f}us")
+    return regressions
+
+
+# COMMAND LINE ENTRY POINT
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark calculator operations")
+    parser.add_argument("--filter", metavar="TEXT", help="only run benchmarks whose name contains TEXT")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, metavar="SECONDS",
+                        help=f"time measured per benchmark (default: {DEFAULT_DURATION})")
+    parser.add_argument("--save", metavar="FILE", help="write results to a baseline JSON file")
+    parser.add_argument("--compare", metavar="FILE", help="compare against a baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, metavar="FRACTION",
+                        help=f"allowed slowdown before --compare fails (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--json", action="store_true", help="print results as JSON instead of a table")
+    parser.add_argument("--memoize", type=int, nargs="?", const=1024, default=None, metavar="SIZE",
+                        help="cache every pure scientific function (memo.py) with SIZE entries")
+    parser.add_argument("--startup", action="store_true",
+                        help="measure cold-start time of fresh interpreters instead")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_MS, metavar="MS",
+                        help=f"median cold start allowed with --startup (default: {STARTUP_BUDGET_MS})")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.startup:
+        return run_startup(args)
+    if args.memoize is not None:
+        import memo
+        memo.enable(default_size=args.memoize, sizes={"factorial": args.memoize})
+    results = run_benchmarks(args.filter, args.duration)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as stream:
+            baseline = json.load(stream)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(format_table(results, baseline))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as stream:
+            json.dump(results, stream, indent=2)
+        print(f"\nBaseline saved to {args.save}")
+
+    if baseline is not None:
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) above {args.threshold:.0%}:")
+            for message in regressions:
+                print("  " + message)
+            return 1
+        print(f"\nNo regressions above {args.threshold:.0%}")
+    return 0
+
+
+def run_startup(args):
+    """--startup: checks cold-start time of each command against the budget"""
+    results = measure_startup()
+    print(json.dumps(results, indent=2) if args.json else format_startup(results, args.budget))
+    over = [name for name, r in results.items() if r["median_ms"] > args.budget]
+    if over:
+        print(f"\n❌ {len(over)} command(s) above the {args.budget:.0f} ms budget: {', '.join(over)}")
+        return 1
+    print(f"\nAll commands within the {args.budget:.0f} ms budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
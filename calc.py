@@ -0,0 +1,148 @@
+"""
+One-Shot Command Line for the Scientific Calculator
+
+Evaluates a single expression or operation from the command line and
+prints only the result, so scripts can call the calculator directly
+instead of walking the interactive menu:
+
+    python calc.py "sqrt(2) * pi"              ->  4.442883
+    python calc.py "x ** 2 + y" x=3 y=0.5      ->  9.5
+    python calc.py --op log10 1000             ->  3.0
+    python calc.py --op factorial 25           ->  15511210043330985984000000
+    python calc.py --digits 40 --op sqrt 2     ->  1.414213562373095048801688724209698078570
+
+Every calculation goes through a guard.Guard, as in batch mode: a
+result estimated to be too large (9 ** 9 ** 9 ** 9) is refused at once,
+and an expensive one runs in a worker process that is killed after
+--timeout seconds (10 by default).
+
+Exit codes:
+    0  success, the result is on stdout
+    1  the calculation failed (invalid expression, domain error, refused
+       or timed out); the reason is on stderr
+    2  the command line itself is wrong (unknown option or operation)
+
+Arguments are parsed by hand rather than with argparse: importing
+argparse would be a noticeable part of a one-shot run's startup time.
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import sys
+
+DEFAULT_TIMEOUT = 10.0      # seconds, as in guard.py (imported only when needed)
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+USAGE = """usage: calc.py [--timeout SECONDS] EXPRESSION [NAME=VALUE ...]
+       calc.py [--timeout SECONDS] --op OPERATION OPERAND [OPERAND ...]
+       calc.py [--timeout SECONDS] --digits N --op OPERATION OPERAND [OPERAND ...]
+
+Prints the result of one expression or operation and exits.
+Exit code 0 on success, 1 if the calculation failed, 2 on usage errors."""
+
+
+class UsageError(ValueError):
+    """Raised for a malformed command line"""
+
+
+def parse_args(argv):
+    """
+    Returns (expression or None, operation name or None, operands or
+    variables, digits, timeout)
+    """
+    digits = None
+    operation = None
+    timeout = DEFAULT_TIMEOUT
+    args = list(argv)
+    while args and args[0].startswith("--"):
+        option = args.pop(0)
+        if option == "--op":
+            if not args:
+                raise UsageError("--op needs an operation name")
+            operation = args.pop(0)
+        elif option == "--digits":
+            try:
+                digits = int(args.pop(0))
+            except (IndexError, ValueError):
+                raise UsageError("--digits needs a whole number") from None
+            if digits < 1:
+                raise UsageError("--digits must be >= 1")
+        elif option == "--timeout":
+            try:
+                timeout = float(args.pop(0))
+            except (IndexError, ValueError):
+                raise UsageError("--timeout needs a number of seconds") from None
+            if not timeout > 0:
+                raise UsageError("--timeout must be > 0")
+        elif option == "--":
+            break
+        else:
+            raise UsageError(f"unknown option {option}")
+
+    if operation is not None:
+        return None, operation, args, digits, timeout
+    if digits is not None:
+        raise UsageError("--digits only applies to --op")
+    if not args:
+        raise UsageError("no expression given")
+    expression, assignments = args[0], args[1:]
+    variables = {}
+    for assignment in assignments:
+        name, sep, value = assignment.partition("=")
+        if not sep or not name:
+            raise UsageError(f"expected NAME=VALUE, got {assignment!r}")
+        variables[name] = value
+    return expression, None, variables, digits, timeout
+
+
+def run(argv, out=sys.stdout, err=sys.stderr):
+    """Evaluates one command line; returns the exit code"""
+    if not argv or argv[0] in ("-h", "--help"):
+        print(USAGE, file=out if argv else err)
+        return EXIT_OK if argv else EXIT_USAGE
+
+    try:
+        expression, name, values, digits, timeout = parse_args(argv)
+    except UsageError as error:
+        print(f"calc: {error}\n{USAGE}", file=err)
+        return EXIT_USAGE
+
+    from calculator_oops import ScientificCalculator
+    from guard import Guard
+    from operations import OPERATIONS, parse_operands
+
+    calc = ScientificCalculator()
+    guard = Guard(workers=1, timeout=timeout)
+    try:
+        if name is not None:
+            operation = OPERATIONS.get(name)
+            if operation is None or operation.label is None:
+                print(f"calc: unknown operation {name!r}", file=err)
+                return EXIT_USAGE
+            if digits is not None:
+                calc.set_precision(digits)
+            operands = parse_operands(operation, values, calc.number)
+            result = guard.calculate(name, *operands, precision=calc.precision)
+            result = operation.display(result, *operands)
+        else:
+            result = guard.evaluate(expression, {key: float(value) for key, value in values.items()})
+    except Exception as error:
+        print(f"error: {str(error) or type(error).__name__}", file=err)
+        return EXIT_FAILED
+    finally:
+        guard.close()
+
+    print(result, file=out)
+    return EXIT_OK
+
+
+def main(argv=None):
+    return run(sys.argv[1:] if argv is None else argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
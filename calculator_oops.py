@@ -7,6 +7,33 @@ License: MIT
 """
 
 import math
+import sys
+
+from history import DEFAULT_HISTORY_PATH, DEFAULT_WINDOW, OPERATION_IDS, HistoryStore
+from operations import (MENUS, OPERATIONS, OperationError, calculate, factorials,
+                        history_operands, menu_text, parse_operands)
+
+# Importing this module has no side effects. The expression engine,
+# decimal, NumPy and the cells sheet are only imported when first used,
+# so a one-shot command does not pay for the features it doesn't touch.
+
+HISTORY_PAGE_SIZE = 20
+
+MAIN_MENU = """
+════════════════════════════════════
+   🧮 SCIENTIFIC CALCULATOR (OOP)
+════════════════════════════════════
+1. Basic Operations
+2. Scientific Operations
+3. Evaluate Expression
+4. View History
+5. Exit
+6. Precision Mode
+7. Named Cells
+8. Solve / Integrate / Differentiate
+9. Sweep (tabulate f(x) over a range)
+════════════════════════════════════
+"""
 
 class ScientificCalculator:
     """
@@ -22,14 +49,22 @@ class ScientificCalculator:
     """
 
     # CONSTRUCTOR METHOD
-    def __init__(self):
+    def __init__(self, history_path=None, history_window=DEFAULT_WINDOW):
         """
         Constructor method
 
         Automatically called when an object of the class is created.
         Initializes the calculator state.
+
+        history_path:   file to persist history to (None = memory only)
+        history_window: number of recent entries kept in memory
         """
-        self.history = []   # Stores calculation history
+        self.history = HistoryStore(history_path, history_window)   # Stores calculation history
+        self.factorials = factorials    # Shared factorial engine (checkpoints, limits)
+        self.precision = None   # PrecisionMath in precision mode
+        self.math = math        # math module, or PrecisionMath in precision mode
+        self._cells = None      # Named cells, created on first use
+        self.instrumentation = None     # instrument.Instrumentation while enabled
 
     def clear_screen(self):
         """Clears terminal screen for better UX"""
@@ -44,304 +79,371 @@ class ScientificCalculator:
             return None
 
     def safe_float(self, prompt=""):
-        """Safely takes float input from user"""
+        """Safely takes number input from user (a Decimal in precision mode)"""
         try:
-            return float(input(prompt))
-        except ValueError:
+            return self.number(input(prompt))
+        except (ValueError, ArithmeticError):
             print("❌ Please enter a valid number")
             return None
 
-    def add_history(self, entry):
+    def add_history(self, operation, operands, result, text=""):
         """Adds an entry to calculation history"""
-        self.history.append(entry)
+        self.history.append(operation, operands, result, text)
+
+    # INSTRUMENTATION
+    def enable_instrumentation(self, profile_dir=None):
+        """
+        Starts recording call counts, latencies and errors of every
+        operation and expression; profile_dir also captures a cProfile
+        file per session. Returns the instrument.Instrumentation.
+        """
+        from instrument import INSTRUMENTED_METHODS, Instrumentation
+        self.disable_instrumentation()
+        self.instrumentation = Instrumentation(profile_dir)
+        for name, label in INSTRUMENTED_METHODS.items():
+            # Instance attributes shadow the methods; nothing changes for other instances
+            setattr(self, name, self.instrumentation.wrap(getattr(self, name), label))
+        return self.instrumentation
+
+    def disable_instrumentation(self):
+        """Removes the wrappers and writes the profile file, if any"""
+        if self.instrumentation is None:
+            return
+        from instrument import INSTRUMENTED_METHODS
+        for name in INSTRUMENTED_METHODS:
+            self.__dict__.pop(name, None)
+        self.instrumentation.close()
+        self.instrumentation = None
+
+    # PRECISION MODE
+    def set_precision(self, digits=None, mode="decimal"):
+        """
+        Switches between float mode (digits=None) and precision mode,
+        where numbers are Decimals (or exact Fractions for basic
+        operations in "fraction" mode) with `digits` significant digits
+        """
+        if digits is None:
+            self.precision = None
+            self.math = math
+        else:
+            from precision import PrecisionMath
+            self.precision = PrecisionMath(digits, mode)
+            self.math = self.precision
+
+    def number(self, value):
+        """Converts input text to the number type of the current mode"""
+        if self.precision is not None:
+            return self.precision.number(value)
+        return float(value)
+
+    def rounded(self, result):
+        """Rounds a result: 6 decimals in float mode, working precision otherwise"""
+        if self.precision is not None:
+            return self.precision.round(result)
+        return round(result, 6)
 
     # BASIC OPERATION METHODS
     def addition(self, nums):
         """Adds multiple numbers"""
-        return sum(float(i) for i in nums)
+        return self.apply("addition", [self.number(i) for i in nums])
 
     def multiplication(self, nums):
         """Multiplies multiple numbers"""
-        result = 1.0
-        for i in nums:
-            result *= float(i)
-        return result
+        return self.apply("multiplication", [self.number(i) for i in nums])
 
     def subtraction(self, a, b):
         """Subtracts two numbers"""
-        return float(a) - float(b)
+        return self.apply("subtraction", self.number(a), self.number(b))
 
     def division(self, a, b):
         """Divides two numbers"""
-        return float(a) / float(b)
+        return self.apply("division", self.number(a), self.number(b))
 
     def modulus(self, a, b):
         """Finds modulus of two numbers"""
-        return float(a) % float(b)
+        return self.apply("modulus", self.number(a), self.number(b))
 
     def power(self, a, b):
         """Raises a number to a power"""
-        return float(a) ** float(b)
+        return self.apply("power", self.number(a), self.number(b))
+
+    # OPERATION DISPATCH
+    def apply(self, name, *operands):
+        """Runs a registered operation without checks or rounding"""
+        operation = OPERATIONS[name]
+        if self.precision is not None and operation.precise:
+            return getattr(self.precision, operation.precise)(*operands)
+        return operation.func(*operands)
+
+    def calculate(self, name, *operands):
+        """Runs a registered operation with its domain checks and rounding"""
+        return calculate(name, *operands, precision=self.precision)
 
     # MENU DISPLAY METHODS
     def main_menu(self):
         """Returns main menu string"""
-        return """
-════════════════════════════════════
-   🧮 SCIENTIFIC CALCULATOR (OOP)
-════════════════════════════════════
-1. Basic Operations
-2. Scientific Operations
-3. Evaluate Expression
-4. View History
-5. Exit
-════════════════════════════════════
-"""
+        return MAIN_MENU
 
     def basic_menu(self):
         """Returns basic operations menu"""
-        return """
---- BASIC OPERATIONS ---
-1. Addition
-2. Subtraction
-3. Multiplication
-4. Division
-5. Modulus
-6. Power
-0. Back to Main Menu
-"""
+        return menu_text("basic")
 
     def scientific_menu(self):
         """Returns scientific operations menu"""
-        return """
---- SCIENTIFIC OPERATIONS ---
-1. Square Root (√x)
-2. Power (xʸ)
-3. Natural Logarithm (ln x)
-4. Logarithm Base 10 (log₁₀ x)
-5. Sine (sin x)
-6. Cosine (cos x)
-7. Tangent (tan x)
-8. Factorial (x!)
-9. Absolute Value (|x|)
-10. Exponential (eˣ)
-0. Back to Main Menu
-Note: Trigonometric functions use radians
-"""
+        return menu_text("scientific")
 
-    # BASIC MENU CONTROLLER
+    # OPERATION MENU CONTROLLERS
     def run_basic(self):
         """Handles basic operations menu logic"""
-        while True:
-            self.clear_screen()
-            print(self.basic_menu())
-
-            choice = self.safe_int("Enter choice: ")
-            if choice is None:
-                continue
-
-            if choice == 1:
-                nums = input("Enter numbers separated by space: ").split()
-                result = round(self.addition(nums), 6)
-                self.add_history(f"{' + '.join(nums)} = {result}")
-                print("Result:", result)
-
-            elif choice == 2:
-                nums = input("Enter two numbers: ").split()
-                try:
-                    result = round(self.subtraction(nums[0], nums[1]), 6)
-                    self.add_history(f"{nums[0]} - {nums[1]} = {result}")
-                    print("Result:", result)
-                except:
-                    print("❌ Invalid input")
-
-            elif choice == 3:
-                nums = input("Enter numbers separated by space: ").split()
-                result = round(self.multiplication(nums), 6)
-                self.add_history(f"{' * '.join(nums)} = {result}")
-                print("Result:", result)
+        self.run_menu("basic", self.basic_menu())
 
-            elif choice == 4:
-                nums = input("Enter two numbers: ").split()
-                try:
-                    a, b = float(nums[0]), float(nums[1])
-                    if b == 0:
-                        print("❌ Division by zero")
-                        continue
-                    result = round(self.division(a, b), 6)
-                    self.add_history(f"{a} / {b} = {result}")
-                    print("Result:", result)
-                except:
-                    print("❌ Invalid input")
-
-            elif choice == 5:
-                nums = input("Enter two numbers: ").split()
-                try:
-                    a, b = float(nums[0]), float(nums[1])
-                    if b == 0:
-                        print("❌ Modulus by zero")
-                        continue
-                    result = round(self.modulus(a, b), 6)
-                    self.add_history(f"{a} % {b} = {result}")
-                    print("Result:", result)
-                except:
-                    print("❌ Invalid input")
-
-            elif choice == 6:
-                nums = input("Enter base and power: ").split()
-                try:
-                    result = round(self.power(nums[0], nums[1]), 6)
-                    self.add_history(f"{nums[0]} ** {nums[1]} = {result}")
-                    print("Result:", result)
-                except:
-                    print("❌ Invalid input")
-
-            elif choice == 0:
-                break
-
-            input("\nPress Enter to continue...")
-
-    # SCIENTIFIC MENU CONTROLLER
     def run_scientific(self):
         """Handles scientific operations menu logic"""
+        self.run_menu("scientific", self.scientific_menu())
+
+    def run_menu(self, group, menu):
+        """Shows an operations menu and dispatches choices through the registry"""
+        operations = MENUS[group]
         while True:
             self.clear_screen()
-            print(self.scientific_menu())
+            print(menu)
 
             choice = self.safe_int("Enter choice: ")
             if choice is None:
                 continue
+            if choice == 0:
+                break
 
-            if choice == 1:
-                x = self.safe_float("Enter x (>=0): ")
-                if x is None or x < 0:
-                    print("❌ Invalid input")
-                    continue
-                result = round(math.sqrt(x), 6)
-                self.add_history(f"sqrt({x}) = {result}")
-                print("Result:", result)
+            operation = operations.get(choice)
+            if operation is not None:
+                self.run_operation(operation)
+            input("\nPress Enter to continue...")
 
-            elif choice == 2:
-                nums = input("Enter base and power: ").split()
-                try:
-                    result = round(math.pow(float(nums[0]), float(nums[1])), 6)
-                    self.add_history(f"{nums[0]} ^ {nums[1]} = {result}")
-                    print("Result:", result)
-                except:
-                    print("❌ Invalid input")
+    def run_operation(self, operation):
+        """Reads operands for one operation, calculates and records the result"""
+        try:
+            operands = parse_operands(operation, input(operation.prompt).split(), self.number)
+        except (ValueError, ArithmeticError):
+            print("❌ Invalid input")
+            return
 
-            elif choice == 3:
-                x = self.safe_float("Enter x (>0): ")
-                if x is None or x <= 0:
-                    print("❌ Invalid input")
-                    continue
-                result = round(math.log(x), 6)
-                self.add_history(f"log({x}) = {result}")
-                print("Result:", result)
+        try:
+            result = self.calculate(operation.name, *operands)
+        except OperationError as error:
+            print("❌", error)
+            return
+        except (ValueError, ArithmeticError, TypeError) as error:
+            if operation.fallback is None:
+                print("❌ Invalid input")
+            else:
+                print("❌", error)
+                print(operation.fallback(*operands))
+            return
 
-            elif choice == 4:
-                x = self.safe_float("Enter x (>0): ")
-                if x is None or x <= 0:
-                    print("❌ Invalid input")
-                    continue
-                result = round(math.log10(x), 6)
-                self.add_history(f"log10({x}) = {result}")
-                print("Result:", result)
+        try:
+            self.add_history(operation.name, history_operands(operation, operands), result)
+        except ValueError as error:
+            print("❌ Not saved to history:", error)
+        print("Result:", operation.display(result, *operands))
 
-            elif choice == 5:
-                x = self.safe_float("Enter x: ")
-                if x is None:
-                    continue
-                result = round(math.sin(x), 6)
-                self.add_history(f"sin({x}) = {result}")
-                print("Result:", result)
+    # EXPRESSION EVALUATION
+    def evaluate(self, expression, **variables):
+        """Evaluates an expression without prompting, e.g. evaluate("x * 2", x=3)"""
+        from expression import cached_expression
+        return round(cached_expression(expression)(**variables), 6)
 
-            elif choice == 6:
-                x = self.safe_float("Enter x: ")
-                if x is None:
-                    continue
-                result = round(math.cos(x), 6)
-                self.add_history(f"cos({x}) = {result}")
-                print("Result:", result)
+    def evaluate_expression(self):
+        """Evaluates a mathematical expression using the expression engine"""
+        expression = input("Enter expression: ")
 
-            elif choice == 7:
-                x = self.safe_float("Enter x: ")
-                if x is None:
-                    continue
-                result = round(math.tan(x), 6)
-                self.add_history(f"tan({x}) = {result}")
-                print("Result:", result)
+        try:
+            result = self.evaluate(expression)
+            self.add_history("expression", (), result, expression)
+            print("Result:", result)
+        except:
+            print("❌ Invalid expression")
 
-            elif choice == 8:
-                x = self.safe_int("Enter integer x (>=0): ")
-                if x is None or x < 0:
-                    print("❌ Invalid input")
-                    continue
-                result = math.factorial(x)
-                self.add_history(f"factorial({x}) = {result}")
-                print("Result:", result)
+    # BATCH EVALUATION
+    def evaluate_batch(self, expression, columns=None, approximate=False):
+        """
+        Evaluates an expression over columns of variable values
 
-            elif choice == 9:
-                x = self.safe_float("Enter x: ")
-                if x is None:
-                    continue
-                result = round(abs(x), 6)
-                self.add_history(f"abs({x}) = {result}")
-                print("Result:", result)
-
-            elif choice == 10:
-                x = self.safe_float("Enter x: ")
-                if x is None:
-                    continue
-                result = round(math.exp(x), 6)
-                self.add_history(f"e^{x} = {result}")
-                print("Result:", result)
-
-            elif choice == 0:
-                break
+        Example: calc.evaluate_batch("log(x) * y", {"x": xs, "y": ys})
+        Returns (values, errors) where errors marks rows with domain errors.
+        approximate=True uses fast table-based sin/cos/tan/exp/log (approx.py).
+        """
+        from vectorized import evaluate_batch
+        return evaluate_batch(expression, columns, approximate=approximate)
+
+    # SOLVERS
+    def solve(self, expression, guess=None, bracket=None, **values):
+        """Root of an expression, e.g. calc.solve("x ** 2 - 2", guess=1)"""
+        from solver import solve
+        return solve(expression, guess, bracket, **values)
+
+    def integrate(self, expression, a, b, **values):
+        """Integral from a to b, e.g. calc.integrate("exp(-x ** 2)", 0, math.inf).value"""
+        from solver import integrate
+        return integrate(expression, a, b, **values)
+
+    def differentiate(self, expression, at, **values):
+        """Derivative at a point, e.g. calc.differentiate("x ** 3", at=2)"""
+        from solver import differentiate
+        return differentiate(expression, at, **values)
+
+    def run_solver(self):
+        """Prompts for an expression in x and solves, integrates or differentiates it"""
+        from expression import ExpressionError
+        from solver import SolverError
 
-            input("\nPress Enter to continue...")
+        self.clear_screen()
+        print("--- Solve / Integrate / Differentiate ---")
+        print("1. Solve f(x) = 0")
+        print("2. Integrate f(x) from a to b (inf allowed)")
+        print("3. Differentiate f(x) at a point")
+        choice = self.safe_int("Enter choice: ")
+        if choice not in (1, 2, 3):
+            return
 
-    # EXPRESSION EVALUATION
-    def evaluate_expression(self):
-        """Evaluates a mathematical expression safely"""
-        expression = input("Enter expression: ")
+        expression = input("Enter f(x): ").strip()
+        try:
+            if choice == 1:
+                numbers = [float(token) for token in input("Enter a guess, or a and b around the root: ").split()]
+                if len(numbers) >= 2:
+                    result = self.solve(expression, bracket=numbers[:2])
+                else:
+                    result = self.solve(expression, guess=numbers[0] if numbers else None)
+                print("Root: x =", round(result, 12))
+            elif choice == 2:
+                a, b = (float(token) for token in input("Enter a and b: ").split()[:2])
+                integral = self.integrate(expression, a, b)
+                print(f"Integral: {round(integral.value, 10)} (estimated error {integral.error:.1e})")
+            else:
+                at = float(input("Enter x: "))
+                print("Derivative:", round(self.differentiate(expression, at), 10))
+        except (SolverError, ExpressionError) as error:
+            print("❌", error)
+        except (ValueError, ArithmeticError, TypeError):
+            print("❌ Invalid input")
+
+    # SWEEPS
+    def sweep(self, expression, start, stop, step=None, num=None, output="-", approximate=False):
+        """
+        Tabulates an expression in x (or a function name such as "sin")
+        from start to stop, by step or with num points, into stdout, a
+        .csv or a .npy file. Returns (points, undefined points).
+        """
+        from sweep import arange, linspace, run_sweep
+        grid = arange(start, stop, step) if step is not None else linspace(start, stop, num)
+        return run_sweep(expression, grid, output, approximate=approximate)
 
-        forbidden = ["import", "__", "os", "sys", "open", "eval", "exec"]
-        if any(word in expression for word in forbidden):
-            print("❌ Invalid expression")
-            return
+    def run_sweep(self):
+        """Prompts for a sweep and writes the table"""
+        from expression import ExpressionError
 
+        self.clear_screen()
+        print("--- Sweep ---")
+        expression = input("Enter f(x) or a function name (e.g. sin): ").strip()
         try:
-            allowed = {
-                "sin": math.sin,
-                "cos": math.cos,
-                "tan": math.tan,
-                "log": math.log,
-                "log10": math.log10,
-                "sqrt": math.sqrt,
-                "abs": abs,
-                "pi": math.pi,
-                "e": math.e
-            }
-            result = round(eval(expression, {"__builtins__": None}, allowed), 6)
-            self.add_history(f"{expression} = {result}")
-            print("Result:", result)
-        except:
-            print("❌ Invalid expression")
+            start, stop, step = (float(token) for token in input("Enter start, stop and step: ").split()[:3])
+        except ValueError:
+            print("❌ Invalid input")
+            return
+        output = input("Write to (Enter = screen, or FILE.csv / FILE.npy): ").strip() or "-"
+        try:
+            points, failures = self.sweep(expression, start, stop, step, output=output)
+        except (ExpressionError, ValueError, ArithmeticError, OSError) as error:
+            print("❌", error)
+            return
+        if output != "-":
+            print(f"{points} rows written to {output}")
+        if failures:
+            print(f"❌ {failures} point(s) undefined (nan)")
 
     # HISTORY VIEW
     def show_history(self):
-        """Displays calculation history"""
+        """Displays calculation history, optionally for one operation only"""
         self.clear_screen()
         if not self.history:
             print("📭 No history yet")
         else:
+            operation = input("Filter by operation, e.g. sqrt, log, factorial (Enter for all): ").strip() or None
+            if operation is not None and operation not in OPERATION_IDS:
+                print("❌ Unknown operation")
+                input("\nPress Enter to continue...")
+                return
             print("--- Calculation History ---")
-            for i, item in enumerate(self.history, 1):
-                print(f"{i}. {item}")
+            for page in self.history.pages(HISTORY_PAGE_SIZE, operation):
+                for i, item in page:
+                    print(f"{i}. {item}")
+                if len(page) == HISTORY_PAGE_SIZE:
+                    if input("-- Enter for more, q to stop -- ").strip().lower() == "q":
+                        break
         input("\nPress Enter to continue...")
 
+    # PRECISION SETTINGS
+    def configure_precision(self):
+        """Asks for the number of digits and switches precision mode on or off"""
+        current = f"{self.precision.digits} digits ({self.precision.mode})" if self.precision else "off"
+        print(f"Precision mode is currently: {current}")
+        digits = self.safe_int("Enter significant digits (0 = standard float mode): ")
+        if digits is None or digits < 0:
+            print("❌ Invalid input")
+            return
+        if digits == 0:
+            self.set_precision(None)
+            print("Precision mode off")
+            return
+        mode = input("Mode, decimal or fraction [decimal]: ").strip().lower() or "decimal"
+        if mode not in ("decimal", "fraction"):
+            print("❌ Invalid mode")
+            return
+        self.set_precision(digits, mode)
+        print(f"Precision mode on: {digits} digits ({mode})")
+
+    # NAMED CELLS
+    @property
+    def cells(self):
+        """Named cells that can use each other's results (a cells.Sheet)"""
+        if self._cells is None:
+            from cells import Sheet
+            self._cells = Sheet()
+        return self._cells
+
+    def run_cells(self):
+        """Defines named cells (name = expression) and shows their values"""
+        from cells import CellError
+        from expression import ExpressionError
+
+        while True:
+            self.clear_screen()
+            print("--- Named Cells ---")
+            if not self.cells:
+                print("📭 No cells yet")
+            for name, value in self.cells.values().items():
+                shown = f"❌ {value}" if isinstance(value, CellError) else value
+                print(f"{name} = {self.cells.source(name)}  ->  {shown}")
+            print("\nEnter name = expression (e.g. total = price * qty), del name, or Enter to go back")
+
+            line = input("> ").strip()
+            if not line:
+                break
+            if line.startswith("del "):
+                name = line[4:].strip()
+                if name in self.cells:
+                    self.cells.remove(name)
+                continue
+            name, sep, source = line.partition("=")
+            if not sep:
+                print("❌ Use name = expression")
+                input("\nPress Enter to continue...")
+                continue
+            try:
+                self.cells.set(name.strip(), _cell_source(source.strip()))
+            except (CellError, ExpressionError) as error:
+                print("❌", error)
+                input("\nPress Enter to continue...")
+
     # APPLICATION CONTROLLER
     def run(self):
         """Main application loop"""
@@ -362,16 +464,57 @@ Note: Trigonometric functions use radians
                 input("\nPress Enter to continue...")
             elif choice == 4:
                 self.show_history()
+            elif choice == 6:
+                self.configure_precision()
+                input("\nPress Enter to continue...")
+            elif choice == 7:
+                self.run_cells()
+            elif choice == 8:
+                self.run_solver()
+                input("\nPress Enter to continue...")
+            elif choice == 9:
+                self.run_sweep()
+                input("\nPress Enter to continue...")
             elif choice == 5:
+                self.history.close()
+                if self.instrumentation is not None and self.instrumentation.close():
+                    print(f"Profile written to {self.instrumentation.profile_path}")
                 print("... See you soon again ...")
                 break
 
 
+def _cell_source(text):
+    """A plain number stays a number cell, anything else is an expression"""
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
 # PROGRAM ENTRY POINT
 if __name__ == "__main__":
     """
     This block ensures the program runs only
     when executed directly, not when imported.
     """
-    app = ScientificCalculator()
+    if "--batch" in sys.argv[1:]:
+        import batch
+        sys.exit(batch.main(sys.argv[1:]))
+    if sys.argv[1:2] == ["--sweep"]:
+        import sweep
+        sys.exit(sweep.main(sys.argv[2:]))
+    profile_dir = None
+    if sys.argv[1:3] and sys.argv[1] == "--profile":
+        profile_dir = sys.argv[2] if len(sys.argv) > 2 else "."
+    elif sys.argv[1:]:
+        import calc
+        sys.exit(calc.main(sys.argv[1:]))
+
+    app = ScientificCalculator(history_path=DEFAULT_HISTORY_PATH)
+    if profile_dir is not None:
+        app.enable_instrumentation(profile_dir)
     app.run()
@@ -0,0 +1,199 @@
+"""
+Named Cells for the Scientific Calculator
+
+A Sheet holds named cells, spreadsheet style. A cell is a number or an
+expression that may use other cells by name:
+
+    sheet = Sheet()
+    sheet["rate"] = 0.05
+    sheet["years"] = 10
+    sheet["growth"] = "(1 + rate) ** years"
+    sheet["growth"]             ->  1.628894626777442
+    sheet["rate"] = 0.07        # only cells that use rate are marked stale
+
+Cells are recomputed lazily: changing a cell only marks the cells that
+depend on it (directly or indirectly) as stale, and a stale cell is
+recomputed, after the stale cells it reads, the next time it is read.
+Updating one input of a model with thousands of cells therefore costs
+only as much as the part of the model downstream of it.
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import re
+
+from expression import CONSTANTS, cached_expression
+
+NAME_PATTERN = re.compile(r"[A-Za-z_][A-Za-z_0-9]*\Z")
+
+
+class CellError(ValueError):
+    """Raised for an invalid cell definition or when reading a cell that failed"""
+
+
+class Cell:
+    """One named cell: its definition, inputs and cached value"""
+
+    __slots__ = ("name", "source", "compiled", "inputs", "value", "error", "stale")
+
+    def __init__(self, name, source, compiled, inputs):
+        self.name = name
+        self.source = source
+        self.compiled = compiled    # None for a plain number
+        self.inputs = inputs        # names of the cells it reads, in variable order
+        self.value = source if compiled is None else None
+        self.error = None
+        self.stale = compiled is not None
+
+    def __repr__(self):
+        return f"Cell({self.name!r}, {self.source!r})"
+
+
+class Sheet:
+    """
+    Named cells with a dependency graph.
+
+    Every cell keeps the names it reads (inputs) and the sheet keeps the
+    reverse edges (dependents), so a change reaches exactly the cells
+    downstream of it. Definitions that would create a cycle are refused.
+    """
+
+    def __init__(self):
+        self._cells = {}
+        self._dependents = {}   # name -> set of cell names that read it
+        self.recomputed = 0     # cells evaluated so far (for tuning and tests)
+
+    # DEFINING CELLS
+    def set(self, name, source):
+        """Defines or redefines a cell as a number or an expression string"""
+        if not NAME_PATTERN.match(name) or name in CONSTANTS:
+            raise CellError(f"Invalid cell name {name!r}")
+
+        if isinstance(source, str):
+            compiled = cached_expression(source)
+            inputs = compiled.variables
+            if name in inputs or self._reaches(inputs, name):
+                raise CellError(f"Cell {name!r} would depend on itself")
+        elif isinstance(source, (int, float)) and not isinstance(source, bool):
+            compiled, inputs = None, ()
+        else:
+            raise CellError(f"Cell {name!r} must be a number or an expression")
+
+        old = self._cells.get(name)
+        if old is not None:
+            for input_name in old.inputs:
+                self._dependents[input_name].discard(name)
+        for input_name in inputs:
+            self._dependents.setdefault(input_name, set()).add(name)
+
+        self._cells[name] = Cell(name, source, compiled, inputs)
+        self._mark_stale(name)
+
+    __setitem__ = set
+
+    def remove(self, name):
+        """Deletes a cell; cells that read it fail until it is defined again"""
+        cell = self._cells.pop(name)
+        for input_name in cell.inputs:
+            self._dependents[input_name].discard(name)
+        self._mark_stale(name)
+
+    __delitem__ = remove
+
+    def _reaches(self, start, target):
+        """True if `target` is among `start` or the cells they (indirectly) read"""
+        seen = set()
+        pending = list(start)
+        while pending:
+            name = pending.pop()
+            if name == target:
+                return True
+            if name in seen:
+                continue
+            seen.add(name)
+            cell = self._cells.get(name)
+            if cell is not None:
+                pending.extend(cell.inputs)
+        return False
+
+    def _mark_stale(self, name):
+        """Marks every cell downstream of `name` as stale"""
+        # A stale cell's dependents are always stale already, so the walk
+        # stops at the first stale cell on each path
+        pending = list(self._dependents.get(name, ()))
+        while pending:
+            cell = self._cells.get(pending.pop())
+            if cell is not None and not cell.stale:
+                cell.stale = True
+                pending.extend(self._dependents.get(cell.name, ()))
+
+    # READING CELLS
+    def get(self, name):
+        """Value of a cell, recomputing it (and stale inputs) if needed"""
+        cell = self._cells.get(name)
+        if cell is None:
+            raise CellError(f"Undefined cell {name!r}")
+        if cell.stale:
+            self._refresh(cell)
+        if cell.error is not None:
+            raise CellError(cell.error)
+        return cell.value
+
+    __getitem__ = get
+
+    def _refresh(self, cell):
+        """Recomputes a stale cell after its stale inputs (iterative post-order)"""
+        pending = [(cell, False)]
+        while pending:
+            cell, inputs_ready = pending.pop()
+            if not cell.stale:
+                continue
+            if inputs_ready:
+                self._compute(cell)
+                continue
+            pending.append((cell, True))
+            for input_name in cell.inputs:
+                source = self._cells.get(input_name)
+                if source is not None and source.stale:
+                    pending.append((source, False))
+
+    def _compute(self, cell):
+        values = []
+        cell.value, cell.error, cell.stale = None, None, False
+        for input_name in cell.inputs:
+            source = self._cells.get(input_name)
+            if source is None:
+                cell.error = f"Cell {cell.name!r} uses undefined cell {input_name!r}"
+                return
+            if source.error is not None:
+                cell.error = f"Cell {cell.name!r} uses failed cell {input_name!r}"
+                return
+            values.append(source.value)
+        self.recomputed += 1
+        try:
+            cell.value = cell.compiled.evaluate(values)
+        except Exception as error:
+            cell.error = f"Cell {cell.name!r}: {str(error) or type(error).__name__}"
+
+    def values(self):
+        """{name: value or CellError} for every cell"""
+        result = {}
+        for name in self._cells:
+            try:
+                result[name] = self.get(name)
+            except CellError as error:
+                result[name] = error
+        return result
+
+    def source(self, name):
+        return self._cells[name].source
+
+    def __contains__(self, name):
+        return name in self._cells
+
+    def __iter__(self):
+        return iter(self._cells)
+
+    def __len__(self):
+        return len(self._cells)
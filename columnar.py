@@ -0,0 +1,288 @@
+"""
+Binary Column Files for the Scientific Calculator
+
+Reads operands and writes results as float64 columns instead of text,
+so large batch runs skip number parsing and formatting altogether:
+
+    python calculator.py --batch operands.npy --op power -o results.npy
+    python calculator.py --batch xy.f64 --expr "log(x) * y" --vars x,y -o out.f64
+    python calculator.py --batch data.npy --reduce stats
+
+Two binary formats are understood:
+
+- f64: raw little-endian float64 values without a header, row after
+  row (width values per row).
+- npy: NumPy's .npy format holding a '<f8' array of shape (rows,) or
+  (rows, width) in C order. The header is parsed and written here, so
+  NumPy is not needed for either direction.
+
+Input files are memory-mapped and handed out chunk by chunk as
+memoryview slices of the mapping: no value is copied or converted on
+the way in, the operating system pages the file in as it is read.
+Streams that cannot be mapped (a pipe on stdin) are read with
+readinto() into one buffer per chunk. Results are written straight
+from their float64 buffers. A run is then bounded by the disk and the
+evaluation itself instead of str() and float() on every number.
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import mmap
+import os
+import sys
+from array import array
+
+FORMATS = ("text", "f64", "npy")
+EXTENSIONS = {".npy": "npy", ".f64": "f64"}
+DEFAULT_CHUNK_ROWS = 1 << 16
+OUTPUT_BUFFER_SIZE = 1 << 20
+NPY_MAGIC = b"\x93NUMPY"
+NPY_RESERVED = 128          # header bytes reserved while the row count is unknown
+LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def detect_format(path, fmt=None):
+    """fmt when given, otherwise the format implied by the file extension (default: text)"""
+    if fmt:
+        return fmt
+    if path in (None, "-"):
+        return "text"
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower(), "text")
+
+
+def _floats(data):
+    """float64 values of little-endian bytes: a zero-copy view where possible"""
+    if LITTLE_ENDIAN:
+        return data.cast("d")
+    values = array("d", data)
+    values.byteswap()
+    return values
+
+
+def split_columns(values, width, np=None):
+    """Column views of a flat chunk of rows (ndarray views with NumPy)"""
+    if width == 1:
+        return [values]
+    if np is not None:
+        table = np.frombuffer(values, dtype=np.float64).reshape(-1, width)
+        return [table[:, column] for column in range(width)]
+    return [values[column::width] for column in range(width)]
+
+
+# NPY HEADERS
+def npy_header(shape, minimum=0):
+    """
+    Header of a version 1.0 .npy file holding a little-endian float64
+    array of `shape`, padded to a multiple of 64 bytes and to at least
+    `minimum` bytes.
+    """
+    dimensions = ", ".join(map(str, shape)) + ("," if len(shape) == 1 else "")
+    header = f"{{'descr': '<f8', 'fortran_order': False, 'shape': ({dimensions}), }}"
+    # Magic (6) + version (2) + length (2) + header + newline
+    size = max(10 + len(header) + 1, minimum)
+    size = -(-size // 64) * 64
+    header = (header + " " * (size - 10 - len(header) - 1) + "\n").encode("latin-1")
+    return NPY_MAGIC + b"\x01\x00" + len(header).to_bytes(2, "little") + header
+
+
+def read_npy_header(stream):
+    """Reads the header of a .npy file from a binary stream; returns the array shape"""
+    import ast
+    prefix = stream.read(10)
+    if prefix[:6] != NPY_MAGIC or len(prefix) < 10:
+        raise ValueError("Not a .npy file")
+    major = prefix[6]
+    if major == 1:
+        length = int.from_bytes(prefix[8:10], "little")
+    elif major in (2, 3):
+        length = int.from_bytes(prefix[8:10] + stream.read(2), "little")
+    else:
+        raise ValueError(f"Unsupported .npy version {major}")
+    try:
+        header = ast.literal_eval(stream.read(length).decode("latin-1"))
+        descr, fortran_order, shape = header["descr"], header["fortran_order"], tuple(header["shape"])
+    except (SyntaxError, ValueError, TypeError, KeyError):
+        raise ValueError("Malformed .npy header") from None
+    if descr != "<f8":
+        raise ValueError(f"Expected a little-endian float64 ('<f8') array, got {descr!r}")
+    if len(shape) not in (1, 2):
+        raise ValueError(f"Expected a 1-D or 2-D array, got shape {shape}")
+    if fortran_order and len(shape) == 2 and shape[1] > 1:
+        raise ValueError("Fortran-ordered arrays are not supported, save in C order")
+    return shape
+
+
+# READING
+def _read_into(stream, buffer):
+    """Fills buffer from stream (several reads for pipes); returns the bytes read"""
+    view = memoryview(buffer)
+    filled = 0
+    while filled < len(view):
+        count = stream.readinto(view[filled:])
+        if not count:
+            break
+        filled += count
+    return filled
+
+
+class ColumnReader:
+    """
+    Rows of float64 operands from a .npy or raw f64 file or stream.
+
+    source is a path, "-" for stdin or an open binary stream. width is
+    the number of values per row; .npy files carry their own, raw input
+    defaults to 1. rows is None for a stream of unknown length.
+    """
+
+    def __init__(self, source, fmt="f64", width=None):
+        if fmt not in ("f64", "npy"):
+            raise ValueError(f"Not a binary format: {fmt!r}")
+        if source == "-":
+            stream, self._owned = sys.stdin.buffer, False
+        elif hasattr(source, "read"):
+            stream, self._owned = source, False
+        else:
+            stream, self._owned = open(source, "rb"), True
+        self._stream = stream
+        self._mapping = self._data = None
+        try:
+            self._open(fmt, width)
+        except BaseException:
+            self.close()
+            raise
+
+    def _open(self, fmt, width):
+        stream = self._stream
+        shape = read_npy_header(stream) if fmt == "npy" else None
+        if shape is not None:
+            columns = shape[1] if len(shape) == 2 else 1
+            if width is not None and width != columns:
+                raise ValueError(f"Expected {width} value(s) per row, the file has {columns}")
+            width = columns
+        if width is not None and width < 1:
+            raise ValueError("width must be >= 1")
+        self.width = width or 1
+        self.rows = shape[0] if shape is not None else None
+
+        try:
+            offset = stream.tell()
+            self._mapping = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError):
+            # A pipe, or an empty file: read the stream instead
+            return
+        data = memoryview(self._mapping)[offset:]
+        row_bytes = 8 * self.width
+        if self.rows is not None:
+            if len(data) < self.rows * row_bytes:
+                raise ValueError(f"Truncated .npy file: {len(data)} bytes for {self.rows} rows")
+            data = data[:self.rows * row_bytes]
+        elif len(data) % row_bytes:
+            raise ValueError(f"{len(data)} bytes is not a whole number of {self.width}-value rows")
+        self.rows = len(data) // row_bytes
+        self._data = data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def chunks(self, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """Yields the values of up to chunk_rows whole rows at a time, row after row"""
+        step = 8 * self.width * chunk_rows
+        if self._data is not None:
+            for start in range(0, len(self._data), step):
+                yield _floats(self._data[start:start + step])
+            return
+
+        remaining = None if self.rows is None else 8 * self.width * self.rows
+        while remaining != 0:
+            size = step if remaining is None else min(step, remaining)
+            buffer = bytearray(size)
+            filled = _read_into(self._stream, buffer)
+            if filled % (8 * self.width) or (remaining is not None and filled < size):
+                raise ValueError("Input ends in the middle of a row")
+            if filled:
+                yield _floats(memoryview(buffer)[:filled])
+            if filled < size:
+                return
+            if remaining is not None:
+                remaining -= filled
+
+    def close(self):
+        if self._data is not None:
+            self._data.release()
+            self._data = None
+        if self._mapping is not None:
+            try:
+                self._mapping.close()
+            except BufferError:
+                pass    # a chunk view is still in use; the mapping closes with it
+            self._mapping = None
+        if self._owned:
+            self._stream.close()
+
+
+# WRITING
+class ColumnWriter:
+    """
+    Writes float64 values to a .npy or raw f64 file or stream.
+
+    output is a path, "-" for stdout or an open binary stream. rows is
+    the row count written into a .npy header; when it is None, a file
+    gets a placeholder header that close() fills in.
+    """
+
+    def __init__(self, output, fmt="f64", rows=None, width=1):
+        if fmt not in ("f64", "npy"):
+            raise ValueError(f"Not a binary format: {fmt!r}")
+        if output == "-":
+            stream, self._owned = sys.stdout.buffer, False
+        elif hasattr(output, "write"):
+            stream, self._owned = output, False
+        else:
+            stream, self._owned = open(output, "wb", buffering=OUTPUT_BUFFER_SIZE), True
+        self._stream = stream
+        self.format = fmt
+        self.rows = rows
+        self.width = width
+        self.count = 0      # values written
+
+        if fmt == "npy":
+            if rows is None and not stream.seekable():
+                raise ValueError(".npy output to a pipe needs a known number of rows")
+            header = npy_header(self._shape(rows or 0), 0 if rows is not None else NPY_RESERVED)
+            self._header_size = len(header)
+            stream.write(header)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _shape(self, rows):
+        return (rows,) if self.width == 1 else (rows, self.width)
+
+    def write(self, values):
+        """Appends a contiguous float64 buffer (ndarray, array('d') or memoryview)"""
+        if not LITTLE_ENDIAN:
+            values = array("d", values)
+            values.byteswap()
+        self._stream.write(values)
+        self.count += len(values)
+
+    def close(self):
+        rows = self.count // self.width
+        try:
+            if self.format == "npy" and rows != self.rows:
+                if self.rows is not None:
+                    raise ValueError(f"Wrote {rows} rows into a .npy header for {self.rows}")
+                self._stream.seek(0)
+                self._stream.write(npy_header(self._shape(rows), self._header_size))
+                self._stream.seek(0, os.SEEK_END)
+            self._stream.flush()
+        finally:
+            if self._owned:
+                self._stream.close()
@@ -0,0 +1,676 @@
+"""
+Expression Engine for the Scientific Calculator
+
+Turns a math expression string into a reusable callable in four steps:
+- Tokenizer: splits the text into numbers, names, operators and brackets
+- Parser:    builds a small syntax tree (AST) from the tokens
+- Optimizer: folds constant subexpressions and applies exact identities
+- Compiler:  turns the tree into nested Python closures, computing
+             repeated subexpressions once per evaluation
+
+An expression is parsed once and can then be evaluated many times with
+different variable values. eval() is never used, so only the whitelisted
+functions and constants below can ever be reached.
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import math
+import operator
+import re
+import threading
+from collections import OrderedDict
+
+from factorial import factorial_bits
+from operations import REGISTRY
+
+
+class ExpressionError(ValueError):
+    """Raised when an expression cannot be tokenized, parsed or evaluated"""
+
+
+# WHITELISTED FUNCTIONS AND CONSTANTS
+# Every registry operation marked expression=True can be called by name
+FUNCTIONS = {operation.name: operation.func for operation in REGISTRY if operation.expression}
+
+# Number of arguments each function takes, checked when a call is parsed.
+# log also accepts a base as in math.log, e.g. log(8, 2)
+OPTIONAL_ARGUMENTS = {"log": 1}
+ARITY = {operation.name: (operation.arity, operation.arity + OPTIONAL_ARGUMENTS.get(operation.name, 0))
+         for operation in REGISTRY if operation.expression}
+
+CONSTANTS = {
+    "pi": math.pi,
+    "e": math.e,
+}
+
+BINARY_OPERATORS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "//": operator.floordiv,
+    "%": operator.mod,
+    "**": operator.pow,
+}
+
+UNARY_OPERATORS = {
+    "+": operator.pos,
+    "-": operator.neg,
+}
+
+
+# TOKENIZER
+TOKEN_PATTERN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<name>[A-Za-z_][A-Za-z_0-9]*)
+  | (?P<op>\*\*|//|[-+*/%^(),])
+  | (?P<error>.)
+""", re.VERBOSE | re.DOTALL)
+
+
+class Token:
+    """A single token: kind is 'number', 'name', 'op' or 'end'"""
+
+    __slots__ = ("kind", "text", "pos")
+
+    def __init__(self, kind, text, pos):
+        self.kind = kind
+        self.text = text
+        self.pos = pos
+
+    def __repr__(self):
+        return f"Token({self.kind!r}, {self.text!r}, {self.pos})"
+
+
+def tokenize(source):
+    """Splits an expression string into a list of tokens"""
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(source):
+        kind = match.lastgroup
+        if kind == "space":
+            continue
+        text = match.group()
+        if kind == "error":
+            raise ExpressionError(f"Unexpected character {text!r} at position {match.start()}")
+        if text == "^":
+            text = "**"     # Calculator users write powers as x^y
+        tokens.append(Token(kind, text, match.start()))
+    tokens.append(Token("end", "", len(source)))
+    return tokens
+
+
+# SYNTAX TREE NODES
+class Number:
+    """Numeric literal"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __repr__(self):
+        return f"Number({self.value!r})"
+
+
+class Name:
+    """Variable or constant reference"""
+
+    __slots__ = ("id",)
+
+    def __init__(self, id):
+        self.id = id
+
+    def __repr__(self):
+        return f"Name({self.id!r})"
+
+
+class UnaryOp:
+    """Unary + or -"""
+
+    __slots__ = ("op", "operand")
+
+    def __init__(self, op, operand):
+        self.op = op
+        self.operand = operand
+
+    def __repr__(self):
+        return f"UnaryOp({self.op!r}, {self.operand!r})"
+
+
+class BinOp:
+    """Binary arithmetic operation"""
+
+    __slots__ = ("op", "left", "right")
+
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def __repr__(self):
+        return f"BinOp({self.op!r}, {self.left!r}, {self.right!r})"
+
+
+class Call:
+    """Call of a whitelisted function"""
+
+    __slots__ = ("func", "args")
+
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+
+    def __repr__(self):
+        return f"Call({self.func!r}, {self.args!r})"
+
+
+# PARSER
+class Parser:
+    """
+    Recursive-descent parser following Python's precedence rules:
+
+        expr    := term (('+' | '-') term)*
+        term    := unary (('*' | '/' | '//' | '%') unary)*
+        unary   := ('+' | '-') unary | power
+        power   := atom ('**' unary)?
+        atom    := NUMBER | NAME | NAME '(' args ')' | '(' expr ')'
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.index = 0
+
+    def peek(self):
+        return self.tokens[self.index]
+
+    def advance(self):
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def expect(self, text):
+        token = self.advance()
+        if token.text != text:
+            raise ExpressionError(f"Expected {text!r} at position {token.pos}")
+        return token
+
+    def parse(self):
+        node = self.expr()
+        token = self.peek()
+        if token.kind != "end":
+            raise ExpressionError(f"Unexpected {token.text!r} at position {token.pos}")
+        return node
+
+    def expr(self):
+        node = self.term()
+        while self.peek().text in ("+", "-"):
+            op = self.advance().text
+            node = BinOp(op, node, self.term())
+        return node
+
+    def term(self):
+        node = self.unary()
+        while self.peek().text in ("*", "/", "//", "%"):
+            op = self.advance().text
+            node = BinOp(op, node, self.unary())
+        return node
+
+    def unary(self):
+        if self.peek().text in ("+", "-"):
+            op = self.advance().text
+            return UnaryOp(op, self.unary())
+        return self.power()
+
+    def power(self):
+        node = self.atom()
+        if self.peek().text == "**":
+            self.advance()
+            node = BinOp("**", node, self.unary())
+        return node
+
+    def atom(self):
+        token = self.advance()
+        if token.kind == "number":
+            text = token.text
+            if any(ch in text for ch in ".eE"):
+                return Number(float(text))
+            return Number(int(text))
+        if token.kind == "name":
+            if self.peek().text == "(":
+                if token.text not in FUNCTIONS:
+                    raise ExpressionError(f"Unknown function {token.text!r}")
+                self.advance()
+                args = []
+                if self.peek().text != ")":
+                    args.append(self.expr())
+                    while self.peek().text == ",":
+                        self.advance()
+                        args.append(self.expr())
+                self.expect(")")
+                check_arity(token.text, len(args))
+                return Call(token.text, args)
+            return Name(token.text)
+        if token.text == "(":
+            node = self.expr()
+            self.expect(")")
+            return node
+        if token.kind == "end":
+            raise ExpressionError("Unexpected end of expression")
+        raise ExpressionError(f"Unexpected {token.text!r} at position {token.pos}")
+
+
+def check_arity(name, count):
+    """Raises ExpressionError unless function name takes count arguments"""
+    low, high = ARITY[name]
+    if not low <= count <= high:
+        expected = str(low) if low == high else f"{low} to {high}"
+        raise ExpressionError(f"{name}() takes {expected} argument(s), got {count}")
+
+
+def parse(source):
+    """Parses an expression string into a syntax tree"""
+    return Parser(tokenize(source)).parse()
+
+
+# OPTIMIZER
+# Folded integers stay small enough to convert to float (see vectorized.py)
+FOLD_MAX_BITS = 1024
+
+
+def optimize(node):
+    """
+    Returns an equivalent tree that does less work per evaluation.
+
+    - Constant subexpressions are computed once: sqrt(2) * pi / 4 becomes
+      a single number. Subexpressions that raise (log(0), 1 / 0) or
+      would build a huge integer (9 ** 9 ** 9) are left alone, so they
+      still fail, or are guarded, at evaluation time.
+    - Identities that are exact for every int and float are applied:
+      x * 1, 1 * x, x - 0, x ** 1, +x and -(-x) become x.
+
+    Nothing is reassociated (x + 2 + 3 stays as written) because float
+    addition is not associative.
+    """
+    if isinstance(node, (Number, Name)):
+        return node
+
+    if isinstance(node, UnaryOp):
+        operand = optimize(node.operand)
+        if node.op == "+":
+            return operand
+        if isinstance(operand, UnaryOp) and operand.op == "-":
+            return operand.operand
+        value = _constant_value(operand)
+        if value is not None:
+            return Number(-value)
+        return UnaryOp(node.op, operand)
+
+    if isinstance(node, BinOp):
+        left, right = optimize(node.left), optimize(node.right)
+        left_value, right_value = _constant_value(left), _constant_value(right)
+        if left_value is not None and right_value is not None:
+            folded = _fold(BINARY_OPERATORS[node.op], node.op, left_value, right_value)
+            if folded is not None:
+                return folded
+        # Only int 1 and 0: x * 1.0 would turn an int x into a float
+        if node.op == "*" and _is_int(right_value, 1) or node.op == "-" and _is_int(right_value, 0):
+            return left
+        if node.op == "**" and _is_int(right_value, 1):
+            return left
+        if node.op == "*" and _is_int(left_value, 1):
+            return right
+        return BinOp(node.op, left, right)
+
+    if isinstance(node, Call):
+        args = [optimize(arg) for arg in node.args]
+        values = [_constant_value(arg) for arg in args]
+        if all(value is not None for value in values):
+            if node.func == "factorial" and _too_large_factorial(values):
+                return Call(node.func, args)
+            folded = _fold(FUNCTIONS[node.func], node.func, *values)
+            if folded is not None:
+                return folded
+        return Call(node.func, args)
+
+    raise ExpressionError(f"Cannot optimize node {node!r}")
+
+
+def _is_int(value, target):
+    return type(value) is int and value == target
+
+
+def _too_large_factorial(values):
+    n = values[0] if len(values) == 1 else None
+    return not isinstance(n, (int, float)) or n > 1 << 20 or factorial_bits(int(n)) > FOLD_MAX_BITS
+
+
+def _fold(func, name, *values):
+    """func(*values) as a Number, or None if it fails or would be too large"""
+    if name == "**":
+        base, exponent = values
+        if type(base) is int and type(exponent) is int and exponent > 0:
+            if base.bit_length() * exponent > FOLD_MAX_BITS:
+                return None
+    try:
+        value = func(*values)
+    except (ArithmeticError, ValueError, TypeError):
+        return None
+    if type(value) is int and value.bit_length() > FOLD_MAX_BITS:
+        return None
+    if not isinstance(value, (int, float)):
+        return None     # e.g. (-8) ** (1 / 3) is complex
+    return Number(value)
+
+
+# COMMON SUBEXPRESSIONS
+def _key(node):
+    """Structural key: equal keys mean equal subtrees"""
+    if isinstance(node, Number):
+        return ("number", type(node.value).__name__, node.value)
+    if isinstance(node, Name):
+        return ("name", node.id)
+    if isinstance(node, UnaryOp):
+        return ("unary", node.op, _key(node.operand))
+    if isinstance(node, BinOp):
+        return ("binary", node.op, _key(node.left), _key(node.right))
+    return ("call", node.func) + tuple(_key(arg) for arg in node.args)
+
+
+def repeated_subexpressions(tree):
+    """Keys of the non-leaf subtrees that occur more than once"""
+    counts = {}
+
+    def count(node):
+        if isinstance(node, (Number, Name)):
+            return
+        key = _key(node)
+        counts[key] = counts.get(key, 0) + 1
+        if counts[key] > 1:
+            return      # its children were counted at the first occurrence
+        children = (node.operand,) if isinstance(node, UnaryOp) else \
+            (node.left, node.right) if isinstance(node, BinOp) else node.args
+        for child in children:
+            count(child)
+
+    count(tree)
+    return [key for key, n in counts.items() if n > 1]
+
+
+# COMPILER
+def free_variables(node, found=None):
+    """Returns the variable names used by a tree, in order of first use"""
+    if found is None:
+        found = []
+    if isinstance(node, Name):
+        if node.id not in CONSTANTS and node.id not in found:
+            found.append(node.id)
+    elif isinstance(node, UnaryOp):
+        free_variables(node.operand, found)
+    elif isinstance(node, BinOp):
+        free_variables(node.left, found)
+        free_variables(node.right, found)
+    elif isinstance(node, Call):
+        for arg in node.args:
+            free_variables(arg, found)
+    return found
+
+
+def _compile_node(node, slots, shared=None):
+    """
+    Turns one tree node into a closure taking the variable list `env`.
+
+    shared maps the keys of repeated subexpressions to [env slot, seen]:
+    the first occurrence (in evaluation order) stores its value in the
+    slot and the later ones just read it back.
+    """
+    if shared and isinstance(node, (UnaryOp, BinOp, Call)):
+        entry = shared.get(_key(node))
+        if entry is not None:
+            slot = entry[0]
+            if entry[1]:
+                return operator.itemgetter(slot)
+            entry[1] = True
+            inner = _build(node, slots, shared)
+
+            def store(env):
+                env[slot] = value = inner(env)
+                return value
+            return store
+    return _build(node, slots, shared)
+
+
+def _build(node, slots, shared):
+    """
+    Compiles one node whose children go through _compile_node.
+
+    Leaves (numbers, constants, variables) are inlined into their parent
+    where possible so the common cases cost a single Python call.
+    """
+    if isinstance(node, Number):
+        value = node.value
+        return lambda env: value
+
+    if isinstance(node, Name):
+        if node.id in CONSTANTS:
+            value = CONSTANTS[node.id]
+            return lambda env: value
+        return operator.itemgetter(slots[node.id])
+
+    if isinstance(node, UnaryOp):
+        operand = _compile_node(node.operand, slots, shared)
+        if node.op == "-":
+            return lambda env: -operand(env)
+        return lambda env: +operand(env)
+
+    if isinstance(node, BinOp):
+        func = BINARY_OPERATORS[node.op]
+        left = _compile_node(node.left, slots, shared)
+        right = _compile_node(node.right, slots, shared)
+        left_const = _constant_value(node.left)
+        right_const = _constant_value(node.right)
+        if right_const is not None:
+            value = right_const
+            return lambda env: func(left(env), value)
+        if left_const is not None:
+            value = left_const
+            return lambda env: func(value, right(env))
+        return lambda env: func(left(env), right(env))
+
+    if isinstance(node, Call):
+        func = FUNCTIONS[node.func]
+        args = [_compile_node(arg, slots, shared) for arg in node.args]
+        if len(args) == 1:
+            arg = args[0]
+            return lambda env: func(arg(env))
+        if len(args) == 2:
+            first, second = args
+            return lambda env: func(first(env), second(env))
+        return lambda env: func(*[arg(env) for arg in args])
+
+    raise ExpressionError(f"Cannot compile node {node!r}")
+
+
+def _constant_value(node):
+    """Returns the value of a literal or named constant, else None"""
+    if isinstance(node, Number):
+        return node.value
+    if isinstance(node, Name) and node.id in CONSTANTS:
+        return CONSTANTS[node.id]
+    return None
+
+
+class CompiledExpression:
+    """
+    A parsed and compiled expression.
+
+    Call it with variable values, either by keyword or positionally in
+    the order given by `variables`:
+
+        f = compile_expression("x ** 2 + sin(y)")
+        f(x=2, y=0)   ->  4.0
+        f(2, 0)       ->  4.0
+    """
+
+    # cost is guard.py's size estimate, set there on first use
+    __slots__ = ("source", "tree", "variables", "cost", "_func", "_slots")
+
+    def __init__(self, source, tree):
+        self.source = source
+        self.tree = optimize(tree)
+        self.variables = tuple(free_variables(self.tree))
+        self._slots = {name: i for i, name in enumerate(self.variables)}
+
+        # Repeated subexpressions get env slots after the variables
+        first = len(self.variables)
+        shared = {key: [first + i, False]
+                  for i, key in enumerate(repeated_subexpressions(self.tree))}
+        func = _compile_node(self.tree, self._slots, shared)
+        if shared:
+            padding = [None] * len(shared)
+            self._func = lambda env: func([*env, *padding])
+        else:
+            self._func = func
+
+    def __call__(self, *args, **kwargs):
+        if kwargs:
+            if args:
+                raise ExpressionError("Pass variables either by position or by name, not both")
+            try:
+                args = [kwargs[name] for name in self.variables]
+            except KeyError as missing:
+                raise ExpressionError(f"Missing value for variable {missing.args[0]!r}") from None
+        elif len(args) != len(self.variables):
+            raise ExpressionError(
+                f"Expected {len(self.variables)} variable value(s) {self.variables}, got {len(args)}")
+        return self._func(args)
+
+    def evaluate(self, env):
+        """Fast path: evaluates with a sequence of values in `variables` order"""
+        return self._func(env)
+
+    def __repr__(self):
+        return f"CompiledExpression({self.source!r})"
+
+
+def compile_expression(source):
+    """Parses and compiles an expression string"""
+    return CompiledExpression(source, parse(source))
+
+
+# COMPILED EXPRESSION CACHE
+def normalize(tokens):
+    """
+    Returns the canonical text of a token list.
+
+    Whitespace and the x^y spelling of powers do not change the key, so
+    "2+3*x", "2 + 3 * x" and " 2+3 *x " share one cache entry.
+    """
+    return " ".join(token.text for token in tokens if token.kind != "end")
+
+
+class ExpressionCache:
+    """
+    Bounded LRU cache of compiled expressions keyed by normalized source.
+
+    Counters (hits, misses, evictions) are kept so the size can be tuned
+    for real traffic; see stats().
+    """
+
+    def __init__(self, maxsize=256):
+        if maxsize < 0:
+            raise ValueError("maxsize must be >= 0")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._spellings = {}    # exact source text -> normalized key
+        self._lock = threading.Lock()
+
+    def get(self, source):
+        """Returns the compiled form of `source`, compiling it on a miss"""
+        # Fast path: this exact spelling was seen before, skip tokenizing
+        key = self._spellings.get(source)
+        if key is not None:
+            with self._lock:
+                compiled = self._entries.get(key)
+                if compiled is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return compiled
+
+        tokens = tokenize(source)
+        key = normalize(tokens)
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                self._remember_spelling(source, key)
+                self.hits += 1
+                return compiled
+            self.misses += 1
+
+        compiled = CompiledExpression(key, Parser(tokens).parse())
+
+        with self._lock:
+            if self.maxsize:
+                self._entries[key] = compiled
+                self._entries.move_to_end(key)
+                self._remember_spelling(source, key)
+                self._evict()
+        return compiled
+
+    def resize(self, maxsize):
+        """Changes the capacity, evicting least recently used entries if needed"""
+        if maxsize < 0:
+            raise ValueError("maxsize must be >= 0")
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self):
+        """Drops all entries and resets the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._spellings.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Returns a snapshot of the cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remember_spelling(self, source, key):
+        # Spellings of evicted entries go stale, so the map is simply
+        # reset once it outgrows the cache instead of tracking each one
+        if len(self._spellings) >= 4 * self.maxsize:
+            self._spellings.clear()
+        self._spellings[source] = key
+
+    def _evict(self):
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+# Process-wide cache shared by every calculator in this process
+expression_cache = ExpressionCache()
+
+
+def cached_expression(source):
+    """Compiles an expression through the process-wide cache"""
+    return expression_cache.get(source)
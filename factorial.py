@@ -0,0 +1,268 @@
+"""
+Factorial Engine for the Scientific Calculator
+
+Exact factorials with memoized checkpoints, plus approximation modes
+that never build the full integer:
+
+- exact:    the full integer n!. Previously computed factorials are kept
+            as checkpoints, so a request near one of them starts from the
+            closest stored value instead of from 1.
+- lgamma:   digit count and leading digits from math.lgamma (fast,
+            float precision, good for about 10 leading digits up to n ~ 1e6)
+- stirling: digit count and leading digits from the Stirling series in
+            decimal arithmetic, accurate for any n
+
+Every mode respects a memory limit (maximum size of the result in bits)
+and an optional time limit; exceeding either raises FactorialLimitError.
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import bisect
+import math
+import time
+from collections import OrderedDict, namedtuple
+
+DEFAULT_MAX_BITS = 64 * 1024 * 1024 * 8      # 64 MiB result
+DEFAULT_CHECKPOINT_BYTES = 32 * 1024 * 1024  # memory kept for checkpoints
+DEFAULT_LEADING_DIGITS = 15
+
+# Below this many result bits math.factorial finishes in well under a
+# millisecond, so time limits and checkpoints are not worth checking
+SMALL_RESULT_BITS = 1 << 16
+SEGMENT_SIZE = 1 << 12
+
+# n: argument, digits: number of decimal digits of n!,
+# leading: first digits as a string, log10: log10(n!) as a float
+FactorialApprox = namedtuple("FactorialApprox", "n digits leading log10")
+
+
+class FactorialLimitError(ArithmeticError):
+    """Raised when a factorial would exceed the memory or time limit"""
+
+
+def factorial_bits(n):
+    """Estimated size of n! in bits"""
+    if n < 2:
+        return 1
+    return int(math.lgamma(n + 1) / math.log(2)) + 1
+
+
+def product_range(low, high):
+    """Product of the integers in [low, high) by binary splitting"""
+    if high - low <= 8:
+        result = 1
+        for i in range(low, high):
+            result *= i
+        return result
+    middle = (low + high) // 2
+    return product_range(low, middle) * product_range(middle, high)
+
+
+# STIRLING SERIES
+# B(2k) / (2k (2k - 1)) for the first terms of the Stirling series of ln(n!)
+STIRLING_COEFFICIENTS = (
+    (1, 12), (-1, 360), (1, 1260), (-1, 1680), (1, 1188), (-691, 360360),
+)
+
+
+def stirling_log10(n, leading_digits=DEFAULT_LEADING_DIGITS):
+    """log10(n!) as a Decimal, precise enough for `leading_digits` digits"""
+    # decimal is only needed here, so plain factorials don't pay for importing it
+    from decimal import Decimal, localcontext
+
+    from precision import pi
+
+    with localcontext() as ctx:
+        ctx.prec = len(str(n)) + leading_digits + 10
+        big_n = Decimal(n)
+        ln = (big_n * big_n.ln() - big_n
+              + (2 * pi(ctx.prec) * big_n).ln() / 2)
+        power = big_n
+        for numerator, denominator in STIRLING_COEFFICIENTS:
+            ln += Decimal(numerator) / (denominator * power)
+            power *= big_n * big_n
+        return ln / Decimal(10).ln()
+
+
+def _summary(n, log10_value, leading_digits):
+    """Builds a FactorialApprox from log10(n!) (Decimal or float)"""
+    characteristic = int(log10_value)
+    mantissa = 10 ** (log10_value - characteristic)
+    # Truncate rather than round: these are the actual first digits
+    leading = f"{mantissa:.{leading_digits + 5}f}".replace(".", "")[:leading_digits]
+    return FactorialApprox(n, characteristic + 1, leading, float(log10_value))
+
+
+class FactorialEngine:
+    """
+    Factorial calculator with checkpoints and configurable limits.
+
+    max_bits:         largest exact result allowed, in bits
+    time_limit:       seconds allowed for an exact computation (None = no limit)
+    checkpoint_bytes: memory budget for remembered factorials
+    """
+
+    def __init__(self, max_bits=DEFAULT_MAX_BITS, time_limit=None,
+                 checkpoint_bytes=DEFAULT_CHECKPOINT_BYTES):
+        self.max_bits = max_bits
+        self.time_limit = time_limit
+        self.checkpoint_bytes = checkpoint_bytes
+        self._checkpoints = OrderedDict()   # n -> n!, least recently used first
+        self._keys = []                     # sorted checkpoint arguments
+        self._stored_bytes = 0
+
+    def compute(self, n, mode="exact", leading_digits=DEFAULT_LEADING_DIGITS):
+        """
+        Returns n! (mode "exact") or a FactorialApprox (modes "lgamma"
+        and "stirling").
+        """
+        if isinstance(n, float) and n.is_integer():
+            n = int(n)
+        if not isinstance(n, int) or n < 0:
+            raise ValueError("factorial() is only defined for non-negative integers")
+
+        if mode == "exact":
+            return self.exact(n)
+        if mode == "lgamma":
+            return self.approximate(n, leading_digits, use_stirling=False)
+        if mode == "stirling":
+            return self.approximate(n, leading_digits, use_stirling=True)
+        raise ValueError(f"Unknown factorial mode {mode!r}")
+
+    # APPROXIMATION MODES
+    def approximate(self, n, leading_digits=DEFAULT_LEADING_DIGITS, use_stirling=True):
+        """Digit count and leading digits of n! without building it"""
+        if n < 2:
+            return FactorialApprox(n, 1, "1", 0.0)
+        if use_stirling:
+            started = time.monotonic()
+            value = stirling_log10(n, leading_digits)
+            self._check_time(started)
+            return _summary(n, value, leading_digits)
+        value = math.lgamma(n + 1) / math.log(10)
+        return _summary(n, value, min(leading_digits, 15))
+
+    # EXACT MODE
+    def exact(self, n):
+        """Exact n!, starting from the closest checkpoint when one is near"""
+        bits = factorial_bits(n)
+        if bits > self.max_bits:
+            raise FactorialLimitError(
+                f"{n}! has about {int(bits * math.log10(2)) + 1} digits, "
+                f"above the limit of {self.max_bits} bits")
+        if bits <= SMALL_RESULT_BITS:
+            return math.factorial(n)
+
+        cached = self._checkpoints.get(n)
+        if cached is not None:
+            self._checkpoints.move_to_end(n)
+            return cached
+
+        started = time.monotonic()
+        base = self._closest_checkpoint(n)
+        if base is None:
+            if self.time_limit is None:
+                result = math.factorial(n)
+            else:
+                result = self._segmented_product(1, n + 1, 1, started)
+        elif base < n:
+            result = self._segmented_product(base + 1, n + 1, self._checkpoints[base], started)
+        else:
+            result = self._checkpoints[base] // self._segmented_product(n + 1, base + 1, 1, started)
+
+        self._remember(n, result)
+        return result
+
+    def _closest_checkpoint(self, n):
+        """Nearest checkpoint worth starting from, or None"""
+        if not self._keys:
+            return None
+        i = bisect.bisect_left(self._keys, n)
+        candidates = self._keys[max(i - 1, 0):i + 1]
+        best = min(candidates, key=lambda k: abs(k - n))
+        # Starting from a checkpoint only pays off when few factors remain;
+        # otherwise math.factorial's own binary splitting is faster
+        if abs(best - n) * 4 > n:
+            return None
+        return best
+
+    def _segmented_product(self, low, high, start, started):
+        """
+        start * product(low..high-1), in segments so the time limit can be
+        checked between them; segment products are combined pairwise.
+        """
+        parts = [start] if start != 1 else []
+        for segment_low in range(low, high, SEGMENT_SIZE):
+            parts.append(product_range(segment_low, min(segment_low + SEGMENT_SIZE, high)))
+            self._check_time(started)
+        if not parts:
+            return 1
+        while len(parts) > 1:
+            combined = [parts[i] * parts[i + 1] for i in range(0, len(parts) - 1, 2)]
+            if len(parts) % 2:
+                combined.append(parts[-1])
+            parts = combined
+            self._check_time(started)
+        return parts[0]
+
+    def _check_time(self, started):
+        if self.time_limit is not None and time.monotonic() - started > self.time_limit:
+            raise FactorialLimitError(f"Factorial exceeded the time limit of {self.time_limit}s")
+
+    # CHECKPOINTS
+    def _remember(self, n, value):
+        size = (value.bit_length() + 7) // 8
+        if size > self.checkpoint_bytes:
+            return
+        self._checkpoints[n] = value
+        bisect.insort(self._keys, n)
+        self._stored_bytes += size
+        while self._stored_bytes > self.checkpoint_bytes:
+            old_n, old_value = self._checkpoints.popitem(last=False)
+            self._keys.remove(old_n)
+            self._stored_bytes -= (old_value.bit_length() + 7) // 8
+
+    def clear(self):
+        """Forgets every checkpoint"""
+        self._checkpoints.clear()
+        self._keys.clear()
+        self._stored_bytes = 0
+
+    def stats(self):
+        return {
+            "checkpoints": len(self._checkpoints),
+            "stored_bytes": self._stored_bytes,
+            "checkpoint_bytes": self.checkpoint_bytes,
+        }
+
+
+# DISPLAY
+MAX_DISPLAY_DIGITS = 4300   # Python's default int -> str limit
+
+
+def format_approx(approx):
+    """Scientific notation text for a FactorialApprox"""
+    leading = approx.leading
+    return f"{leading[0]}.{leading[1:]}e+{approx.digits - 1} ({approx.digits} digits)"
+
+
+def format_int(value):
+    """Full digits of an integer when short enough to print, else ≈ its 15 leading digits"""
+    if value.bit_length() * math.log10(2) < MAX_DISPLAY_DIGITS:
+        return str(value)
+    # str() refuses the whole number: scale its leading 128 bits in decimal
+    from decimal import MAX_EMAX, Context, Decimal
+    shift = value.bit_length() - 128
+    working = Context(prec=40, Emax=MAX_EMAX)
+    approx = working.multiply(Decimal(abs(value) >> shift), working.power(2, shift))
+    return f"≈ {'-' if value < 0 else ''}{Context(prec=15, Emax=MAX_EMAX).plus(approx):e}"
+
+
+def format_factorial(n, value, engine=None):
+    """Full digits of n! when short enough to print, else its approximation"""
+    if value.bit_length() * math.log10(2) < MAX_DISPLAY_DIGITS:
+        return str(value)
+    engine = engine or FactorialEngine()
+    return "≈ " + format_approx(engine.approximate(n))
@@ -0,0 +1,394 @@
+"""
+Guarded Execution for the Scientific Calculator
+
+Some requests are cheap to state and very expensive to answer:
+factorial(10**9), 9 ** 9 ** 9 in an expression, or an integer power in
+fraction precision mode. Before running a request the guard estimates
+the size of the largest integer it would build and then
+
+- runs it inline when it is cheap (almost every request),
+- refuses it at once when the result would exceed `max_bits`,
+- otherwise sends it to a pool of worker processes, where it runs with
+  a deadline, can be cancelled, and is limited to `memory_limit` bytes.
+
+A worker that misses its deadline, is cancelled or runs out of memory
+is killed and replaced, so one pathological input never stalls anything
+but its own request:
+
+    guard = Guard(workers=2, timeout=5)
+    guard.calculate("factorial", 100000)       # worker process, 5s deadline
+    guard.evaluate("9 ** 9 ** 9")              # GuardError: result too large
+
+Float arithmetic is never expensive: float ** float and math.pow raise
+OverflowError immediately instead of building a huge number.
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import math
+import queue
+import threading
+import time
+
+from expression import CONSTANTS, BinOp, Call, Name, Number, UnaryOp, cached_expression
+from factorial import factorial_bits
+from operations import calculate
+
+try:
+    import resource     # Unix only: per-worker memory caps
+except ImportError:
+    resource = None
+
+DEFAULT_WORKERS = 2
+DEFAULT_TIMEOUT = 10.0                      # seconds per expensive request
+DEFAULT_MAX_BITS = 64 * 1024 * 1024 * 8     # refuse results above 64 MiB
+DEFAULT_MEMORY_LIMIT = 512 * 1024 * 1024    # address space added per worker
+
+# Integers up to this size are built in well under a millisecond
+INLINE_BITS = 1 << 18
+# Precision mode above this many digits is slow enough for a worker
+INLINE_DIGITS = 1000
+POLL_INTERVAL = 0.05
+
+
+class GuardError(ArithmeticError):
+    """Raised when a request is refused, times out, is cancelled or runs out of memory"""
+
+
+# COST ESTIMATION
+def _log2(value):
+    value = abs(value)
+    return math.log2(value) if value > 1 else 0.0
+
+
+def operation_cost(name, operands, precision=None):
+    """
+    Estimated size in bits of the largest integer a registry operation
+    builds, or None when it cannot be estimated cheaply.
+    """
+    if name == "factorial":
+        n = int(operands[0])
+        return factorial_bits(n) if n < 1 << 64 else math.inf
+    if precision is not None:
+        if precision.digits > INLINE_DIGITS:
+            return None
+        if precision.mode == "fraction" and name in ("power", "pow"):
+            base, exponent = (precision.number(x) for x in operands)
+            if getattr(exponent, "denominator", None) == 1:
+                return (_log2(base.numerator) + _log2(base.denominator) + 2) * abs(exponent.numerator)
+    return 0
+
+
+def expression_cost(tree, variables=None):
+    """
+    Estimated size in bits of the largest integer an expression builds,
+    or None when it depends on values unknown before evaluation (e.g.
+    factorial of a function result).
+    """
+    variables = variables or {}
+    state = {"bits": 0.0, "unknown": False}
+
+    def walk(node):
+        """(log2 of the magnitude or None if unknown, is an integer)"""
+        if isinstance(node, Number):
+            return _log2(node.value), isinstance(node.value, int)
+
+        if isinstance(node, Name):
+            if node.id in CONSTANTS:
+                return _log2(CONSTANTS[node.id]), False
+            value = variables.get(node.id)
+            if not isinstance(value, (int, float)):
+                return None, False
+            return _log2(value), isinstance(value, int)
+
+        if isinstance(node, UnaryOp):
+            return walk(node.operand)
+
+        if isinstance(node, BinOp):
+            (left, left_int), (right, right_int) = walk(node.left), walk(node.right)
+            is_int = left_int and right_int and node.op != "/"
+            known = left is not None and right is not None
+            if node.op in ("+", "-"):
+                size = max(left, right) + 1 if known else None
+            elif node.op == "*":
+                size = left + right if known else None
+            elif node.op in ("//", "%"):
+                size = left
+            elif node.op == "**":
+                if (isinstance(node.right, UnaryOp) and node.right.op == "-"
+                        or isinstance(node.right, Number) and node.right.value < 0):
+                    size, is_int = 0.0, False   # negative power: a float
+                elif not known:
+                    size = None
+                elif left == 0:
+                    size = 0.0
+                else:
+                    size = left * 2 ** right if right < 64 else math.inf
+            else:
+                size = None
+            if is_int:
+                if size is None:
+                    state["unknown"] = True
+                else:
+                    state["bits"] = max(state["bits"], size)
+            return size, is_int
+
+        if isinstance(node, Call):
+            args = [walk(arg) for arg in node.args]
+            if node.func == "factorial":
+                size = args[0][0]
+                if size is None:
+                    state["unknown"] = True
+                    return None, True
+                bits = factorial_bits(int(2 ** size)) if size < 64 else math.inf
+                state["bits"] = max(state["bits"], bits)
+                return bits, True
+            if node.func == "abs":
+                return args[0]
+            return None, False      # float functions: overflow, not growth
+
+        return None, False
+
+    walk(tree)
+    return None if state["unknown"] else state["bits"]
+
+
+def compiled_cost(compiled, variables=None):
+    """
+    expression_cost() of a CompiledExpression. Unless variable values
+    are involved the estimate depends only on the tree, so it is worked
+    out once and kept on the compiled expression.
+    """
+    if variables and compiled.variables:
+        return expression_cost(compiled.tree, variables)
+    try:
+        return compiled.cost
+    except AttributeError:
+        compiled.cost = expression_cost(compiled.tree)
+        return compiled.cost
+
+
+# WORKER PROCESSES (module level so they can be pickled)
+def _limit_memory(memory_limit):
+    """Caps this process's address space at its current size + memory_limit"""
+    if resource is None or not memory_limit:
+        return
+    try:
+        with open("/proc/self/statm") as stream:
+            current = int(stream.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError):
+        current = 0
+    limit = current + memory_limit
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _worker_main(connection, memory_limit):
+    _limit_memory(memory_limit)
+    while True:
+        try:
+            func, args = connection.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        try:
+            reply = ("ok", func(*args))
+        except MemoryError:
+            reply = ("memory", None)
+        except Exception as error:
+            reply = ("error", error)
+        try:
+            connection.send(reply)
+        except MemoryError:
+            connection.send(("memory", None))
+        except Exception as error:   # unpicklable result or exception
+            connection.send(("error", ArithmeticError(str(error))))
+
+
+def _calculate(name, operands, precision):
+    return calculate(name, *operands, precision=precision)
+
+
+def _evaluate(expression, variables):
+    return round(cached_expression(expression)(**variables), 6)
+
+
+class _Worker:
+    def __init__(self, memory_limit):
+        import multiprocessing   # only once a request is expensive (batch start-up)
+        self.connection, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_worker_main, args=(child, memory_limit), daemon=True)
+        self.process.start()
+        child.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class WorkerPool:
+    """
+    Worker processes that can be killed mid-computation.
+
+    Unlike concurrent.futures, a job that misses its deadline or is
+    cancelled does not keep its worker busy: the worker is killed and a
+    fresh one takes its place.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, memory_limit=DEFAULT_MEMORY_LIMIT):
+        self.workers = workers
+        self.memory_limit = memory_limit
+        self._idle = queue.Queue()
+        for _ in range(workers):
+            self._idle.put(None)    # started on first use
+        self._all = set()
+        self._lock = threading.Lock()
+
+    def run(self, func, args, deadline=None, cancel=None):
+        """
+        Runs func(*args) in a worker and returns its result.
+
+        deadline is a time.monotonic() value (waiting for a free worker
+        counts too); cancel is an optional threading.Event.
+        """
+        try:
+            worker = self._idle.get(timeout=_remaining(deadline))
+        except queue.Empty:
+            raise GuardError("No worker became free before the deadline") from None
+        if worker is None:
+            worker = self._spawn()
+
+        try:
+            worker.connection.send((func, args))
+            while not worker.connection.poll(min(POLL_INTERVAL, _remaining(deadline) or POLL_INTERVAL)):
+                if cancel is not None and cancel.is_set():
+                    raise GuardError("Cancelled")
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise GuardError("Exceeded the time limit")
+                if not worker.process.is_alive():
+                    raise GuardError("Worker stopped unexpectedly")
+            status, value = worker.connection.recv()
+            if status == "memory":
+                raise GuardError("Exceeded the memory limit")
+        except BaseException:
+            self._replace(worker)
+            worker = None
+            raise
+        finally:
+            self._idle.put(worker)
+
+        if status == "error":
+            raise value
+        return value
+
+    def _spawn(self):
+        worker = _Worker(self.memory_limit)
+        with self._lock:
+            self._all.add(worker)
+        return worker
+
+    def _replace(self, worker):
+        with self._lock:
+            self._all.discard(worker)
+        worker.kill()
+
+    def close(self):
+        """Kills every worker"""
+        with self._lock:
+            workers, self._all = self._all, set()
+        for worker in workers:
+            worker.kill()
+
+
+def _remaining(deadline):
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0)
+
+
+class Guard:
+    """
+    Estimates the cost of every request and runs expensive ones in a
+    WorkerPool with deadlines, cancellation and memory caps.
+
+    workers:      worker processes for expensive requests
+    timeout:      seconds allowed per expensive request (None = no limit)
+    max_bits:     results estimated above this size are refused outright
+    memory_limit: extra address space each worker may use, in bytes
+    inline_bits:  estimated results up to this size run in the caller
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, timeout=DEFAULT_TIMEOUT,
+                 max_bits=DEFAULT_MAX_BITS, memory_limit=DEFAULT_MEMORY_LIMIT,
+                 inline_bits=INLINE_BITS):
+        self.timeout = timeout
+        self.max_bits = max_bits
+        self.inline_bits = inline_bits
+        self.pool = WorkerPool(workers, memory_limit)
+        self._threads = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.pool.close()
+        if self._threads is not None:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+
+    def runs_inline(self, bits):
+        """True if a request of this estimated size can run inline; raises if too large"""
+        if bits is None:
+            return False
+        if bits > self.max_bits:
+            digits = "an unbounded number of" if bits == math.inf else f"about {int(bits * math.log10(2)) + 1}"
+            raise GuardError(f"Result would have {digits} digits, above the limit of {self.max_bits} bits")
+        return bits <= self.inline_bits
+
+    def _deadline(self, timeout):
+        timeout = self.timeout if timeout is None else timeout
+        return None if timeout is None else time.monotonic() + timeout
+
+    # SYNCHRONOUS API
+    def calculate(self, name, *operands, precision=None, timeout=None, cancel=None):
+        """Guarded operations.calculate()"""
+        if self.runs_inline(operation_cost(name, operands, precision)):
+            return calculate(name, *operands, precision=precision)
+        return self.pool.run(_calculate, (name, operands, precision), self._deadline(timeout), cancel)
+
+    def evaluate(self, expression, variables=None, timeout=None, cancel=None):
+        """Guarded expression evaluation, rounded like the calculator's"""
+        variables = variables or {}
+        if self.runs_inline(compiled_cost(cached_expression(expression), variables)):
+            return _evaluate(expression, variables)
+        return self.pool.run(_evaluate, (expression, variables), self._deadline(timeout), cancel)
+
+    # ASYNCIO API (cancelling the awaiting task kills the worker)
+    async def calculate_async(self, name, *operands, precision=None, timeout=None):
+        if self.runs_inline(operation_cost(name, operands, precision)):
+            return calculate(name, *operands, precision=precision)
+        return await self._run_async(_calculate, (name, operands, precision), timeout)
+
+    async def evaluate_async(self, expression, variables=None, timeout=None):
+        variables = variables or {}
+        if self.runs_inline(compiled_cost(cached_expression(expression), variables)):
+            return _evaluate(expression, variables)
+        return await self._run_async(_evaluate, (expression, variables), timeout)
+
+    async def _run_async(self, func, args, timeout):
+        import asyncio
+        if self._threads is None:
+            from concurrent.futures import ThreadPoolExecutor
+            # Threads only wait on worker pipes; extra ones queue for a free worker
+            self._threads = ThreadPoolExecutor(max_workers=4 * self.pool.workers)
+        cancel = threading.Event()
+        deadline = self._deadline(timeout)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._threads, self.pool.run, func, args, deadline, cancel)
+        except asyncio.CancelledError:
+            cancel.set()
+            raise
@@ -0,0 +1,417 @@
+"""
+Calculation History for the Scientific Calculator
+
+Every calculation is stored as a compact binary record:
+
+    op_id (uint16) | operand count (uint16) | result (float64) | text length (uint32)
+    operands (float64 each) | text (UTF-8)
+
+The text part is only used where a float is not enough: the source of an
+evaluated expression, or the exact digits of a result that a float cannot
+hold (a huge factorial, a precision-mode Decimal or Fraction).
+
+Records are appended to an on-disk log through a buffered writer, so
+history survives restarts. Only the most recent `window` records are
+kept in memory (a ring buffer); older ones are read back lazily from
+the memory-mapped log through a fixed-width offset index, so any entry
+can be reached without reading the ones before it.
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import atexit
+import bisect
+import mmap
+import os
+import struct
+from array import array
+from collections import deque
+
+from operations import BY_ID, OPERATIONS, _int, _num
+
+DEFAULT_HISTORY_PATH = os.environ.get("CALC_HISTORY", "~/.calculator_history")
+DEFAULT_WINDOW = 1000
+WRITE_BUFFER_SIZE = 1 << 16
+
+# Operation ids and history formats are declared in the operation registry
+OPERATION_IDS = {name: operation.op_id for name, operation in OPERATIONS.items()}
+
+HEADER = struct.Struct("<HHdI")
+MAX_OPERANDS = 0xFFFF       # the operand count is a uint16
+
+# Fixed-width index entry: log offset, op_id, result
+INDEX_ENTRY = struct.Struct("<QHd")
+INDEX_SUFFIX = ".idx"
+RESULT_TAIL_LIMIT = 1024
+
+
+class HistoryRecord:
+    """One calculation: operation id, operands, result and optional text"""
+
+    __slots__ = ("op_id", "operands", "result", "text")
+
+    def __init__(self, op_id, operands, result, text=""):
+        self.op_id = op_id
+        self.operands = tuple(operands)
+        self.result = result
+        self.text = text
+
+    @property
+    def operation(self):
+        return BY_ID[self.op_id].name
+
+    def encode(self):
+        """Packs the record into its binary form"""
+        text = self.text.encode("utf-8")
+        count = len(self.operands)
+        return (HEADER.pack(self.op_id, count, self.result, len(text))
+                + struct.pack(f"<{count}d", *self.operands) + text)
+
+    def __str__(self):
+        left = BY_ID[self.op_id].history(self.operands, self.text)
+        if self.text and self.operation != "expression":
+            right = self.text   # Exact result
+        elif self.operation == "factorial" and self.result != float("inf"):
+            right = _int(self.result)
+        else:
+            right = _num(self.result)
+        return f"{left} = {right}"
+
+    def __repr__(self):
+        return f"HistoryRecord({self.operation!r}, {self.operands!r}, {self.result!r}, {self.text!r})"
+
+
+def read_record(stream):
+    """Reads the next record from a binary stream, None at end of file"""
+    header = stream.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    op_id, count, result, text_length = HEADER.unpack(header)
+    body = stream.read(8 * count + text_length)
+    if len(body) < 8 * count + text_length:
+        return None     # Torn record from a crash mid-write: ignore it
+    operands = struct.unpack_from(f"<{count}d", body)
+    text = body[8 * count:].decode("utf-8")
+    return HistoryRecord(op_id, operands, result, text)
+
+
+def decode_record(buffer, offset):
+    """
+    Decodes the record starting at `offset` of a bytes-like buffer.
+
+    Returns (record, end offset), or (None, offset) if the buffer ends
+    before the record does.
+    """
+    if offset + HEADER.size > len(buffer):
+        return None, offset
+    op_id, count, result, text_length = HEADER.unpack_from(buffer, offset)
+    start = offset + HEADER.size
+    end = start + 8 * count + text_length
+    if end > len(buffer):
+        return None, offset
+    operands = struct.unpack_from(f"<{count}d", buffer, start)
+    text = bytes(buffer[start + 8 * count:end]).decode("utf-8")
+    return HistoryRecord(op_id, operands, result, text), end
+
+
+def iter_records(path):
+    """Lazily yields every record stored in a history file"""
+    try:
+        stream = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with stream:
+        while True:
+            record = read_record(stream)
+            if record is None:
+                return
+            yield record
+
+
+def _map_file(path):
+    """Read-only memory map of a file, None if it is missing or empty"""
+    try:
+        with open(path, "rb") as stream:
+            return mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class HistoryStore:
+    """
+    Append-only calculation history.
+
+    path=None keeps history in memory only (the last `window` records).
+    With a path, every record is also appended to the log file, and a
+    fixed-width index (`<path>.idx`: offset, op id and result of every
+    entry) is kept next to it. Both files are read through mmap, so
+
+    - get(n) jumps straight to entry n                       O(1)
+    - search(operation=...) uses a per-operation entry list  O(1) + matches
+    - search(low=..., high=...) bisects a result-sorted list O(log n) + matches
+
+    The secondary indexes are built from the index file on first use and
+    then kept up to date as entries are appended.
+    """
+
+    def __init__(self, path=None, window=DEFAULT_WINDOW):
+        self.path = os.path.expanduser(path) if path else None
+        self.index_path = self.path + INDEX_SUFFIX if self.path else None
+        self.recent = deque(maxlen=window)
+        self.count = 0
+        self._writer = None
+        self._index_writer = None
+        self._log_size = 0
+        self._log_map = None
+        self._index_map = None
+        self._by_operation = None
+        self._by_result = None
+        self._result_tail = []
+
+        if self.path:
+            self._load()
+            self._writer = open(self.path, "ab", buffering=WRITE_BUFFER_SIZE)
+            self._index_writer = open(self.index_path, "ab", buffering=WRITE_BUFFER_SIZE)
+            atexit.register(self.close)
+
+    # LOADING
+    def _load(self):
+        """Checks the index against the log and fills the in-memory window"""
+        log_size = _file_size(self.path)
+        if not self._index_is_valid(log_size):
+            self._rebuild_index(log_size)
+
+        self._log_size = _file_size(self.path)
+        self.count = _file_size(self.index_path) // INDEX_ENTRY.size
+        first = max(1, self.count - self.recent.maxlen + 1) if self.recent.maxlen else self.count + 1
+        for number in range(first, self.count + 1):
+            self.recent.append(self._read(number))
+
+    def _index_is_valid(self, log_size):
+        """The last index entry must point at a record ending exactly at end of log"""
+        if not os.path.exists(self.index_path):
+            return log_size == 0
+        index_size = os.path.getsize(self.index_path)
+        if index_size % INDEX_ENTRY.size:
+            return False
+        if index_size == 0:
+            return log_size == 0
+        index_map = _map_file(self.index_path)
+        log_map = _map_file(self.path)
+        try:
+            if log_map is None:
+                return False
+            offset = INDEX_ENTRY.unpack_from(index_map, index_size - INDEX_ENTRY.size)[0]
+            record, end = decode_record(log_map, offset)
+            return record is not None and end == log_size
+        finally:
+            index_map.close()
+            if log_map is not None:
+                log_map.close()
+
+    def _rebuild_index(self, log_size):
+        """Rewrites the index from the log, dropping a torn last record"""
+        log_map = _map_file(self.path) if log_size else None
+        end = 0
+        with open(self.index_path, "wb", buffering=WRITE_BUFFER_SIZE) as index:
+            if log_map is not None:
+                with log_map:
+                    while True:
+                        record, next_end = decode_record(log_map, end)
+                        if record is None:
+                            break
+                        index.write(INDEX_ENTRY.pack(end, record.op_id, record.result))
+                        end = next_end
+        if log_size > end:
+            os.truncate(self.path, end)
+
+    # WRITING
+    def append(self, operation, operands, result, text=""):
+        """
+        Records one calculation and returns the stored record; raises
+        ValueError for more than MAX_OPERANDS operands.
+        """
+        if isinstance(result, int) and abs(result) > 2 ** 53:
+            text = text or _exact_digits(result)
+        elif not isinstance(result, (int, float)):
+            text = text or str(result)  # Decimal or Fraction from precision mode
+        if len(operands) > MAX_OPERANDS:
+            raise ValueError(f"History records hold at most {MAX_OPERANDS} operands, got {len(operands)}")
+        operands = [float(x) for x in operands]
+        record = HistoryRecord(OPERATION_IDS[operation], operands, _as_float(result), text)
+        # Encoded before any state changes, so a record that cannot be
+        # stored leaves the window, the numbering and the files untouched
+        encoded = record.encode() if self._writer is not None else None
+        self.recent.append(record)
+        self.count += 1
+        number = self.count
+
+        if encoded is not None:
+            self._writer.write(encoded)
+            self._index_writer.write(INDEX_ENTRY.pack(self._log_size, record.op_id, record.result))
+            self._log_size += len(encoded)
+
+        if self._by_operation is not None:
+            self._by_operation.setdefault(record.op_id, array("Q")).append(number)
+        if self._by_result is not None and record.result == record.result:
+            self._result_tail.append((record.result, number))
+        return record
+
+    # RANDOM ACCESS
+    def _maps(self):
+        """Returns up-to-date (log, index) memory maps"""
+        self.flush()
+        if self._index_map is None or len(self._index_map) < self.count * INDEX_ENTRY.size:
+            if self._index_map is not None:
+                self._index_map.close()
+                self._log_map.close()
+            self._index_map = _map_file(self.index_path)
+            self._log_map = _map_file(self.path)
+        return self._log_map, self._index_map
+
+    def _index_entry(self, number):
+        """(offset, op_id, result) of entry `number`, read from the index"""
+        return INDEX_ENTRY.unpack_from(self._maps()[1], (number - 1) * INDEX_ENTRY.size)
+
+    def get(self, number):
+        """Returns entry `number` (1-based, oldest first)"""
+        if not 1 <= number <= self.count:
+            raise IndexError(f"History has no entry {number}")
+        window_start = self.count - len(self.recent) + 1
+        if number >= window_start:
+            return self.recent[number - window_start]
+        if not self.path:
+            raise IndexError(f"Entry {number} is no longer in memory")
+        return self._read(number)
+
+    def _read(self, number):
+        """Decodes entry `number` from the memory-mapped log"""
+        log_map, index_map = self._maps()
+        offset = INDEX_ENTRY.unpack_from(index_map, (number - 1) * INDEX_ENTRY.size)[0]
+        return decode_record(log_map, offset)[0]
+
+    def numbers(self):
+        """Entry numbers that can be read back, oldest first"""
+        if self.path:
+            return range(1, self.count + 1)
+        return range(self.count - len(self.recent) + 1, self.count + 1)
+
+    # SECONDARY INDEXES
+    def _operation_index(self):
+        """op_id -> array of entry numbers, built once from the index file"""
+        if self._by_operation is None:
+            by_operation = {}
+            for number in self.numbers():
+                by_operation.setdefault(self._op_id(number), array("Q")).append(number)
+            self._by_operation = by_operation
+        return self._by_operation
+
+    def _result_index(self):
+        """(sorted results, matching entry numbers), NaN results left out"""
+        if self._by_result is None or len(self._result_tail) > RESULT_TAIL_LIMIT:
+            pairs = sorted((result, number) for number in self.numbers()
+                           for result in (self._result(number),) if result == result)
+            self._by_result = (array("d", [p[0] for p in pairs]), array("Q", [p[1] for p in pairs]))
+            self._result_tail = []
+        return self._by_result
+
+    def _op_id(self, number):
+        if self.path:
+            return self._index_entry(number)[1]
+        return self.get(number).op_id
+
+    def _result(self, number):
+        if self.path:
+            return self._index_entry(number)[2]
+        return self.get(number).result
+
+    # QUERIES
+    def search(self, operation=None, low=None, high=None):
+        """
+        Lazily yields (number, record) matching an operation name and/or
+        an inclusive result range, oldest first.
+        """
+        low = float("-inf") if low is None else low
+        high = float("inf") if high is None else high
+        # Without a log, entries older than the window are gone for good
+        start = self.numbers().start
+
+        if operation is not None:
+            numbers = self._operation_index().get(OPERATION_IDS[operation], ())
+            if numbers and numbers[0] < start:
+                del numbers[:bisect.bisect_left(numbers, start)]
+            if low > float("-inf") or high < float("inf"):
+                numbers = [n for n in numbers if low <= self._result(n) <= high]
+        elif low > float("-inf") or high < float("inf"):
+            results, entry_numbers = self._result_index()
+            first = bisect.bisect_left(results, low)
+            last = bisect.bisect_right(results, high)
+            numbers = list(entry_numbers[first:last])
+            numbers.extend(n for result, n in self._result_tail if low <= result <= high)
+            numbers = sorted(n for n in numbers if n >= start)
+        else:
+            numbers = self.numbers()
+
+        for number in numbers:
+            yield number, self.get(number)
+
+    def pages(self, page_size=20, operation=None):
+        """
+        Lazily yields lists of (number, record), oldest first.
+
+        Entries are decoded from the memory-mapped log one page at a time,
+        so only one page is ever held in memory.
+        """
+        page = []
+        for item in self.search(operation):
+            page.append(item)
+            if len(page) == page_size:
+                yield page
+                page = []
+        if page:
+            yield page
+
+    def flush(self):
+        if self._writer is not None:
+            self._writer.flush()
+            self._index_writer.flush()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._index_writer.close()
+            self._writer = None
+            self._index_writer = None
+        if self._index_map is not None:
+            self._index_map.close()
+            self._log_map.close()
+            self._index_map = None
+            self._log_map = None
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except OverflowError:
+        return float("inf") if value > 0 else float("-inf")
+
+
+def _exact_digits(value):
+    try:
+        return str(value)
+    except ValueError:
+        return ""   # Beyond Python's int -> str digit limit
@@ -0,0 +1,206 @@
+"""
+Instrumentation for the Scientific Calculator
+
+Records, per operation and per expression:
+
+- calls and errors (by exception type)
+- cumulative time and latency percentiles over the most recent calls
+
+    calc = ScientificCalculator()
+    metrics = calc.enable_instrumentation()
+    calc.calculate("sqrt", 2.0)
+    metrics.snapshot()      ->  {"sqrt": {"calls": 1, "errors": {}, ...}}
+    print(metrics.prometheus())
+
+Instrumentation works by wrapping the calculator's entry points on one
+instance only. When it is disabled the wrappers are removed again, so a
+calculator that never enables it runs exactly the same code as before:
+there is no "if enabled" check anywhere on the hot path.
+
+With profile_dir set, every instrumented call also runs under cProfile
+and the session's profile is written to
+<profile_dir>/calculator-<pid>-<timestamp>.prof when it is closed (read
+it with `python -m pstats FILE`).
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import os
+import time
+from collections import deque
+
+SAMPLE_WINDOW = 2048            # latencies kept per key for percentiles
+MAX_EXPRESSION_KEYS = 100       # distinct expressions tracked per kind before grouping as "other"
+QUANTILES = (0.5, 0.9, 0.99)
+
+# Calculator methods that are wrapped, and how each call is labelled;
+# "kind:source" labels are capped at MAX_EXPRESSION_KEYS per kind
+INSTRUMENTED_METHODS = {
+    "calculate": lambda args: args[0],      # registry operation name
+    "apply": lambda args: args[0],          # addition(), power(), ... go through apply()
+    "evaluate": lambda args: "expression:" + args[0],
+    "evaluate_batch": lambda args: "batch:" + args[0],
+}
+
+
+class Metric:
+    """Counters for one operation or expression"""
+
+    __slots__ = ("calls", "errors", "total", "samples")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = {}    # exception type name -> count
+        self.total = 0.0    # seconds
+        self.samples = deque(maxlen=SAMPLE_WINDOW)
+
+    def percentile(self, fraction):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+class Instrumentation:
+    """
+    Call counts, latencies and errors of one calculator.
+
+    profile_dir: directory for per-session cProfile files (None = no profiling)
+    """
+
+    def __init__(self, profile_dir=None):
+        self.metrics = {}
+        self.profile_dir = profile_dir
+        self.profile_path = None
+        self._profiler = None
+        self._depth = 0
+        if profile_dir:
+            import cProfile
+            self._profiler = cProfile.Profile()
+
+    # RECORDING
+    def record(self, key, seconds, error=None):
+        metric = self.metrics.get(key)
+        if metric is None:
+            kind, grouped, _ = key.partition(":")
+            if grouped and self._keys_of(kind) >= MAX_EXPRESSION_KEYS:
+                key = kind + ":other"
+                metric = self.metrics.get(key)
+            if metric is None:
+                metric = self.metrics[key] = Metric()
+        metric.calls += 1
+        metric.total += seconds
+        metric.samples.append(seconds)
+        if error is not None:
+            name = type(error).__name__
+            metric.errors[name] = metric.errors.get(name, 0) + 1
+
+    def _keys_of(self, kind):
+        prefix = kind + ":"
+        return sum(1 for key in self.metrics if key.startswith(prefix))
+
+    def wrap(self, method, label):
+        """Returns `method` wrapped to record every call under label(args)"""
+        clock = time.perf_counter
+        record = self.record
+        profiler = self._profiler
+
+        def instrumented(*args, **kwargs):
+            if profiler is not None:
+                self._enter_profile()
+            started = clock()
+            try:
+                result = method(*args, **kwargs)
+            except Exception as error:
+                record(label(args), clock() - started, error)
+                raise
+            finally:
+                if profiler is not None:
+                    self._exit_profile()
+            record(label(args), clock() - started)
+            return result
+
+        instrumented.__wrapped__ = method
+        return instrumented
+
+    def _enter_profile(self):
+        if self._depth == 0:
+            self._profiler.enable()
+        self._depth += 1
+
+    def _exit_profile(self):
+        self._depth -= 1
+        if self._depth == 0:
+            self._profiler.disable()
+
+    # EXPORT
+    def snapshot(self):
+        """{key: {"calls", "errors", "total_seconds", "p50_us", "p90_us", "p99_us"}}"""
+        result = {}
+        for key, metric in self.metrics.items():
+            entry = {
+                "calls": metric.calls,
+                "errors": dict(metric.errors),
+                "total_seconds": metric.total,
+            }
+            for quantile in QUANTILES:
+                entry[f"p{round(quantile * 100)}_us"] = metric.percentile(quantile) * 1e6
+            result[key] = entry
+        return result
+
+    def prometheus(self, prefix="calculator"):
+        """Counters in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {prefix}_calls_total Calls per operation or expression",
+            f"# TYPE {prefix}_calls_total counter",
+        ]
+        for key, metric in self.metrics.items():
+            lines.append(f"{prefix}_calls_total{{{_labels(key)}}} {metric.calls}")
+
+        lines += [
+            f"# HELP {prefix}_errors_total Failed calls by exception type",
+            f"# TYPE {prefix}_errors_total counter",
+        ]
+        for key, metric in self.metrics.items():
+            for name, count in metric.errors.items():
+                lines.append(f'{prefix}_errors_total{{{_labels(key)},type="{name}"}} {count}')
+
+        lines += [
+            f"# HELP {prefix}_latency_seconds Call latency (quantiles over the last {SAMPLE_WINDOW} calls)",
+            f"# TYPE {prefix}_latency_seconds summary",
+        ]
+        for key, metric in self.metrics.items():
+            labels = _labels(key)
+            for quantile in QUANTILES:
+                lines.append(f'{prefix}_latency_seconds{{{labels},quantile="{quantile}"}} '
+                             f"{metric.percentile(quantile):.9f}")
+            lines.append(f"{prefix}_latency_seconds_sum{{{labels}}} {metric.total:.9f}")
+            lines.append(f"{prefix}_latency_seconds_count{{{labels}}} {metric.calls}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        self.metrics.clear()
+
+    # PROFILE FILES
+    def close(self):
+        """Writes the session's profile file (if profiling) and returns its path"""
+        if self._profiler is None or self.profile_path is not None:
+            return self.profile_path
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = f"calculator-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.prof"
+        self.profile_path = os.path.join(self.profile_dir, name)
+        self._profiler.dump_stats(self.profile_path)
+        return self.profile_path
+
+
+def _labels(key):
+    """'sqrt' -> operation="sqrt"; 'expression:x*2' -> operation="expression",expression="x*2" """
+    kind, sep, detail = key.partition(":")
+    if not sep:
+        return f'operation="{_escape(key)}"'
+    return f'operation="{kind}",expression="{_escape(detail)}"'
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
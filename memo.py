@@ -0,0 +1,257 @@
+"""
+Memoization of Pure Scientific Functions
+
+Optional per-function LRU caches for the registry operations whose
+results depend only on their arguments (sqrt, pow, log, log10, sin,
+cos, tan, exp, factorial):
+
+    import memo
+    memo.enable(default_size=1024, sizes={"sin": 4096})
+    calculate("sin", 0.5)       # computed
+    calculate("sin", 0.5)       # cache hit
+    memo.stats()["sin"]         ->  {"size": 1, "hits": 1, "hit_ratio": 0.5, ...}
+    memo.disable()
+
+What pays off depends on the function. A factorial hit saves tens to
+hundreds of microseconds (n in the thousands) and is on by default. The
+float functions are single libm calls of about 0.1 us, while a cache
+hit costs about 0.5 us, so they are only cached when given a size
+(default_size or sizes); measure with `python benchmark.py --memoize`.
+
+Float arguments are keyed by their exact IEEE-754 bit pattern, so 0.0
+and -0.0 are different keys (sin(-0.0) is -0.0) and a NaN argument
+always finds its own entry instead of filling the cache with misses.
+
+Factorials are keyed by the integer. Only results up to the factorial
+engine's SMALL_RESULT_BITS are cached here; larger ones are already kept
+by the engine's checkpoints, under their own memory budget.
+
+enable() and disable() also swap the functions in expression.FUNCTIONS
+and drop the compiled expressions cached with the old ones, so
+expressions, batch lines and the factorial kernel of vectorized.py go
+through the caches too. The NumPy ufuncs of vectorized.py work on whole
+columns and are never cached. From the command line:
+
+    python calculator.py --batch expressions.txt --memoize 1024
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import struct
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from expression import FUNCTIONS, expression_cache
+from factorial import SMALL_RESULT_BITS
+from operations import OPERATIONS
+
+DEFAULT_SIZE = 1024
+
+# Used by enable() unless overridden; float functions are off by default
+DEFAULT_SIZES = {"factorial": 256}
+
+# Operations that are pure functions of their arguments, with their arity
+MEMOIZABLE = {
+    "sqrt": 1, "pow": 2, "log": 1, "log10": 1, "sin": 1, "cos": 1,
+    "tan": 1, "exp": 1, "factorial": 1,
+}
+
+_MISSING = object()
+
+
+class MemoCache:
+    """
+    Bounded LRU cache in front of one function.
+
+    key:      turns the arguments into a hashable key (may raise to skip the cache)
+    store_if: optional predicate on the result; False results are not kept
+
+    Used where results can be large (factorial); float functions use the
+    faster FloatCache.
+    """
+
+    def __init__(self, func, maxsize=DEFAULT_SIZE, key=None, store_if=None):
+        if maxsize < 0:
+            raise ValueError("maxsize must be >= 0")
+        self.func = func
+        self.maxsize = maxsize
+        self.key = key or (lambda *args: args)
+        self.store_if = store_if
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, *args):
+        try:
+            key = self.key(*args)
+        except (TypeError, OverflowError):
+            return self.func(*args)     # e.g. an int too large for a float
+
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is not _MISSING:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        value = self.func(*args)
+
+        if self.maxsize and (self.store_if is None or self.store_if(value)):
+            with self._lock:
+                self._entries[key] = value
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def clear(self):
+        """Drops all entries and resets the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Returns a snapshot of the cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class FloatCache:
+    """
+    LRU cache for a function of floats, keyed by their IEEE-754 bytes.
+
+    The cache itself is functools.lru_cache, so a hit costs one struct
+    pack and one C-level lookup.
+    """
+
+    def __init__(self, func, arity, maxsize=DEFAULT_SIZE):
+        if maxsize < 0:
+            raise ValueError("maxsize must be >= 0")
+        packer = struct.Struct("<" + "d" * arity)
+        pack, unpack = packer.pack, packer.unpack
+        self.func = func
+        self.maxsize = maxsize
+        self.errors = 0
+        self._cached = cached = lru_cache(maxsize)(lambda key: func(*unpack(key)))
+
+        def call(*args):
+            try:
+                key = pack(*args)
+            except (struct.error, OverflowError):
+                return func(*args)      # not a float, or an int too large for one
+            try:
+                return cached(key)
+            except Exception:
+                self.errors += 1        # failed calls count as misses but are not stored
+                raise
+
+        self.call = call
+
+    def clear(self):
+        self._cached.cache_clear()
+        self.errors = 0
+
+    def stats(self):
+        info = self._cached.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            "size": info.currsize,
+            "maxsize": self.maxsize,
+            "hits": info.hits,
+            "misses": info.misses,
+            "evictions": max(info.misses - self.errors - info.currsize, 0),
+            "hit_ratio": info.hits / lookups if lookups else 0.0,
+        }
+
+    def __len__(self):
+        return self._cached.cache_info().currsize
+
+
+def _factorial_key(n):
+    if isinstance(n, float):
+        if not n.is_integer():
+            raise TypeError("not an integer")
+        n = int(n)
+    return n
+
+
+def _small_factorial(value):
+    return isinstance(value, int) and value.bit_length() <= SMALL_RESULT_BITS
+
+
+# ENABLING
+_originals = {}     # operation name -> original func while memoized
+caches = {}         # operation name -> MemoCache while memoized
+
+
+def enable(default_size=0, sizes=None):
+    """
+    Puts caches in front of the memoizable operations.
+
+    sizes maps operation names to their own cache size (0 = not cached),
+    on top of DEFAULT_SIZES; the others get default_size. Calling it
+    again reconfigures the caches.
+    """
+    sizes = {**DEFAULT_SIZES, **(sizes or {})}
+    unknown = set(sizes) - set(MEMOIZABLE)
+    if unknown:
+        raise ValueError(f"Cannot memoize {', '.join(sorted(unknown))}")
+    disable()
+    for name, arity in MEMOIZABLE.items():
+        maxsize = sizes.get(name, default_size)
+        if not maxsize:
+            continue
+        operation = OPERATIONS[name]
+        if name == "factorial":
+            cache = MemoCache(operation.func, maxsize, _factorial_key, _small_factorial)
+            func = cache
+        else:
+            cache = FloatCache(operation.func, arity, maxsize)
+            func = cache.call
+        _originals[name] = operation.func
+        caches[name] = cache
+        operation.func = func
+    _update_expressions()
+
+
+def disable():
+    """Removes every cache and restores the original functions"""
+    for name, func in _originals.items():
+        OPERATIONS[name].func = func
+    _originals.clear()
+    caches.clear()
+    _update_expressions()
+
+
+def _update_expressions():
+    """Points the expression engine at the current functions"""
+    for name in MEMOIZABLE:
+        if name in FUNCTIONS:
+            FUNCTIONS[name] = OPERATIONS[name].func
+    # Compiled expressions hold the functions they were compiled with
+    expression_cache.clear()
+
+
+def enabled():
+    return bool(caches)
+
+
+def stats():
+    """{operation name: cache counters} for every memoized operation"""
+    return {name: cache.stats() for name, cache in caches.items()}
@@ -0,0 +1,272 @@
+"""
+Operation Registry for the Scientific Calculator
+
+Every operation is declared exactly once, with its menu entry, operand
+count and prompt, domain checks, float implementation, precision-mode
+implementation and history format. Menus, batch mode, history and the
+expression engine all look operations up here instead of repeating the
+same parsing, validation and rounding in if/elif chains:
+
+    calculate("log10", 1000.0)           ->  3.0
+    MENUS["scientific"][1].name          ->  "sqrt"
+
+Dispatch is a dict lookup, so adding an operation does not slow any
+other one down. Operation ids are stored in history files: never change
+an existing op_id, only add new ones.
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import math
+from functools import lru_cache
+
+from factorial import FactorialEngine, format_approx, format_factorial
+from reductions import product_values, sum_values
+from stats import mean, median, quantile, stdev, variance
+
+FACTORIAL_TIME_LIMIT = 10   # seconds
+
+# Shared by every calculator in the process, so checkpoints are reused
+factorials = FactorialEngine(time_limit=FACTORIAL_TIME_LIMIT)
+
+
+class OperationError(ValueError):
+    """Raised when operands fail an operation's domain check"""
+
+
+class Operation:
+    """
+    One calculator operation.
+
+    name:       registry key, also the function name inside expressions
+    op_id:      stable number stored in history files
+    label:      menu text (None = not shown in a menu)
+    arity:      1 or 2 operands, or None for any number of operands
+    prompt:     input prompt used by the menus
+    func:       float implementation
+    precise:    PrecisionMath method used in precision mode (None = func)
+    check:      returns an error message for invalid operands, else None
+    history:    formats (operands, text) as the left side of a history entry
+    integer:    operands are integers
+    rounded:    round the result like every other float result
+    expression: callable by name inside expressions
+    display:    formats a result for printing (default: str)
+    fallback:   text shown instead when the result cannot be computed
+    """
+
+    __slots__ = ("name", "op_id", "label", "arity", "prompt", "func", "precise", "check",
+                 "history", "integer", "rounded", "expression", "display", "fallback")
+
+    def __init__(self, name, op_id, label, arity, prompt, func, history, precise=None,
+                 check=None, integer=False, rounded=True, expression=False,
+                 display=None, fallback=None):
+        self.name = name
+        self.op_id = op_id
+        self.label = label
+        self.arity = arity
+        self.prompt = prompt
+        self.func = func
+        self.precise = precise
+        self.check = check
+        self.history = history
+        self.integer = integer
+        self.rounded = rounded
+        self.expression = expression
+        self.display = display or (lambda result, *operands: str(result))
+        self.fallback = fallback
+
+    def __repr__(self):
+        return f"Operation({self.name!r})"
+
+
+# DOMAIN CHECKS
+def _non_negative(x):
+    return None if x >= 0 else "Invalid input"
+
+
+def _positive(x):
+    return None if x > 0 else "Invalid input"
+
+
+def _non_zero_divisor(message):
+    return lambda a, b: None if b != 0 else message
+
+
+def _at_least(count):
+    return lambda nums: None if len(nums) >= count else f"Enter at least {count} number(s)"
+
+
+def _quantile_operands(nums):
+    if len(nums) < 2:
+        return "Enter q and at least one number"
+    return None if 0 <= nums[0] <= 1 else "q must be between 0 and 1"
+
+
+# HISTORY FORMATS
+def _num(x):
+    return repr(x)
+
+
+def _int(x):
+    return str(int(x))
+
+
+def _unary(name):
+    return lambda ops, text: f"{name}({_num(ops[0])})"
+
+
+def _binary(symbol):
+    return lambda ops, text: f"{_num(ops[0])} {symbol} {_num(ops[1])}"
+
+
+def _listed(name):
+    return lambda ops, text: f"{name}({', '.join(map(_num, ops))})"
+
+
+def _evaluate(source):
+    from expression import cached_expression
+    return cached_expression(source)()
+
+
+# THE REGISTRY
+_ANY = "Enter numbers separated by space: "
+_TWO = "Enter two numbers: "
+_BASE = "Enter base and power: "
+_X = "Enter x: "
+_Q = "Enter q (0-1) followed by the numbers: "
+
+REGISTRY = (
+    # Basic operations
+    Operation("addition", 0, "Addition", None, _ANY, sum_values,
+              lambda ops, text: " + ".join(map(_num, ops)), precise="add"),
+    Operation("subtraction", 1, "Subtraction", 2, _TWO, lambda a, b: a - b,
+              _binary("-"), precise="subtract"),
+    Operation("multiplication", 2, "Multiplication", None, _ANY, product_values,
+              lambda ops, text: " * ".join(map(_num, ops)), precise="multiply"),
+    Operation("division", 3, "Division", 2, _TWO, lambda a, b: a / b,
+              _binary("/"), precise="divide", check=_non_zero_divisor("Division by zero")),
+    Operation("modulus", 4, "Modulus", 2, _TWO, lambda a, b: a % b,
+              _binary("%"), precise="modulus", check=_non_zero_divisor("Modulus by zero")),
+    Operation("power", 5, "Power", 2, _BASE, lambda a, b: a ** b,
+              _binary("**"), precise="power"),
+
+    # Scientific operations
+    Operation("sqrt", 6, "Square Root (√x)", 1, "Enter x (>=0): ", math.sqrt,
+              _unary("sqrt"), precise="sqrt", check=_non_negative, expression=True),
+    Operation("pow", 7, "Power (xʸ)", 2, _BASE, math.pow,
+              _binary("^"), precise="pow", expression=True),
+    Operation("log", 8, "Natural Logarithm (ln x)", 1, "Enter x (>0): ", math.log,
+              _unary("log"), precise="log", check=_positive, expression=True),
+    Operation("log10", 9, "Logarithm Base 10 (log₁₀ x)", 1, "Enter x (>0): ", math.log10,
+              _unary("log10"), precise="log10", check=_positive, expression=True),
+    Operation("sin", 10, "Sine (sin x)", 1, _X, math.sin,
+              _unary("sin"), precise="sin", expression=True),
+    Operation("cos", 11, "Cosine (cos x)", 1, _X, math.cos,
+              _unary("cos"), precise="cos", expression=True),
+    Operation("tan", 12, "Tangent (tan x)", 1, _X, math.tan,
+              _unary("tan"), precise="tan", expression=True),
+    Operation("factorial", 13, "Factorial (x!)", 1, "Enter integer x (>=0): ", factorials.compute,
+              lambda ops, text: f"factorial({_int(ops[0])})", check=_non_negative,
+              integer=True, rounded=False, expression=True,
+              display=lambda result, n: format_factorial(n, result, factorials),
+              fallback=lambda n: "Approximately: " + format_approx(factorials.approximate(n))),
+    Operation("abs", 14, "Absolute Value (|x|)", 1, _X, abs,
+              _unary("abs"), precise="fabs", expression=True),
+    Operation("exp", 15, "Exponential (eˣ)", 1, _X, math.exp,
+              lambda ops, text: f"e^{_num(ops[0])}", precise="exp", expression=True),
+
+    # Expression evaluation (operand is the expression text)
+    Operation("expression", 16, None, 1, "Enter expression: ", _evaluate,
+              lambda ops, text: text),
+
+    # Statistics (single pass, see stats.py)
+    Operation("mean", 17, "Mean", None, _ANY, mean, _listed("mean"),
+              check=_at_least(1)),
+    Operation("variance", 18, "Variance (sample)", None, _ANY, variance,
+              _listed("variance"), check=_at_least(2)),
+    Operation("stdev", 19, "Standard Deviation (sample)", None, _ANY, stdev,
+              _listed("stdev"), check=_at_least(2)),
+    Operation("min", 20, "Minimum", None, _ANY, min, _listed("min"), check=_at_least(1)),
+    Operation("max", 21, "Maximum", None, _ANY, max, _listed("max"), check=_at_least(1)),
+    Operation("median", 22, "Median", None, _ANY, median,
+              _listed("median"), check=_at_least(1)),
+    Operation("quantile", 23, "Quantile", None, _Q, quantile,
+              lambda ops, text: f"quantile({_num(ops[0])}; {', '.join(map(_num, ops[1:]))})",
+              check=_quantile_operands),
+)
+
+OPERATIONS = {operation.name: operation for operation in REGISTRY}
+BY_ID = {operation.op_id: operation for operation in REGISTRY}
+
+MENUS = {
+    "basic": dict(enumerate((OPERATIONS[name] for name in (
+        "addition", "subtraction", "multiplication", "division", "modulus", "power",
+        "mean", "variance", "stdev", "min", "max", "median", "quantile")), 1)),
+    "scientific": dict(enumerate((OPERATIONS[name] for name in (
+        "sqrt", "pow", "log", "log10", "sin", "cos", "tan", "factorial", "abs", "exp")), 1)),
+}
+
+MENU_TITLES = {
+    "basic": "--- BASIC OPERATIONS ---",
+    "scientific": "--- SCIENTIFIC OPERATIONS ---",
+}
+
+MENU_NOTES = {
+    "scientific": "Note: Trigonometric functions use radians",
+}
+
+
+@lru_cache(maxsize=None)
+def menu_text(group):
+    """Builds the menu shown for a group of operations (once per group)"""
+    lines = ["", MENU_TITLES[group]]
+    lines += [f"{key}. {operation.label}" for key, operation in MENUS[group].items()]
+    lines.append("0. Back to Main Menu")
+    if group in MENU_NOTES:
+        lines.append(MENU_NOTES[group])
+    return "\n".join(lines) + "\n"
+
+
+# DISPATCH
+def parse_operands(operation, tokens, number=float):
+    """
+    Converts input tokens to the operand tuple an operation expects.
+
+    n-ary operations get a single list argument. Raises ValueError (or
+    decimal's ArithmeticError) for missing or malformed operands.
+    """
+    convert = int if operation.integer else number
+    if operation.arity is None:
+        return ([convert(token) for token in tokens],)
+    if len(tokens) < operation.arity:
+        raise ValueError(f"{operation.name} needs {operation.arity} operand(s)")
+    return tuple(convert(token) for token in tokens[:operation.arity])
+
+
+def history_operands(operation, operands):
+    """Flat operand list as stored in history"""
+    if operation.arity is None:
+        return operands[0]
+    return operands
+
+
+def calculate(name, *operands, precision=None):
+    """
+    Runs an operation on parsed operands and rounds the result.
+
+    precision is an optional PrecisionMath; operations that have a
+    precise implementation then run on Decimal/Fraction instead of float.
+    """
+    operation = OPERATIONS[name]
+    if operation.check is not None:
+        error = operation.check(*operands)
+        if error:
+            raise OperationError(error)
+
+    if precision is not None and operation.precise:
+        result = getattr(precision, operation.precise)(*operands)
+        return precision.round(result) if operation.rounded else result
+
+    result = operation.func(*operands)
+    return round(result, 6) if operation.rounded else result
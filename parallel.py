@@ -0,0 +1,132 @@
+"""
+Parallel Batch Evaluation for the Scientific Calculator
+
+Splits a stream of work into chunks and evaluates them on a pool of
+worker processes, so large batch workloads use every core:
+
+    with ParallelEvaluator(workers=32, chunk_size=4096) as pool:
+        for line in pool.evaluate(expressions):
+            ...
+
+Results always come back in the original input order. At most
+`max_pending` chunks are in flight at once (backpressure), so reading
+a huge input never runs ahead of the workers and memory stays bounded.
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+
+DEFAULT_CHUNK_SIZE = 4096
+
+
+def chunked(iterable, size):
+    """Yields lists of up to `size` items from any iterable"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# WORKER FUNCTIONS (module level so they can be pickled)
+def _apply(func, chunk):
+    return [func(item) for item in chunk]
+
+
+@lru_cache(maxsize=None)
+def _worker_guard(timeout):
+    """One guard.Guard per worker process; its own worker starts on the first expensive line"""
+    from guard import Guard
+    return Guard(workers=1, timeout=timeout)
+
+
+def evaluate_chunk(expressions, operation=None, timeout=None):
+    """Evaluates a list of expressions (or operand lines) into batch-mode output lines"""
+    from batch import evaluate_expressions, evaluate_operation, format_results
+    guard = _worker_guard(timeout)
+    if operation is None:
+        return list(format_results(evaluate_expressions(expressions, guard)))
+    return list(format_results(evaluate_operation(expressions, operation, guard)))
+
+
+def _evaluate_lines(operation, timeout, chunk):
+    return evaluate_chunk(chunk, operation, timeout)
+
+
+class ParallelEvaluator:
+    """
+    Ordered, chunked process-pool executor.
+
+    workers:     number of processes (default: all cores)
+    chunk_size:  items sent to a worker at a time
+    max_pending: chunks allowed in flight before input reading pauses
+                 (default: 2 per worker)
+    initializer: optional module-level function run with initargs in
+                 every worker process before its first chunk
+    """
+
+    def __init__(self, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, max_pending=None,
+                 initializer=None, initargs=()):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be >= 1")
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending or 2 * self.workers
+        self.initializer = initializer
+        self.initargs = initargs
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+    def shutdown(self, cancel_pending=False):
+        """Stops the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=cancel_pending)
+            self._executor = None
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=self.initializer,
+                                                 initargs=self.initargs)
+        return self._executor
+
+    def map_chunks(self, chunk_func, items, *args):
+        """
+        Yields chunk_func(*args, chunk) for every chunk, in input order.
+
+        The chunk is passed last, after the fixed args. chunk_func must be
+        a module-level function so it can be sent to the worker processes.
+        """
+        pool = self._pool()
+        pending = deque()
+        try:
+            for chunk in chunked(items, self.chunk_size):
+                if len(pending) >= self.max_pending:
+                    yield pending.popleft().result()
+                pending.append(pool.submit(chunk_func, *args, chunk))
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def map(self, func, items):
+        """Ordered parallel equivalent of map(func, items)"""
+        for results in self.map_chunks(_apply, items, func):
+            yield from results
+
+    def evaluate(self, expressions, operation=None, timeout=None):
+        """Yields one batch-mode output line per expression, in order"""
+        for lines in self.map_chunks(_evaluate_lines, expressions, operation, timeout):
+            yield from lines
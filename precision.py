@@ -0,0 +1,235 @@
+"""
+Arbitrary-Precision Arithmetic for the Scientific Calculator
+
+PrecisionMath mirrors the parts of the math module the calculator uses
+(sqrt, pow, log, log10, sin, cos, tan, exp) plus the basic operations,
+but works on decimal.Decimal at a chosen number of significant digits:
+
+    pm = PrecisionMath(50)
+    pm.sqrt(pm.number("2"))      ->  Decimal('1.4142135623730950488016887242096980785696718753769')
+
+In "fraction" mode addition, subtraction, multiplication, division,
+modulus and integer powers are exact (fractions.Fraction); functions
+whose results are irrational fall back to Decimal at the same precision.
+
+pi and e are computed once per precision and cached, so repeated
+high-precision evaluation does not pay for them again.
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+from decimal import Context, Decimal, localcontext
+from fractions import Fraction
+from functools import lru_cache
+
+DEFAULT_DIGITS = 50
+MODES = ("decimal", "fraction")
+
+# Extra digits carried through intermediate steps before the final rounding
+GUARD_DIGITS = 10
+# Constants kept per precision (working precisions vary inside sin/cos)
+CONSTANT_CACHE_SIZE = 32
+
+
+# CACHED CONSTANTS
+def _arctan_inverse(x):
+    """arctan(1/x) for an integer x in the current decimal context"""
+    x = Decimal(x)
+    power = 1 / x
+    x_squared = x * x
+    total = power
+    k = 1
+    while True:
+        power /= -x_squared
+        term = power / (2 * k + 1)
+        if total + term == total:
+            return total
+        total += term
+        k += 1
+
+
+@lru_cache(maxsize=CONSTANT_CACHE_SIZE)
+def pi(digits):
+    """pi to `digits` significant digits (Machin's formula), cached"""
+    with localcontext(Context(prec=digits + GUARD_DIGITS)):
+        value = 4 * (4 * _arctan_inverse(5) - _arctan_inverse(239))
+    return Context(prec=digits).plus(value)
+
+
+@lru_cache(maxsize=CONSTANT_CACHE_SIZE)
+def e(digits):
+    """e to `digits` significant digits, cached"""
+    return Decimal(1).exp(Context(prec=digits))
+
+
+class PrecisionMath:
+    """
+    Decimal/Fraction drop-in for the math functions the calculator uses.
+
+    digits: significant digits of every result
+    mode:   "decimal" or "fraction"
+    """
+
+    def __init__(self, digits=DEFAULT_DIGITS, mode="decimal"):
+        if digits < 1:
+            raise ValueError("digits must be >= 1")
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        self.digits = digits
+        self.mode = mode
+        self.context = Context(prec=digits)
+
+    @property
+    def pi(self):
+        return pi(self.digits)
+
+    @property
+    def e(self):
+        return e(self.digits)
+
+    # CONVERSIONS
+    def number(self, value):
+        """
+        Converts user input to the working type.
+
+        Strings are parsed exactly ("0.1" stays 0.1); floats go through
+        their shortest repr for the same reason.
+        """
+        if isinstance(value, float):
+            value = repr(value)
+        if self.mode == "fraction":
+            return Fraction(value)
+        if isinstance(value, Fraction):
+            return self.decimal(value)
+        return Decimal(value)
+
+    def decimal(self, value):
+        """Converts any supported number to a Decimal at this precision"""
+        if isinstance(value, Fraction):
+            return self.context.divide(Decimal(value.numerator), Decimal(value.denominator))
+        if isinstance(value, float):
+            value = repr(value)
+        return self.context.plus(Decimal(value))
+
+    def round(self, value):
+        """Applies the working precision to a result"""
+        if isinstance(value, Fraction):
+            return value
+        return self.context.plus(value)
+
+    # BASIC OPERATIONS
+    def add(self, nums):
+        nums = [self.number(i) for i in nums]
+        if self.mode == "fraction":
+            return sum(nums, Fraction(0))
+        with localcontext(self.context) as ctx:
+            ctx.prec += GUARD_DIGITS
+            total = sum(nums, Decimal(0))
+        return self.context.plus(total)
+
+    def multiply(self, nums):
+        nums = [self.number(i) for i in nums]
+        if self.mode == "fraction":
+            result = Fraction(1)
+        else:
+            result = Decimal(1)
+        with localcontext(self.context) as ctx:
+            ctx.prec += GUARD_DIGITS
+            for i in nums:
+                result *= i
+        return self.round(result)
+
+    def subtract(self, a, b):
+        a, b = self.number(a), self.number(b)
+        if self.mode == "fraction":
+            return a - b
+        return self.context.subtract(a, b)
+
+    def divide(self, a, b):
+        a, b = self.number(a), self.number(b)
+        if self.mode == "fraction":
+            return a / b
+        return self.context.divide(a, b)
+
+    def modulus(self, a, b):
+        """a mod b with the sign of b, like float %"""
+        a, b = self.number(a), self.number(b)
+        if self.mode == "fraction":
+            return a % b
+        result = self.context.remainder(a, b)
+        if result and (result < 0) != (b < 0):
+            result = self.context.add(result, b)
+        return result
+
+    def power(self, a, b):
+        a, b = self.number(a), self.number(b)
+        if self.mode == "fraction" and b.denominator == 1:
+            return a ** b.numerator
+        return self.context.power(self.decimal(a), self.decimal(b))
+
+    # SCIENTIFIC FUNCTIONS (same names as the math module)
+    def pow(self, a, b):
+        return self.power(a, b)
+
+    def sqrt(self, x):
+        x = self.decimal(x)
+        if x < 0:
+            raise ValueError("math domain error")
+        return x.sqrt(self.context)
+
+    def log(self, x, base=None):
+        x = self.decimal(x)
+        if x <= 0:
+            raise ValueError("math domain error")
+        if base is None:
+            return x.ln(self.context)
+        with localcontext(self.context) as ctx:
+            ctx.prec += GUARD_DIGITS
+            result = x.ln() / self.decimal(base).ln()
+        return self.context.plus(result)
+
+    def log10(self, x):
+        x = self.decimal(x)
+        if x <= 0:
+            raise ValueError("math domain error")
+        return x.log10(self.context)
+
+    def exp(self, x):
+        return self.decimal(x).exp(self.context)
+
+    def sin(self, x):
+        return self.context.plus(self._sin_cos(x)[0])
+
+    def cos(self, x):
+        return self.context.plus(self._sin_cos(x)[1])
+
+    def tan(self, x):
+        sin, cos = self._sin_cos(x)
+        return self.context.divide(sin, cos)
+
+    def fabs(self, x):
+        return abs(self.number(x))
+
+    def _sin_cos(self, x):
+        """sin(x) and cos(x) by Taylor series after reducing x modulo 2*pi"""
+        x = self.decimal(x)
+        # Large arguments lose digits to the reduction, so carry extra ones
+        extra = max(x.adjusted(), 0) + GUARD_DIGITS
+        with localcontext(self.context) as ctx:
+            ctx.prec += extra
+            two_pi = 2 * pi(ctx.prec)
+            x -= two_pi * (x / two_pi).to_integral_value()
+            x_squared = x * x
+            sin, cos = x, Decimal(1)
+            sin_term, cos_term = x, Decimal(1)
+            n = 1
+            while True:
+                sin_term = -sin_term * x_squared / ((2 * n) * (2 * n + 1))
+                cos_term = -cos_term * x_squared / ((2 * n - 1) * (2 * n))
+                if sin + sin_term == sin and cos + cos_term == cos:
+                    break
+                sin += sin_term
+                cos += cos_term
+                n += 1
+        return sin, cos
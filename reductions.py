@@ -0,0 +1,226 @@
+"""
+Streaming Reductions for the Scientific Calculator
+
+Sums and products over any number of operands, read from an iterable or
+a file in chunks, in constant memory:
+
+    stream_sum("numbers.txt")                   ->  4.999999950000001e+15
+    stream_product([1e200, 1e200, 1e-300])      ->  1e+100
+    stream_product(open("factors.txt", "rb")).log10
+
+Files are read in blocks of DEFAULT_CHUNK_BYTES and every block is
+split and converted in one pass (float() accepts bytes directly), so no
+per-line Python loop runs. Operands may be separated by any whitespace
+or commas.
+
+- Sums are compensated: each chunk is added with math.fsum and the
+  running total is carried as a (high, low) pair of floats, so the
+  result is correctly rounded in practice however many operands there
+  are (a plain left-to-right sum loses accuracy with every addition).
+
+- Products are kept in log2 space with an exact integer exponent: a
+  float mantissa in [0.5, 1) whose sign is the product's sign, times
+  2**exponent. Blocks of operands are multiplied with math.prod and
+  only blocks that overflow or underflow are taken apart with
+  math.frexp, so long products never overflow or underflow in between
+  and the result is as accurate as a plain product that happens not to.
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import math
+import os
+from itertools import chain, islice
+
+DEFAULT_CHUNK_BYTES = 1 << 20       # bytes read from a file at a time
+DEFAULT_CHUNK_SIZE = 1 << 16        # operands taken from an iterable at a time
+PRODUCT_BLOCK = 64                  # operands multiplied with math.prod at a time
+MIN_NORMAL = 2.0 ** -1022
+
+
+# READING OPERANDS
+def _parse(tokens):
+    try:
+        return list(map(float, tokens))
+    except ValueError:
+        for token in tokens:
+            try:
+                float(token)
+            except ValueError:
+                if isinstance(token, bytes):
+                    token = token.decode(errors="replace")
+                raise ValueError(f"Invalid number {token!r}") from None
+        raise
+
+
+def _read_blocks(stream, chunk_bytes):
+    """Yields lists of floats from a text or binary stream"""
+    tail = None
+    while True:
+        block = stream.read(chunk_bytes)
+        if not block:
+            break
+        if isinstance(block, str):
+            block = block.encode()
+        if tail:
+            block = tail + block
+        tokens = block.replace(b",", b" ").split()
+        # A block that does not end in a separator may end mid-number
+        ends_inside = not block[-1:].isspace() and block[-1:] != b","
+        tail = tokens.pop() if tokens and ends_inside else None
+        if tokens:
+            yield _parse(tokens)
+    if tail:
+        yield _parse([tail])
+
+
+def iter_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Yields the operands of `source` as lists of floats.
+
+    source is a file path, an open text or binary file, a binary
+    columnar.ColumnReader (its float64 chunks are passed on as they are)
+    or an iterable of numbers or numeric strings.
+    """
+    if hasattr(source, "chunks"):
+        yield from source.chunks(chunk_size)
+        return
+    if isinstance(source, (str, bytes, os.PathLike)):
+        with open(source, "rb") as stream:
+            yield from _read_blocks(stream, chunk_bytes)
+        return
+    if hasattr(source, "read"):
+        yield from _read_blocks(getattr(source, "buffer", source), chunk_bytes)
+        return
+
+    iterator = iter(source)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            break
+        yield _parse(chunk)
+
+
+# SUMS
+class StreamingSum:
+    """Compensated running sum, fed one chunk of floats at a time"""
+
+    def __init__(self):
+        self.high = 0.0
+        self.low = 0.0      # rounding error of high, carried to the next chunk
+        self.count = 0
+
+    def add(self, values):
+        self.count += len(values)
+        carried = (self.high, self.low)
+        try:
+            high = math.fsum(chain(values, carried))
+            if math.isfinite(high):
+                self.low = math.fsum(chain(values, carried, (-high,)))
+            else:
+                self.low = 0.0
+            self.high = high
+        except (OverflowError, ValueError):
+            # The sum overflows (fsum raises) or adds inf to -inf:
+            # the plain sum gives the matching inf or NaN
+            self.high, self.low = sum(chain(values, carried)), 0.0
+        return self
+
+    @property
+    def value(self):
+        return self.high + self.low
+
+
+def stream_sum(source, **options):
+    """Compensated sum of every operand in `source` (see iter_chunks)"""
+    total = StreamingSum()
+    for chunk in iter_chunks(source, **options):
+        total.add(chunk)
+    return total.value
+
+
+def sum_values(values):
+    """Compensated sum of a list of numbers"""
+    return StreamingSum().add(values).value
+
+
+# PRODUCTS
+class StreamingProduct:
+    """
+    Running product as mantissa * 2**exponent, fed one chunk at a time.
+
+    mantissa carries the sign; it is 0.0 once a zero operand was seen and
+    inf or NaN once a non-finite operand was.
+    """
+
+    def __init__(self):
+        self.mantissa = 1.0
+        self.exponent = 0
+        self.count = 0
+
+    def add(self, values):
+        self.count += len(values)
+        mantissa, exponent = self.mantissa, self.exponent
+        frexp, prod = math.frexp, math.prod
+        for start in range(0, len(values), PRODUCT_BLOCK):
+            block = values[start:start + PRODUCT_BLOCK]
+            product = prod(block)
+            if not MIN_NORMAL <= abs(product) < math.inf:
+                # Over- or underflow inside the block (or a zero, inf or
+                # NaN operand): one operand at a time
+                product = 1.0
+                for value in block:
+                    m, e = frexp(value)
+                    product, shift = frexp(product * m)
+                    exponent += e + shift
+            m, e = frexp(product)
+            mantissa, shift = frexp(mantissa * m)
+            exponent += e + shift
+        self.mantissa, self.exponent = mantissa, exponent
+        return self
+
+    @property
+    def sign(self):
+        return (self.mantissa > 0) - (self.mantissa < 0)
+
+    @property
+    def log10(self):
+        """log10 of the magnitude (-inf for zero)"""
+        if self.mantissa == 0:
+            return -math.inf
+        return math.log10(abs(self.mantissa)) + self.exponent * math.log10(2)
+
+    @property
+    def value(self):
+        """The product as a float: inf or 0.0 (with its sign) when out of range"""
+        try:
+            return math.ldexp(self.mantissa, self.exponent)
+        except OverflowError:
+            return math.copysign(math.inf, self.mantissa)
+
+    def __float__(self):
+        return self.value
+
+    def __str__(self):
+        value = self.value
+        if value != 0 and math.isfinite(value) or self.mantissa == 0 or not math.isfinite(self.mantissa):
+            return str(value)
+        # A float log10 loses digits for huge exponents: scale in decimal instead
+        from decimal import MAX_EMAX, MIN_EMIN, Context, Decimal
+        working = Context(prec=30, Emax=MAX_EMAX, Emin=MIN_EMIN)
+        value = working.multiply(Decimal(self.mantissa), working.power(2, self.exponent))
+        return f"≈ {value.normalize(Context(prec=15, Emax=MAX_EMAX, Emin=MIN_EMIN)):e}"
+
+
+def stream_product(source, **options):
+    """StreamingProduct of every operand in `source` (see iter_chunks)"""
+    product = StreamingProduct()
+    for chunk in iter_chunks(source, **options):
+        product.add(chunk)
+    return product
+
+
+def product_values(values):
+    """Product of a list of numbers without intermediate over- or underflow"""
+    return StreamingProduct().add(list(values)).value
@@ -0,0 +1,309 @@
+"""
+Calculation Server for the Scientific Calculator
+
+Serves calculator operations and expression evaluation over a local TCP
+or Unix socket, so services can embed the calculator without driving
+the interactive menu through input():
+
+    python server.py --port 8765
+    python server.py --unix /tmp/calculator.sock
+
+The protocol is line-delimited JSON, one request per line and one
+response per line, in the same order:
+
+    {"id": 1, "op": "sqrt", "args": [2]}             ->  {"id": 1, "result": 1.414214}
+    {"id": 2, "expr": "x ** 2", "vars": {"x": 1.5}}  ->  {"id": 2, "result": 2.25}
+    {"id": 3, "op": "history", "limit": 10}          ->  {"id": 3, "result": ["sqrt(2.0) = 1.414214", ...]}
+    {"id": 4, "op": "log", "args": [0]}              ->  {"id": 4, "error": "Invalid input"}
+
+Clients may send many requests without waiting for the answers
+(pipelining). Every connection has its own calculator and therefore its
+own in-memory history. One process serves thousands of connections; the
+number of connections and the size of a request line are limited, and
+SIGINT/SIGTERM shut the server down gracefully (no new connections,
+requests in progress are answered, then every connection is closed).
+
+Every request goes through a Guard (see guard.py): expensive ones, such
+as a huge factorial, run in worker processes with a deadline and a
+memory cap instead of on the event loop, so they cannot stall the other
+connections.
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import signal
+import sys
+
+from calculator_oops import ScientificCalculator
+from factorial import format_int
+from guard import DEFAULT_MEMORY_LIMIT, DEFAULT_TIMEOUT, DEFAULT_WORKERS, Guard, GuardError
+from operations import OPERATIONS, OperationError, history_operands, parse_operands
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_CONNECTIONS = 10000
+DEFAULT_MAX_REQUEST_BYTES = 1 << 16
+DEFAULT_HISTORY_WINDOW = 100
+DEFAULT_SHUTDOWN_TIMEOUT = 5.0      # seconds to finish requests in progress
+BACKLOG = 1024
+
+# Integers with more digits than this are sent as approximations (see format_int)
+MAX_INT_DIGITS = 4300
+
+
+class RequestError(ValueError):
+    """Raised for a request the server cannot understand"""
+
+
+# RESULT ENCODING
+def encode_result(result):
+    """Converts a calculation result to a JSON value"""
+    if isinstance(result, (bool, str)):
+        return result
+    if isinstance(result, float):
+        return result if math.isfinite(result) else str(result)
+    if isinstance(result, int):
+        return result if _fits(result) else format_int(result)
+    if isinstance(result, list):
+        return [encode_result(item) for item in result]
+    return str(result)      # Decimal, Fraction
+
+
+def _fits(value):
+    return value.bit_length() * math.log10(2) < MAX_INT_DIGITS
+
+
+def _token(value):
+    """Request argument -> input token, so JSON numbers parse like typed input"""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise RequestError(f"Invalid argument {value!r}")
+    return value if isinstance(value, str) else repr(value)
+
+
+# REQUEST HANDLING
+async def handle_request(calc, request, guard):
+    """
+    Runs one decoded request against a connection's calculator through
+    `guard` and returns the result value; raises on failure.
+    """
+    if not isinstance(request, dict):
+        raise RequestError("Request must be a JSON object")
+
+    if "expr" in request:
+        expression = request["expr"]
+        variables = request.get("vars") or {}
+        if not isinstance(expression, str) or not isinstance(variables, dict):
+            raise RequestError("expr must be a string and vars an object")
+        result = await guard.evaluate_async(expression, variables)
+        calc.add_history("expression", (), result, expression)
+        return result
+
+    name = request.get("op")
+    if name == "history":
+        limit = request.get("limit")
+        entries = list(calc.history.recent)
+        if isinstance(limit, int) and limit >= 0:
+            entries = entries[len(entries) - limit:] if limit else []
+        return [str(entry) for entry in entries]
+
+    operation = OPERATIONS.get(name) if isinstance(name, str) else None
+    if operation is None or operation.name == "expression":
+        raise RequestError(f"Unknown operation {name!r}")
+    args = request.get("args", [])
+    if not isinstance(args, list):
+        raise RequestError("args must be a list")
+    operands = parse_operands(operation, [_token(arg) for arg in args], calc.number)
+    result = await guard.calculate_async(operation.name, *operands, precision=calc.precision)
+    calc.add_history(operation.name, history_operands(operation, operands), result)
+    if isinstance(result, int) and not _fits(result):
+        return operation.display(result, *operands)     # e.g. "≈ 4.22e+16325 (16326 digits)"
+    return result
+
+
+async def respond(calc, line, guard):
+    """One request line -> one response line (bytes)"""
+    request_id = None
+    try:
+        request = json.loads(line)
+        if isinstance(request, dict):
+            request_id = request.get("id")
+        response = {"id": request_id, "result": encode_result(await handle_request(calc, request, guard))}
+    except (RequestError, OperationError, GuardError) as error:
+        response = {"id": request_id, "error": str(error)}
+    except json.JSONDecodeError:
+        response = {"id": None, "error": "Invalid JSON"}
+    except OverflowError:
+        # float ** float reports errno 34 as "(34, 'Numerical result out of range')"
+        response = {"id": request_id, "error": "Numerical result out of range"}
+    except Exception as error:
+        response = {"id": request_id, "error": str(error) or type(error).__name__}
+    return json.dumps(response, separators=(",", ":")).encode() + b"\n"
+
+
+class CalculatorServer:
+    """
+    asyncio server for the line-delimited JSON protocol.
+
+    host, port:        TCP address (ignored when `path` is given)
+    path:              Unix socket path
+    max_connections:   connections served at once; more are refused with an error
+    max_request_bytes: longest request line accepted
+    history_window:    history entries kept per connection
+    shutdown_timeout:  seconds requests in progress get during shutdown
+    guard:             Guard for expensive requests (default: a new one)
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None,
+                 max_connections=DEFAULT_MAX_CONNECTIONS,
+                 max_request_bytes=DEFAULT_MAX_REQUEST_BYTES,
+                 history_window=DEFAULT_HISTORY_WINDOW,
+                 shutdown_timeout=DEFAULT_SHUTDOWN_TIMEOUT, guard=None):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.max_connections = max_connections
+        self.max_request_bytes = max_request_bytes
+        self.history_window = history_window
+        self.shutdown_timeout = shutdown_timeout
+        self.guard = guard or Guard()
+        self._server = None
+        self._connections = {}      # task -> True while waiting for a request
+        self._closing = False
+        self._stopped = None
+
+    @property
+    def address(self):
+        """Address clients connect to (port is resolved when 0 was asked for)"""
+        if self.path:
+            return self.path
+        if self._server is not None and self._server.sockets:
+            return self._server.sockets[0].getsockname()[:2]
+        return self.host, self.port
+
+    async def start(self):
+        self._stopped = asyncio.Event()
+        if self.path:
+            self._server = await asyncio.start_unix_server(
+                self._serve, self.path, limit=self.max_request_bytes, backlog=BACKLOG)
+        else:
+            self._server = await asyncio.start_server(
+                self._serve, self.host, self.port, limit=self.max_request_bytes, backlog=BACKLOG)
+
+    async def serve_forever(self):
+        """Serves until shutdown() is called (or SIGINT/SIGTERM arrives)"""
+        if self._server is None:
+            await self.start()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, lambda: asyncio.ensure_future(self.shutdown()))
+            except (NotImplementedError, RuntimeError):
+                pass    # not available on this platform / thread
+        await self._stopped.wait()
+
+    async def shutdown(self):
+        """Stops accepting connections, lets requests in progress finish, closes the rest"""
+        if self._closing:
+            return
+        self._closing = True
+        self._server.close()
+        for task, idle in list(self._connections.items()):
+            if idle:
+                task.cancel()
+        if self._connections:
+            _, pending = await asyncio.wait(list(self._connections), timeout=self.shutdown_timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+        await self._server.wait_closed()
+        self.guard.close()
+        self._stopped.set()
+
+    # CONNECTIONS
+    async def _serve(self, reader, writer):
+        task = asyncio.current_task()
+        if self._closing or len(self._connections) >= self.max_connections:
+            writer.write(b'{"id":null,"error":"Server busy"}\n')
+            await self._close(writer)
+            return
+
+        self._connections[task] = True
+        calc = ScientificCalculator(history_window=self.history_window)
+        try:
+            while not self._closing:
+                self._connections[task] = True
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    writer.write(b'{"id":null,"error":"Request too long"}\n')
+                    break
+                if not line:
+                    break
+                self._connections[task] = False
+                if line.strip():
+                    writer.write(await respond(calc, line, self.guard))
+                    # Pipelined requests already buffered are answered before
+                    # waiting for the socket; drain() only blocks above the
+                    # transport's high-water mark
+                    await writer.drain()
+        except (asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            del self._connections[task]
+            await self._close(writer)
+
+    async def _close(self, writer):
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+
+
+# COMMAND LINE ENTRY POINT
+def build_parser():
+    parser = argparse.ArgumentParser(description="Serve calculator operations over a local socket")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"TCP host (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help=f"TCP port (default: {DEFAULT_PORT})")
+    parser.add_argument("--unix", metavar="PATH", help="serve on a Unix socket instead of TCP")
+    parser.add_argument("--max-connections", type=int, default=DEFAULT_MAX_CONNECTIONS, metavar="N",
+                        help=f"connections served at once (default: {DEFAULT_MAX_CONNECTIONS})")
+    parser.add_argument("--max-request-bytes", type=int, default=DEFAULT_MAX_REQUEST_BYTES,
+                        metavar="N", help=f"longest request line (default: {DEFAULT_MAX_REQUEST_BYTES})")
+    parser.add_argument("--shutdown-timeout", type=float, default=DEFAULT_SHUTDOWN_TIMEOUT,
+                        metavar="SECONDS",
+                        help=f"time to finish requests on shutdown (default: {DEFAULT_SHUTDOWN_TIMEOUT})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, metavar="N",
+                        help=f"processes for expensive requests (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, metavar="SECONDS",
+                        help=f"deadline of an expensive request (default: {DEFAULT_TIMEOUT})")
+    parser.add_argument("--memory-limit", type=int, default=DEFAULT_MEMORY_LIMIT >> 20, metavar="MIB",
+                        help=f"memory per worker process (default: {DEFAULT_MEMORY_LIMIT >> 20})")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    guard = Guard(args.workers, args.timeout, memory_limit=args.memory_limit << 20)
+    server = CalculatorServer(args.host, args.port, args.unix, args.max_connections,
+                              args.max_request_bytes, shutdown_timeout=args.shutdown_timeout,
+                              guard=guard)
+
+    async def run():
+        await server.start()
+        print(f"Serving on {server.address}", file=sys.stderr)
+        await server.serve_forever()
+
+    asyncio.run(run())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,473 @@
+"""
+Numerical Solvers for the Scientific Calculator
+
+Root finding, integration and differentiation of an expression in one
+variable, all working on the compiled expression (parsed once):
+
+    solve("x ** 2 - 2", guess=1)                ->  1.414213562373095
+    solve("cos(x) - x", bracket=(0, 1))         ->  0.7390851332151559
+    integrate("exp(-x ** 2)", 0, math.inf)      ->  IntegralResult(0.8862269254527579, ...)
+    differentiate("x ** 3 * sin(x)", at=2)      ->  7.582394429531041
+    solve("x ** 2 - a", a=9, guess=1)           ->  3.0 (other variables fixed)
+
+- Derivatives are exact to rounding: the expression tree is compiled a
+  second time into closures that carry (value, derivative) pairs
+  (forward-mode automatic differentiation), with no finite differences.
+- solve() takes Newton steps with that derivative from the guess, which
+  converges in a handful of evaluations near a simple root. With a
+  bracket, or when Newton does not converge, it uses Brent's method,
+  which always converges on a sign change; a bracket around the guess
+  is searched for by sampling outward on a geometric grid.
+- integrate() uses adaptive Gauss-Kronrod (7-point Gauss, 15-point
+  Kronrod) quadrature. Every round splits all intervals whose error is
+  above their share of the tolerance and samples the new intervals in
+  one batch, which runs as NumPy array operations when NumPy is
+  installed (see vectorized.py). Infinite limits are mapped onto finite
+  ones.
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import math
+from collections import namedtuple
+
+from expression import (BinOp, Call, CONSTANTS, ExpressionError, Name, Number,
+                        UnaryOp, cached_expression)
+
+# value:       the integral
+# error:       estimated absolute error
+# evaluations: integrand evaluations used
+IntegralResult = namedtuple("IntegralResult", "value error evaluations")
+
+DEFAULT_TOLERANCE = 1e-12       # relative, for roots
+INTEGRAL_TOLERANCE = 1e-10      # relative, for integrals
+NEWTON_ITERATIONS = 50
+BRENT_ITERATIONS = 200
+MAX_INTERVALS = 2000
+ABSOLUTE_TOLERANCE = 1e-15      # for integrals that are (close to) zero
+BRACKET_STEPS = 64              # grid points on each side of the guess
+
+# Gauss-Kronrod 7-15 nodes on [-1, 1] (non-negative half) and weights
+KRONROD_NODES = (
+    0.991455371120812639206854697526329,
+    0.949107912342758524526189684047851,
+    0.864864423359769072789712788640926,
+    0.741531185599394439863864773280788,
+    0.586087235467691130294144845693013,
+    0.405845151377397166906606412076961,
+    0.207784955007898467600689403773245,
+    0.000000000000000000000000000000000,
+)
+KRONROD_WEIGHTS = (
+    0.022935322010529224963732008058970,
+    0.063092092629978553290700663189204,
+    0.104790010322250183839876322541518,
+    0.140653259715525918745189590510238,
+    0.169004726639267902826583426598550,
+    0.190350578064785409913256402421014,
+    0.204432940075298892414161999234649,
+    0.209482141084727828012999174891714,
+)
+# Gauss weights of the nodes with odd index above (1, 3, 5, 7)
+GAUSS_WEIGHTS = (
+    0.129484966168869693270611432679082,
+    0.279705391489276667901467771423780,
+    0.381830050505118944950369775488975,
+    0.417959183673469387755102040816327,
+)
+
+# The 15 nodes from left to right: node indices, offsets (in half-widths) and weights
+_ORDER = tuple(range(8)) + tuple(range(6, -1, -1))
+_OFFSETS = tuple(-KRONROD_NODES[i] for i in range(8)) + tuple(KRONROD_NODES[i] for i in range(6, -1, -1))
+_KRONROD = tuple(KRONROD_WEIGHTS[i] for i in _ORDER)
+_GAUSS = tuple(GAUSS_WEIGHTS[i // 2] if i % 2 else 0.0 for i in _ORDER)
+
+
+class SolverError(ArithmeticError):
+    """Raised when a root or integral cannot be found"""
+
+
+# AUTOMATIC DIFFERENTIATION
+def _derivative_of_call(name, args):
+    """(value, derivative) closure for a function call; args are (value, derivative) closures"""
+    if name in ("pow", "log") and len(args) == 2:
+        if name == "pow":
+            return _power(*args)
+        value, base = args
+
+        def log_base(env):
+            (x, dx), (b, db) = value(env), base(env)
+            lb = math.log(b)
+            return math.log(x) / lb, (dx / x - math.log(x) * db / b / lb) / lb
+        return log_base
+
+    if len(args) != 1:
+        raise ExpressionError(f"{name}() takes one argument")
+    arg = args[0]
+    rules = {
+        "sqrt": lambda x: (math.sqrt(x), 0.5 / math.sqrt(x)),
+        "log": lambda x: (math.log(x), 1 / x),
+        "log10": lambda x: (math.log10(x), 1 / (x * math.log(10))),
+        "sin": lambda x: (math.sin(x), math.cos(x)),
+        "cos": lambda x: (math.cos(x), -math.sin(x)),
+        "tan": lambda x: (math.tan(x), 1 + math.tan(x) ** 2),
+        "exp": lambda x: (math.exp(x), math.exp(x)),
+        "abs": lambda x: (abs(x), math.copysign(1.0, x)),
+    }
+    if name not in rules:
+        raise ExpressionError(f"Cannot differentiate {name}()")
+    rule = rules[name]
+
+    def call(env):
+        x, dx = arg(env)
+        value, slope = rule(x)
+        return value, slope * dx
+    return call
+
+
+def _power(left, right):
+    def power(env):
+        (x, dx), (y, dy) = left(env), right(env)
+        value = x ** y
+        if dy == 0:
+            return value, (y * x ** (y - 1) * dx if dx else 0.0)
+        return value, value * (dy * math.log(x) + (y * dx / x if dx else 0.0))
+    return power
+
+
+# op -> (x, dx, y, dy) -> (value, derivative)
+_BINARY_RULES = {
+    "+": lambda x, dx, y, dy: (x + y, dx + dy),
+    "-": lambda x, dx, y, dy: (x - y, dx - dy),
+    "*": lambda x, dx, y, dy: (x * y, dx * y + x * dy),
+    "/": lambda x, dx, y, dy: (x / y, (dx * y - x * dy) / (y * y)),
+    "//": lambda x, dx, y, dy: (x // y, 0.0),
+    "%": lambda x, dx, y, dy: (x % y, dx - (x // y) * dy),
+}
+
+
+def _compile_derivative(node, slots, target):
+    """Compiles a tree into a function of env returning (value, d value / d target)"""
+    if isinstance(node, Number):
+        value = float(node.value)
+        return lambda env: (value, 0.0)
+
+    if isinstance(node, Name):
+        if node.id in CONSTANTS:
+            value = CONSTANTS[node.id]
+            return lambda env: (value, 0.0)
+        slot = slots[node.id]
+        if node.id == target:
+            return lambda env: (env[slot], 1.0)
+        return lambda env: (env[slot], 0.0)
+
+    if isinstance(node, UnaryOp):
+        operand = _compile_derivative(node.operand, slots, target)
+        if node.op == "-":
+            def negate(env):
+                value, slope = operand(env)
+                return -value, -slope
+            return negate
+        return operand
+
+    if isinstance(node, BinOp):
+        left = _compile_derivative(node.left, slots, target)
+        right = _compile_derivative(node.right, slots, target)
+        op = node.op
+        if op == "**":
+            return _power(left, right)
+
+        rule = _BINARY_RULES[op]
+
+        def binary(env):
+            (x, dx), (y, dy) = left(env), right(env)
+            return rule(x, dx, y, dy)
+        return binary
+
+    if isinstance(node, Call):
+        args = [_compile_derivative(arg, slots, target) for arg in node.args]
+        return _derivative_of_call(node.func, args)
+
+    raise ExpressionError(f"Cannot differentiate node {node!r}")
+
+
+# PREPARING A FUNCTION OF ONE VARIABLE
+class _Function:
+    """An expression as a function of one variable, the others fixed"""
+
+    def __init__(self, expression, variable, values):
+        self.compiled = compiled = cached_expression(expression)
+        free = [name for name in compiled.variables if name not in values]
+        if variable is None:
+            if len(free) > 1:
+                raise ExpressionError(f"Say which variable to use: {', '.join(free)}")
+            variable = free[0] if free else "x"
+        elif variable in values:
+            raise ExpressionError(f"{variable!r} cannot be both the variable and fixed")
+        missing = [name for name in free if name != variable]
+        if missing:
+            raise ExpressionError(f"Missing value for variable(s) {', '.join(missing)}")
+
+        self.variable = variable
+        self.index = compiled.variables.index(variable) if variable in compiled.variables else None
+        self.env = [float(values.get(name, 0.0)) for name in compiled.variables]
+        self.evaluations = 0
+        self._derivative = None
+        self._vectorized = False
+
+    def __call__(self, x):
+        self.evaluations += 1
+        if self.index is not None:
+            self.env[self.index] = x
+        return float(self.compiled.evaluate(self.env))
+
+    def with_derivative(self, x):
+        """(f(x), f'(x))"""
+        if self._derivative is None:
+            slots = {name: i for i, name in enumerate(self.compiled.variables)}
+            self._derivative = _compile_derivative(self.compiled.tree, slots, self.variable)
+        self.evaluations += 1
+        if self.index is not None:
+            self.env[self.index] = x
+        value, slope = self._derivative(self.env)
+        return float(value), float(slope)
+
+    def sample(self, xs):
+        """f at every point of xs, NaN where it is undefined (one NumPy pass if available)"""
+        self.evaluations += len(xs)
+        if self._vectorized is False:
+            self._vectorized = self._compile_numpy()
+        if self._vectorized is not None:
+            np, func = self._vectorized
+            columns = [np.float64(value) for value in self.env]
+            if self.index is not None:
+                columns[self.index] = np.asarray(xs, dtype=np.float64)
+            with np.errstate(all="ignore"):
+                values = np.broadcast_to(func(tuple(columns)), (len(xs),))
+            return [value if math.isfinite(value) else math.nan for value in values.tolist()]
+
+        evaluate, env, index = self.compiled.evaluate, self.env, self.index
+        values = []
+        for x in xs:
+            if index is not None:
+                env[index] = x
+            try:
+                value = float(evaluate(env))
+            except (ArithmeticError, ValueError, TypeError):
+                value = math.nan
+            values.append(value if math.isfinite(value) else math.nan)
+        return values
+
+    def _compile_numpy(self):
+        from vectorized import compile_numpy, load_numpy
+        np = load_numpy()
+        if np is None:
+            return None
+        return np, compile_numpy(self.compiled.tree, self.compiled.variables, np)
+
+
+# DIFFERENTIATION
+def differentiate(expression, at, variable=None, **values):
+    """Derivative of the expression at a point (automatic differentiation)"""
+    function = _Function(expression, variable, values)
+    try:
+        return function.with_derivative(float(at))[1]
+    except ExpressionError:
+        raise
+    except (ArithmeticError, ValueError, TypeError) as error:
+        raise SolverError(f"Derivative undefined at {at}: {str(error) or type(error).__name__}") from None
+
+
+# ROOT FINDING
+def solve(expression, guess=None, bracket=None, variable=None, tolerance=DEFAULT_TOLERANCE, **values):
+    """
+    A value of the variable where the expression is zero.
+
+    bracket = (a, b) with a sign change between them always succeeds
+    (Brent's method); otherwise Newton's method starts at guess
+    (default 0) and falls back to a bracket search around it.
+    """
+    function = _Function(expression, variable, values)
+    if function.index is None:
+        raise SolverError(f"The expression does not depend on {function.variable}")
+
+    if bracket is not None:
+        a, b = map(float, bracket)
+        return brent(function, a, b, tolerance)
+
+    x0 = 0.0 if guess is None else float(guess)
+    root = newton(function, x0, tolerance)
+    if root is not None:
+        return root
+    a, b = find_bracket(function, x0)
+    return brent(function, a, b, tolerance)
+
+
+def newton(function, x, tolerance=DEFAULT_TOLERANCE):
+    """Newton's method from x; None if it does not converge"""
+    for _ in range(NEWTON_ITERATIONS):
+        try:
+            value, slope = function.with_derivative(x)
+        except ExpressionError:
+            raise
+        except (ArithmeticError, ValueError, TypeError):
+            return None
+        if value == 0:
+            return x
+        if not slope or not math.isfinite(slope) or not math.isfinite(value):
+            return None
+        step = value / slope
+        x -= step
+        if not math.isfinite(x):
+            return None
+        if abs(step) <= tolerance * max(1.0, abs(x)):
+            return x
+    return None
+
+
+def find_bracket(function, x0):
+    """Nearest (a, b) around x0 with a sign change, sampled on a geometric grid"""
+    scale = max(abs(x0), 1.0) * 1e-3
+    offsets = [scale * 2.0 ** k for k in range(BRACKET_STEPS)]
+    points = [x0 - offset for offset in reversed(offsets)] + [x0] + [x0 + offset for offset in offsets]
+    values = function.sample(points)
+
+    # Adjacent pairs, nearest to x0 first
+    centre = BRACKET_STEPS
+    for distance in range(BRACKET_STEPS):
+        for i in (centre + distance, centre - distance - 1):
+            fa, fb = values[i], values[i + 1]
+            if fa == fa and fb == fb and (fa <= 0 <= fb or fb <= 0 <= fa):
+                return points[i], points[i + 1]
+    raise SolverError(f"No sign change found around {x0}; try another guess or a bracket")
+
+
+def brent(function, a, b, tolerance=DEFAULT_TOLERANCE):
+    """Brent's method on [a, b]; f(a) and f(b) must differ in sign"""
+    fa, fb = function(a), function(b)
+    if fa == 0:
+        return a
+    if fb == 0:
+        return b
+    if (fa > 0) == (fb > 0):
+        raise SolverError(f"f({a}) and f({b}) have the same sign")
+
+    c, fc = a, fa
+    d = e = b - a
+    for _ in range(BRENT_ITERATIONS):
+        if (fb > 0) == (fc > 0):
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+        limit = 2 * 2.2e-16 * abs(b) + 0.5 * tolerance * max(abs(b), 1e-300)
+        middle = 0.5 * (c - b)
+        if abs(middle) <= limit or fb == 0:
+            return b
+        if abs(e) >= limit and abs(fa) > abs(fb):
+            # Inverse quadratic interpolation (secant when a == c)
+            s = fb / fa
+            if a == c:
+                p, q = 2 * middle * s, 1 - s
+            else:
+                q, r = fa / fc, fb / fc
+                p = s * (2 * middle * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2 * p < min(3 * middle * q - abs(limit * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = middle     # bisection
+        else:
+            d = e = middle
+        a, fa = b, fb
+        b += d if abs(d) > limit else math.copysign(limit, middle)
+        fb = function(b)
+    raise SolverError("Brent's method did not converge")
+
+
+# INTEGRATION
+def _mapping(a, b):
+    """(t interval, x(t), dx/dt) turning [a, b] into a finite interval"""
+    if math.isinf(a) and math.isinf(b):
+        if a == b:
+            raise SolverError("Integration limits must differ")
+        sign = 1.0 if a < b else -1.0
+        return (-1.0, 1.0), lambda t: t / (1 - t * t), lambda t: sign * (1 + t * t) / (1 - t * t) ** 2
+    if math.isinf(b):
+        sign = 1.0 if b > 0 else -1.0
+        return (0.0, 1.0), lambda t: a + sign * t / (1 - t), lambda t: sign / (1 - t) ** 2
+    if math.isinf(a):
+        sign = 1.0 if a < 0 else -1.0
+        return (0.0, 1.0), lambda t: b - sign * (1 - t) / t, lambda t: sign / (t * t)
+    return (a, b), None, None
+
+
+def integrate(expression, a, b, variable=None, tolerance=INTEGRAL_TOLERANCE, **values):
+    """
+    Integral of the expression from a to b (either may be +-inf).
+    Returns an IntegralResult; raises SolverError when the integrand is
+    undefined somewhere or the tolerance cannot be reached.
+    """
+    function = _Function(expression, variable, values)
+    a, b = float(a), float(b)
+    if a == b:
+        return IntegralResult(0.0, 0.0, 0)
+    (lo, hi), to_x, dx_dt = _mapping(a, b)
+
+    def sample(intervals):
+        """Gauss and Kronrod estimates for every (start, end) interval, one batch"""
+        points = []
+        for start, end in intervals:
+            centre, half = 0.5 * (start + end), 0.5 * (end - start)
+            points += [centre + half * offset for offset in _OFFSETS]
+        if to_x is None:
+            values = function.sample(points)
+        else:
+            values = [y * dx_dt(t) for y, t in zip(function.sample([to_x(t) for t in points]), points)]
+        results = []
+        for n, (start, end) in enumerate(intervals):
+            chunk = values[15 * n:15 * n + 15]
+            for value, t in zip(chunk, points[15 * n:]):
+                if value != value:
+                    x = t if to_x is None else to_x(t)
+                    raise SolverError(f"Integrand is undefined or infinite near {x:.6g}")
+            half = 0.5 * (end - start)
+            kronrod = half * math.fsum(w * y for w, y in zip(_KRONROD, chunk))
+            gauss = half * math.fsum(w * y for w, y in zip(_GAUSS, chunk))
+            results.append((start, end, kronrod, abs(kronrod - gauss)))
+        return results
+
+    width = hi - lo
+    done = []
+    active = sample([(lo, hi)])
+    while True:
+        pieces = done + active
+        total = math.fsum(piece[2] for piece in pieces)
+        error = math.fsum(piece[3] for piece in pieces)
+        goal = max(tolerance * abs(total), ABSOLUTE_TOLERANCE)
+        if error <= goal:
+            return IntegralResult(total, error, function.evaluations)
+        if len(pieces) >= MAX_INTERVALS:
+            raise SolverError(f"Integral did not converge (estimated error {error:.3g})")
+
+        # Split every interval above its share of the error goal, in one batch
+        split = []
+        for piece in active:
+            start, end, _, piece_error = piece
+            if piece_error > goal * (end - start) / width:
+                middle = 0.5 * (start + end)
+                split += [(start, middle), (middle, end)]
+            else:
+                done.append(piece)
+        if not split:
+            # Every interval meets its share but the sum does not: refine the worst
+            done.sort(key=lambda piece: piece[3])
+            start, end = done.pop()[:2]
+            middle = 0.5 * (start + end)
+            split = [(start, middle), (middle, end)]
+        active = sample(split)
@@ -0,0 +1,271 @@
+"""
+Streaming Statistics for the Scientific Calculator
+
+Count, mean, variance, minimum, maximum and approximate quantiles of any
+number of operands in one pass and in fixed memory:
+
+    stats = RunningStats().add([2.0, 4.0, 4.0, 5.0])
+    stats.mean, stats.variance()        ->  3.75, 1.5833333333333333
+    stats.quantile(0.5)                 ->  4.0 (within 1%)
+
+Every state is mergeable: statistics of separate chunks combine into
+exactly the statistics of the whole, in any order. summarize() uses
+this to split a large input over worker processes:
+
+    with ParallelEvaluator(workers=8, chunk_size=65536) as pool:
+        summarize("data.txt", pool).summary()
+
+- Mean and variance follow Welford's method in the pairwise form of
+  Chan et al.: each chunk's mean and sum of squared deviations are
+  computed with math.fsum and merged into the running state, which is
+  as stable as updating one value at a time but runs at C speed.
+- Quantiles come from a QuantileSketch, a logarithmic histogram in the
+  style of DDSketch: every bucket covers values within a fixed relative
+  accuracy (1% by default), so quantiles are accurate to that relative
+  error for any distribution, and merging is adding bucket counts.
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import math
+from collections import Counter
+from itertools import chain, repeat
+from operator import mul
+
+from reductions import iter_chunks
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+DEFAULT_MAX_BUCKETS = 2048      # per sign; ~1e17 dynamic range at 1% accuracy
+SUMMARY_QUANTILES = (0.25, 0.5, 0.75, 0.9, 0.99)
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with relative accuracy.
+
+    A positive value x is counted in bucket ceil(log(x) / log(gamma)),
+    gamma = (1 + accuracy) / (1 - accuracy); negative values likewise by
+    magnitude. When a sign has more than max_buckets buckets, the ones
+    closest to zero are folded together, so memory stays fixed and only
+    the smallest magnitudes lose accuracy.
+    """
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY, max_buckets=DEFAULT_MAX_BUCKETS):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}      # bucket -> count
+        self.negative = {}      # bucket of |x| -> count
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, values):
+        """Counts a chunk of finite floats; raises ValueError for inf or NaN"""
+        if not all(map(math.isfinite, values)):
+            value = next(value for value in values if not math.isfinite(value))
+            raise ValueError(f"Statistics need finite values, got {value!r}")
+        positives = [value for value in values if value > 0]
+        negatives = [-value for value in values if value < 0]
+        scale = repeat(1 / self.log_gamma)
+        for store, magnitudes in ((self.positive, positives), (self.negative, negatives)):
+            # Bucket keys and their counts in C-level maps instead of a Python loop
+            counts = Counter(map(math.ceil, map(mul, map(math.log, magnitudes), scale)))
+            for key, count in counts.items():
+                store[key] = store.get(key, 0) + count
+        self.zeros += len(values) - len(positives) - len(negatives)
+        self.count += len(values)
+        self._collapse()
+        return self
+
+    def merge(self, other):
+        """Adds the counts of another sketch with the same accuracy"""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        self._collapse()
+        return self
+
+    def _collapse(self):
+        for store in (self.positive, self.negative):
+            excess = len(store) - self.max_buckets
+            if excess > 0:
+                keys = sorted(store)
+                folded = sum(store.pop(key) for key in keys[:excess])
+                store[keys[excess]] += folded
+
+    def _value(self, key):
+        # Midpoint of the bucket in relative terms
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        """Value at rank q (0 <= q <= 1), or NaN for an empty sketch"""
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must be between 0 and 1")
+        if not self.count:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive))
+
+
+class RunningStats:
+    """
+    Count, mean, variance, minimum, maximum and quantile sketch of a
+    stream of floats, fed one chunk at a time.
+    """
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0               # sum of squared deviations from the mean
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def add(self, values):
+        """Adds a chunk of numbers"""
+        values = [float(value) for value in values]
+        if not values:
+            return self
+        self.sketch.add(values)     # first: rejects inf and NaN before anything changes
+        count = len(values)
+        mean = math.fsum(values) / count
+        deviations = [value - mean for value in values]
+        self._combine(count, mean, math.fsum(map(mul, deviations, deviations)),
+                      min(values), max(values))
+        return self
+
+    def merge(self, other):
+        """Adds the statistics of another stream"""
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.minimum, other.maximum)
+            self.sketch.merge(other.sketch)
+        return self
+
+    def _combine(self, count, mean, m2, minimum, maximum):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.minimum = min(self.minimum, minimum)
+        self.maximum = max(self.maximum, maximum)
+
+    def variance(self, ddof=1):
+        """Sample variance (ddof=1) or population variance (ddof=0)"""
+        if self.count <= ddof:
+            raise ValueError(f"Variance needs at least {ddof + 1} values")
+        return self.m2 / (self.count - ddof)
+
+    def stdev(self, ddof=1):
+        return math.sqrt(self.variance(ddof))
+
+    def quantile(self, q):
+        """Approximate quantile, never outside the observed minimum and maximum"""
+        if not self.count:
+            raise ValueError("Quantile of no values")
+        if q == 0:
+            return self.minimum
+        if q == 1:
+            return self.maximum
+        return min(max(self.sketch.quantile(q), self.minimum), self.maximum)
+
+    def summary(self):
+        """{"count", "mean", "variance", "stdev", "min", "max", "p25", ...}"""
+        result = {"count": self.count}
+        if self.count:
+            result["mean"] = self.mean
+        if self.count > 1:
+            result["variance"] = self.variance()
+            result["stdev"] = self.stdev()
+        if self.count:
+            result["min"] = self.minimum
+            result["max"] = self.maximum
+            for q in SUMMARY_QUANTILES:
+                result[f"p{round(q * 100)}"] = self.quantile(q)
+        return result
+
+
+# WHOLE INPUTS
+def _chunk_stats(chunk):
+    return RunningStats().add(chunk)
+
+
+def summarize(source, pool=None):
+    """
+    RunningStats of every operand in `source` (a path, file or iterable,
+    see reductions.iter_chunks). pool is an optional
+    parallel.ParallelEvaluator; each of its chunks is summarized in a
+    worker process and the partial states are merged here.
+    """
+    chunks = iter_chunks(source)
+    if pool is None:
+        parts = map(_chunk_stats, chunks)
+    else:
+        parts = pool.map_chunks(_chunk_stats, chain.from_iterable(chunks))
+    total = RunningStats()
+    for part in parts:
+        total.merge(part)
+    return total
+
+
+# REGISTRY FUNCTIONS (one list of operands each)
+def mean(values):
+    if not values:
+        raise ValueError("Mean of no values")
+    return RunningStats().add(values).mean
+
+
+def variance(values):
+    return RunningStats().add(values).variance()
+
+
+def stdev(values):
+    return RunningStats().add(values).stdev()
+
+
+# The operands are already in memory here, so median and quantile are
+# exact order statistics; the sketch is only for streamed inputs
+def exact_quantile(values, q):
+    """Quantile of a list, interpolated linearly between order statistics"""
+    if not values:
+        raise ValueError("Quantile of no values")
+    if not 0 <= q <= 1:
+        raise ValueError("Quantile must be between 0 and 1")
+    ordered = sorted(values)
+    rank = q * (len(ordered) - 1)
+    below = math.floor(rank)
+    if below == len(ordered) - 1:
+        return float(ordered[below])
+    fraction = rank - below
+    return float(ordered[below] + fraction * (ordered[below + 1] - ordered[below]))
+
+
+def median(values):
+    return exact_quantile(values, 0.5)
+
+
+def quantile(values):
+    """First operand is q (0-1), the rest are the data"""
+    if not values:
+        raise ValueError("Quantile needs q and at least one value")
+    return exact_quantile(values[1:], values[0])
@@ -0,0 +1,200 @@
+"""
+Sweep Mode for the Scientific Calculator
+
+Tabulates an expression (or a single function such as sin) over a grid
+of x values and streams the (x, f(x)) rows to stdout, a CSV file or a
+binary .npy file:
+
+    python sweep.py sin --start 0 --stop 6.3 --step 0.001
+    python sweep.py "x ** 2 * exp(-x)" --start 0 --stop 10 --num 10000001 -o table.npy
+    python sweep.py cos --start 0 --stop 1 --num 5 -o table.csv
+
+The grid is never built as a whole: x values are generated chunk by
+chunk from their index (start + i * step, so rounding errors do not
+accumulate along the grid), each chunk is evaluated with the vectorized
+batch evaluator (NumPy when installed, see vectorized.py) and written
+out before the next one is made. Memory stays at one chunk however many
+points the grid has.
+
+In text output (stdout and CSV) f(x) is rounded to 6 decimals like
+every other calculator result and x is shown to 15 significant digits;
+.npy output keeps full float64 values in an (n, 2) array that
+numpy.load() reads directly. Points where f is undefined are written
+as nan.
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import argparse
+import math
+import sys
+from array import array
+
+from columnar import npy_header
+from expression import FUNCTIONS
+from vectorized import DEFAULT_CHUNK_SIZE, evaluate_batch, load_numpy
+
+OUTPUT_BUFFER_SIZE = 1 << 16
+MAX_POINTS = 1 << 40
+
+
+class Grid:
+    """count evenly spaced points start, start + step, ..."""
+
+    def __init__(self, start, step, count):
+        if count < 0 or count > MAX_POINTS:
+            raise ValueError(f"A grid needs between 0 and {MAX_POINTS} points")
+        self.start = float(start)
+        self.step = float(step)
+        self.count = int(count)
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return f"Grid(start={self.start!r}, step={self.step!r}, count={self.count})"
+
+    def chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Yields the x values chunk by chunk (float64 ndarray or array('d'))"""
+        np = load_numpy()
+        start, step = self.start, self.step
+        for first in range(0, self.count, chunk_size):
+            last = min(first + chunk_size, self.count)
+            if np is not None:
+                yield start + step * np.arange(first, last, dtype=np.float64)
+            else:
+                yield array("d", [start + step * i for i in range(first, last)])
+
+
+def arange(start, stop, step):
+    """Grid from start up to (not including) stop"""
+    if step == 0 or not all(map(math.isfinite, (start, stop, step))):
+        raise ValueError("start, stop and step must be finite and step non-zero")
+    # Tolerate rounding in (stop - start) / step, e.g. 0 to 0.3 by 0.1
+    count = max(math.ceil((stop - start) / step - 1e-9), 0)
+    return Grid(start, step, count)
+
+
+def linspace(start, stop, num):
+    """Grid of num points from start to stop, both included"""
+    if num < 1 or not math.isfinite(start) or not math.isfinite(stop):
+        raise ValueError("start and stop must be finite and num >= 1")
+    step = (stop - start) / (num - 1) if num > 1 else 0.0
+    return Grid(start, step, num)
+
+
+def function_source(text, variable="x"):
+    """A bare function name (sin, exp, ...) becomes a call on the variable"""
+    text = text.strip()
+    return f"{text}({variable})" if text in FUNCTIONS else text
+
+
+# EVALUATION
+def sweep(expression, grid, variable="x", chunk_size=DEFAULT_CHUNK_SIZE, approximate=False):
+    """Yields (x values, BatchResult) for every chunk of the grid"""
+    expression = function_source(expression, variable)
+    for xs in grid.chunks(chunk_size):
+        yield xs, evaluate_batch(expression, {variable: xs}, chunk_size, approximate)
+
+
+# WRITERS
+def write_text(chunks, output, separator="\t", header=None):
+    """Writes one "x<separator>f(x)" line per point; returns (points, failed points)"""
+    points = failures = 0
+    if header is not None:
+        output.write(separator.join(header) + "\n")
+    for xs, result in chunks:
+        # x to 15 significant digits hides the grid's rounding (0.30000000000000004)
+        output.write("".join(f"{x:.15g}{separator}{round(y, 6) if y == y else y!r}\n"
+                             for x, y in zip(xs.tolist(), result.values.tolist())))
+        points += len(xs)
+        failures += sum(result.errors)
+    return points, failures
+
+
+def write_npy(chunks, output, rows):
+    """Writes an (x, f(x)) .npy array of `rows` rows to a binary stream"""
+    np = load_numpy()
+    points = failures = 0
+    output.write(npy_header((rows, 2)))
+    for xs, result in chunks:
+        if np is not None:
+            table = np.empty((len(xs), 2), dtype="<f8")
+            table[:, 0] = xs
+            table[:, 1] = result.values
+            output.write(table.tobytes())
+        else:
+            table = array("d", bytes(16 * len(xs)))
+            table[0::2] = array("d", xs)
+            table[1::2] = result.values
+            if sys.byteorder != "little":
+                table.byteswap()
+            output.write(table.tobytes())
+        points += len(xs)
+        failures += sum(result.errors)
+    if points != rows:
+        raise ValueError(f"Wrote {points} rows into a .npy header for {rows}")
+    return points, failures
+
+
+def run_sweep(expression, grid, output="-", variable="x", chunk_size=DEFAULT_CHUNK_SIZE,
+              approximate=False):
+    """
+    Tabulates `expression` over `grid` into `output`: "-" (stdout), a
+    .csv path, a .npy path or any other path (tab-separated text).
+    Returns (points, failed points).
+    """
+    chunks = sweep(expression, grid, variable, chunk_size, approximate)
+    if output == "-":
+        return write_text(chunks, sys.stdout)
+    if output.endswith(".npy"):
+        with open(output, "wb", buffering=OUTPUT_BUFFER_SIZE) as stream:
+            return write_npy(chunks, stream, len(grid))
+    with open(output, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE, newline="") as stream:
+        if output.endswith(".csv"):
+            return write_text(chunks, stream, ",", (variable, function_source(expression, variable)))
+        return write_text(chunks, stream)
+
+
+# COMMAND LINE ENTRY POINT
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Tabulate an expression over a grid of x values")
+    parser.add_argument("expression", help='expression in x, or a function name such as "sin"')
+    parser.add_argument("--start", type=float, required=True)
+    parser.add_argument("--stop", type=float, required=True)
+    grid = parser.add_mutually_exclusive_group(required=True)
+    grid.add_argument("--step", type=float, help="spacing; stop is not included")
+    grid.add_argument("--num", type=int, help="number of points; stop is included")
+    parser.add_argument("--var", default="x", help="name of the variable (default: x)")
+    parser.add_argument("--output", "-o", default="-", metavar="FILE",
+                        help="stdout (-), FILE.csv, FILE.npy or a tab-separated text file")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, metavar="N",
+                        help=f"points evaluated at a time (default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("--approximate", action="store_true",
+                        help="table-based sin/cos/tan/exp/log (see approx.py)")
+    return parser
+
+
+def main(argv=None):
+    """Runs a sweep; returns 0, or 1 if some points were undefined or the input was invalid"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        if args.step is not None:
+            grid = arange(args.start, args.stop, args.step)
+        else:
+            grid = linspace(args.start, args.stop, args.num)
+        points, failures = run_sweep(args.expression, grid, args.output, args.var,
+                                     args.chunk_size, args.approximate)
+    except (ValueError, ArithmeticError) as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+    if failures:
+        print(f"{failures} of {points} points undefined (written as nan)", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
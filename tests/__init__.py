@@ -0,0 +1,6 @@
+"""
+Tests for the Scientific Calculator (run with: python -m pytest)
+
+Author: Vishwa Desai
+License: MIT
+"""
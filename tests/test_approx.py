@@ -0,0 +1,38 @@
+"""
+Tests for approx.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import math
+import sys
+
+import pytest
+
+from approx import SCALAR, approximate
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setitem(sys.modules, "numpy", None)
+    return request.param
+
+
+def test_domain_errors_are_flagged_not_raised(backend):
+    result = approximate("log", [1.0, 0.0, -1.0])
+    assert list(result.values)[0] == 0.0
+    assert all(math.isnan(value) for value in list(result.values)[1:])
+    assert [bool(error) for error in result.errors] == [False, True, True]
+    result = approximate("exp", [1000.0, 0.0])
+    assert [bool(error) for error in result.errors] == [True, False]
+
+
+@pytest.mark.parametrize("name", sorted(SCALAR))
+def test_scalar_approximations_are_close(name):
+    exact = getattr(math, name)
+    for x in (0.1, 0.5, 1.3, 2.0, 7.5):
+        assert SCALAR[name](x) == pytest.approx(exact(x), rel=1e-10, abs=1e-10)
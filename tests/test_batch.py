@@ -0,0 +1,60 @@
+"""
+Tests for batch.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import io
+
+from batch import run_batch
+
+
+def run(text, **options):
+    output = io.StringIO()
+    failures = run_batch(io.StringIO(text), output, **options)
+    return output.getvalue().splitlines(), failures
+
+
+def test_lines_map_to_results():
+    lines, failures = run("1 + 1\n# comment\n\nsqrt(-1)\n")
+    assert lines == ["2", "error: math domain error"]
+    assert failures == 1
+
+
+def test_huge_result_is_refused_without_stalling():
+    lines, failures = run("9**9**9**9\n2 * 3\n")
+    assert lines[0].startswith("error: Result would have")
+    assert lines[1] == "6"
+    assert failures == 1
+
+
+def test_slow_line_is_killed_after_the_timeout():
+    lines, failures = run("factorial(3 * 10**6 + 0 * sin(1)) % 7\n1 + 2\n", timeout=0.2)
+    assert lines == ["error: Exceeded the time limit", "3"]
+
+
+def test_operation_lines_are_guarded():
+    lines, failures = run("5\n100000000000\n", operation="factorial")
+    assert lines[0] == "120"
+    assert lines[1].startswith("error: Result would have")
+
+
+def test_binary_columns_through_an_operation(tmp_path):
+    from array import array
+    from batch import main
+    from columnar import ColumnReader, npy_header
+    source, target = tmp_path / "ab.npy", tmp_path / "out.npy"
+    source.write_bytes(npy_header((3, 2)) + array("d", [2, 10, 1, 0, 9, 0.5]).tobytes())
+    assert main(["--batch", str(source), "--op", "power", "-o", str(target)]) == 0
+    with ColumnReader(str(target), "npy") as reader:
+        assert [list(chunk) for chunk in reader.chunks()] == [[1024.0, 1.0, 3.0]]
+
+
+def test_binary_expression_to_text(tmp_path, capsys):
+    from array import array
+    from batch import main
+    source = tmp_path / "xy.f64"
+    source.write_bytes(array("d", [1, 2, 0, 3]).tobytes())
+    assert main(["--batch", str(source), "--expr", "log(x) * y", "--vars", "x,y"]) == 1
+    assert capsys.readouterr().out.splitlines() == ["0.0", "error: undefined"]
@@ -0,0 +1,28 @@
+"""
+Tests for benchmark.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+from benchmark import build_cases, find_regressions, measure
+from calculator_oops import ScientificCalculator
+
+
+def test_every_case_runs_without_input():
+    for name, func in build_cases(ScientificCalculator()):
+        func()
+
+
+def test_measure_reports_every_metric():
+    result = measure(lambda: None, duration=0.01)
+    assert set(result) == {"calls", "ops_per_sec", "p50_us", "p99_us", "peak_kib"}
+    assert result["calls"] > 0 and result["p50_us"] <= result["p99_us"]
+
+
+def test_regressions_past_the_threshold():
+    baseline = {"sqrt": {"ops_per_sec": 1000.0, "p50_us": 1.0}, "gone": {"ops_per_sec": 1.0, "p50_us": 1.0}}
+    assert find_regressions({"sqrt": {"ops_per_sec": 950.0, "p50_us": 1.05}}, baseline, 0.10) == []
+    slower = find_regressions({"sqrt": {"ops_per_sec": 800.0, "p50_us": 1.0}}, baseline, 0.10)
+    assert len(slower) == 1 and slower[0].startswith("sqrt: ops/sec")
+    assert find_regressions({"sqrt": {"ops_per_sec": 1000.0, "p50_us": 1.5}}, baseline, 0.10)
@@ -0,0 +1,38 @@
+"""
+Tests for calc.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import io
+
+from calc import run
+
+
+def run_calc(*argv):
+    out, err = io.StringIO(), io.StringIO()
+    code = run(list(argv), out, err)
+    return code, out.getvalue(), err.getvalue()
+
+
+def test_expression_with_variables():
+    assert run_calc("x ** 2 + y", "x=3", "y=0.5") == (0, "9.5\n", "")
+
+
+def test_operation():
+    assert run_calc("--op", "log10", "1000")[:2] == (0, "3.0\n")
+
+
+def test_failure_goes_to_stderr():
+    code, out, err = run_calc("log(0)")
+    assert (code, out) == (1, "")
+    assert err.startswith("error:")
+
+
+def test_huge_or_slow_calculations_fail_instead_of_hanging():
+    code, out, err = run_calc("9 ** 9 ** 9 ** 9")
+    assert (code, out) == (1, "") and err.startswith("error: Result would have")
+    code, out, err = run_calc("--timeout", "0.2", "factorial(3 * 10**6 + 0 * sin(1)) % 7")
+    assert (code, err) == (1, "error: Exceeded the time limit\n")
+    assert run_calc("--op", "factorial", "100000000000")[0] == 1
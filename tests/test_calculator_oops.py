@@ -0,0 +1,42 @@
+"""
+Tests for calculator_oops.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import builtins
+import os
+import subprocess
+import sys
+
+import calculator
+from calculator_oops import MAIN_MENU, ScientificCalculator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_imports_have_no_side_effects_and_defer_heavy_modules():
+    code = ("import sys, calculator, calculator_oops; "
+            "print(sorted({'numpy', 'decimal', 'expression', 'cells'} & set(sys.modules)))")
+    run = subprocess.run([sys.executable, "-c", code], cwd=ROOT, input="", capture_output=True,
+                         text=True, timeout=60)
+    assert (run.stdout, run.stderr) == ("[]\n", "")
+
+
+def _options(menu):
+    return [line.split(". ", 1) for line in menu.splitlines() if line[:1].isdigit()]
+
+
+def test_main_menu_keeps_the_numbers_of_calculator_py():
+    assert _options(calculator.MAIN_MENU) == _options(MAIN_MENU)[:len(_options(calculator.MAIN_MENU))]
+    assert ["5", "Exit"] in _options(MAIN_MENU)
+
+
+def test_exit_option_leaves_the_main_loop(monkeypatch, capsys):
+    answers = iter(["5"])
+    monkeypatch.setattr(builtins, "input", lambda prompt="": next(answers))
+    calc = ScientificCalculator()
+    monkeypatch.setattr(calc, "clear_screen", lambda: None)
+    calc.run()
+    assert "See you soon again" in capsys.readouterr().out
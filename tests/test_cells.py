@@ -0,0 +1,29 @@
+"""
+Tests for cells.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import pytest
+
+from cells import CellError, Sheet
+
+
+def test_dependents_are_recomputed():
+    sheet = Sheet()
+    sheet["a"] = 1
+    sheet["b"] = "a * 2"
+    sheet["c"] = "b + a"
+    assert sheet["c"] == 3
+    sheet["a"] = 5
+    assert sheet["c"] == 15
+
+
+def test_cycles_are_refused_and_leave_the_sheet_unchanged():
+    sheet = Sheet()
+    sheet["a"] = 1
+    sheet["b"] = "a + 1"
+    with pytest.raises(CellError):
+        sheet["a"] = "b"
+    assert sheet["a"] == 1 and sheet["b"] == 2
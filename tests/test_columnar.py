@@ -0,0 +1,67 @@
+"""
+Tests for columnar.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import io
+from array import array
+
+import pytest
+
+from columnar import ColumnReader, ColumnWriter, detect_format, npy_header, read_npy_header
+
+
+@pytest.mark.parametrize("shape", [(0,), (5,), (3, 2), (10 ** 12, 7)])
+def test_npy_header_round_trip(shape):
+    header = npy_header(shape)
+    assert len(header) % 64 == 0
+    stream = io.BytesIO(header)
+    assert read_npy_header(stream) == shape
+    assert stream.tell() == len(header)
+
+
+def test_npy_header_is_readable_by_numpy(tmp_path):
+    np = pytest.importorskip("numpy")
+    path = tmp_path / "table.npy"
+    path.write_bytes(npy_header((2, 2)) + array("d", [1, 2, 3, 4]).tobytes())
+    assert np.load(path).tolist() == [[1.0, 2.0], [3.0, 4.0]]
+
+
+def test_formats_from_extensions():
+    assert detect_format("a.npy") == "npy"
+    assert detect_format("a.F64") == "f64"
+    assert detect_format("a.txt") == "text"
+    assert detect_format("-") == "text"
+    assert detect_format("a.txt", "f64") == "f64"
+
+
+def test_write_then_read_rows(tmp_path):
+    path = str(tmp_path / "rows.npy")
+    with ColumnWriter(path, "npy", width=2) as writer:      # row count filled in on close
+        writer.write(array("d", [1, 2, 3, 4]))
+        writer.write(array("d", [5, 6]))
+    with ColumnReader(path, "npy") as reader:
+        assert (reader.rows, reader.width) == (3, 2)
+        assert [list(chunk) for chunk in reader.chunks(2)] == [[1, 2, 3, 4], [5, 6]]
+
+
+def test_raw_stream_input():
+    stream = io.BytesIO(array("d", [1.5, 2.5, 3.5]).tobytes())
+    reader = ColumnReader(stream, "f64")
+    assert reader.rows is None
+    assert [list(chunk) for chunk in reader.chunks()] == [[1.5, 2.5, 3.5]]
+
+
+def test_bad_inputs(tmp_path):
+    path = tmp_path / "short.npy"
+    path.write_bytes(npy_header((4,)) + array("d", [1, 2]).tobytes())
+    with pytest.raises(ValueError, match="Truncated"):
+        ColumnReader(str(path), "npy")
+    path = tmp_path / "odd.f64"
+    path.write_bytes(array("d", [1, 2, 3]).tobytes())
+    with pytest.raises(ValueError, match="whole number"):
+        ColumnReader(str(path), "f64", width=2)
+    with pytest.raises(ValueError, match="Not a .npy"):
+        read_npy_header(io.BytesIO(b"not numpy at all"))
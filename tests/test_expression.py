@@ -0,0 +1,68 @@
+"""
+Tests for expression.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import math
+
+import pytest
+
+from expression import (BinOp, ExpressionCache, ExpressionError, Name, Number, compile_expression,
+                        optimize, parse, repeated_subexpressions)
+
+
+def test_constant_subexpressions_are_folded():
+    tree = optimize(parse("sqrt(2) * pi / 4"))
+    assert isinstance(tree, Number)
+    assert tree.value == pytest.approx(math.sqrt(2) * math.pi / 4)
+
+
+def test_failing_or_huge_constants_are_left_for_evaluation():
+    assert isinstance(optimize(parse("log(0)")), type(parse("log(0)")))
+    assert isinstance(optimize(parse("9 ** 9 ** 9")), BinOp)
+
+
+def test_exact_identities_only():
+    assert isinstance(optimize(parse("x * 1")), Name)
+    assert isinstance(optimize(parse("-(-x)")), Name)
+    assert isinstance(optimize(parse("x * 1.0")), BinOp)    # would turn an int x into a float
+    assert isinstance(optimize(parse("x + 2 + 3")), BinOp)
+
+
+def test_common_subexpressions_are_shared_without_changing_results():
+    source = "sin(x) * sin(x) + sin(x) * sin(x) + cos(x)"
+    assert repeated_subexpressions(optimize(parse(source)))
+    f = compile_expression(source)
+    for x in (0.0, 0.3, 2.5):
+        assert f(x=x) == pytest.approx(2 * math.sin(x) ** 2 + math.cos(x))
+
+
+def test_variables_by_name_or_position():
+    f = compile_expression("x ** 2 + sin(y)")
+    assert f(x=2, y=0) == f(2, 0) == 4.0
+    with pytest.raises(ExpressionError):
+        f(x=2)
+
+
+def test_only_arithmetic_and_whitelisted_names_are_accepted():
+    assert compile_expression("23 + 23 - 3 / 2 * 2 + sin(0) + cos(0)")() == 44.0
+    for source in ('__import__("os")', "().__class__", "x.real", "sin(1"):
+        with pytest.raises(ExpressionError):
+            compile_expression(source)
+
+
+def test_calls_are_checked_against_the_registry_arity():
+    assert compile_expression("log(x, 2)")(8) == 3.0
+    for source in ("sin()", "pow(1)", "sqrt(4, 2)", "log(8, 2, 1)"):
+        with pytest.raises(ExpressionError, match="argument"):
+            compile_expression(source)
+
+
+def test_cache_shares_spellings():
+    cache = ExpressionCache(maxsize=2)
+    assert cache.get("2+3*x") is cache.get(" 2 + 3 *x ")
+    cache.get("x")
+    cache.get("y")
+    assert cache.evictions == 1
@@ -0,0 +1,35 @@
+"""
+Tests for factorial.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import math
+
+from factorial import FactorialEngine, factorial_bits, format_approx, format_int
+
+
+def test_exact_values():
+    engine = FactorialEngine()
+    assert engine.compute(0) == 1
+    assert engine.compute(20) == 2432902008176640000
+    assert engine.compute(300) == math.factorial(300)
+
+
+def test_approximation_of_a_large_factorial():
+    approx = FactorialEngine().approximate(1000)
+    assert approx.digits == 2568
+    assert approx.leading.startswith("40238726007709")
+    assert format_approx(approx).startswith("4.0238726007709")
+
+
+def test_bit_estimate_is_an_upper_bound():
+    for n in (1, 10, 1000, 5000):
+        assert factorial_bits(n) >= math.factorial(n).bit_length()
+
+
+def test_integers_too_long_for_str_are_approximated():
+    assert format_int(-12345) == "-12345"
+    assert format_int(math.factorial(5000)) == "≈ 4.22857792660554e+16325"
+    assert format_int(10 ** 5000 - 1) == "≈ 1.00000000000000e+5000"
@@ -0,0 +1,36 @@
+"""
+Tests for guard.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import pytest
+
+from expression import compile_expression, parse
+from guard import Guard, GuardError, compiled_cost, expression_cost
+
+
+def test_expression_cost_estimates():
+    assert expression_cost(parse("2 ** 10")) == pytest.approx(10)
+    assert expression_cost(parse("9 ** 9 ** 9")) > 1e9
+    assert expression_cost(parse("factorial(sin(1) * 10 + 0 * x)")) is None
+
+
+def test_compiled_cost_is_kept_unless_variables_are_given():
+    compiled = compile_expression("x ** 10 + 2 ** 9 ** 9")
+    assert compiled_cost(compiled) == expression_cost(compiled.tree) > 1e8
+    assert compiled.cost == expression_cost(compiled.tree)
+    compiled.cost = 0
+    assert compiled_cost(compiled) == 0
+    assert compiled_cost(compiled, {"x": 2 ** 100}) == expression_cost(compiled.tree, {"x": 2 ** 100})
+
+
+def test_guard_refuses_huge_results_and_runs_cheap_ones_inline():
+    with Guard(workers=1, timeout=5) as guard:
+        assert guard.evaluate("2 ** 10") == 1024
+        assert guard.calculate("sqrt", 16.0) == 4.0
+        with pytest.raises(GuardError):
+            guard.evaluate("9 ** 9 ** 9 ** 9")
+        with pytest.raises(GuardError):
+            guard.calculate("factorial", 10 ** 12)
@@ -0,0 +1,118 @@
+"""
+Tests for history.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import pytest
+
+from history import MAX_OPERANDS, HistoryStore
+
+
+def numbered(store):
+    return [(number, str(record)) for page in store.pages(page_size=2) for number, record in page]
+
+
+# MEMORY-ONLY STORES
+def test_record_text():
+    store = HistoryStore()
+    assert str(store.append("power", [2.0, 10.0], 1024.0)) == "2.0 ** 10.0 = 1024.0"
+    assert str(store.append("factorial", [5.0], 120)) == "factorial(5) = 120"
+
+
+def test_window_keeps_the_latest_records():
+    store = HistoryStore(window=2)
+    for value in (1.0, 4.0, 9.0):
+        store.append("sqrt", [value], value ** 0.5)
+    assert len(store) == 3
+    assert [number for number, _ in numbered(store)] == [2, 3]
+
+
+def test_search_by_operation_and_result_range():
+    store = HistoryStore()
+    store.append("sqrt", [4.0], 2.0)
+    store.append("power", [2.0, 3.0], 8.0)
+    store.append("sqrt", [9.0], 3.0)
+    assert [number for number, _ in store.search("sqrt")] == [1, 3]
+    assert [number for number, _ in store.search(low=2.5)] == [2, 3]
+    assert [number for number, _ in store.search("sqrt", high=2.5)] == [1]
+
+
+def test_search_skips_entries_evicted_from_the_window():
+    store = HistoryStore(window=3)
+    for _ in range(5):
+        store.append("sqrt", [4.0], 2.0)
+    assert [number for number, _ in store.search("sqrt")] == [3, 4, 5]
+    for _ in range(4):
+        store.append("sqrt", [4.0], 2.0)
+    assert [number for number, _ in store.search("sqrt")] == [7, 8, 9]
+
+
+def test_result_search_skips_evicted_entries():
+    store = HistoryStore(window=2)
+    for value in (1.0, 2.0, 3.0, 4.0):
+        store.append("sqrt", [value * value], value)
+    assert [number for number, _ in store.search(low=0, high=10)] == [3, 4]
+    assert [record.result for _, record in store.search("sqrt", low=3.5)] == [4.0]
+
+
+# STORES WITH A LOG FILE
+def test_entries_survive_reopening(tmp_path):
+    path = str(tmp_path / "history")
+    store = HistoryStore(path, window=2)
+    for value in (1.0, 4.0, 9.0):
+        store.append("sqrt", [value], value ** 0.5)
+    store.append("expression", [], 6.0, "2 * 3")
+    store.close()
+
+    reopened = HistoryStore(path, window=2)
+    try:
+        assert len(reopened) == 4
+        assert numbered(reopened)[0] == (1, "sqrt(1.0) = 1.0")     # read back from the log
+        assert numbered(reopened)[3] == (4, "2 * 3 = 6.0")
+        assert reopened.get(1).operands == (1.0,)
+        assert [n for n, _ in reopened.search("sqrt")] == [1, 2, 3]
+        assert [n for n, _ in reopened.search(low=2.5, high=6.0)] == [3, 4]
+    finally:
+        reopened.close()
+
+
+def test_too_many_operands_are_refused_before_anything_is_stored(tmp_path):
+    path = str(tmp_path / "history")
+    store = HistoryStore(path)
+    try:
+        store.append("sqrt", [4.0], 2.0)
+        with pytest.raises(ValueError):
+            store.append("addition", [1.0] * (MAX_OPERANDS + 1), MAX_OPERANDS + 1.0)
+        store.append("sqrt", [9.0], 3.0)
+        assert len(store) == 2
+        assert [record.result for _, record in store.search()] == [2.0, 3.0]
+    finally:
+        store.close()
+    reopened = HistoryStore(path)
+    try:
+        assert len(reopened) == 2 and reopened.get(2).result == 3.0
+    finally:
+        reopened.close()
+
+
+def test_torn_last_record_is_dropped_and_the_index_rebuilt(tmp_path):
+    path = str(tmp_path / "history")
+    store = HistoryStore(path)
+    store.append("sqrt", [4.0], 2.0)
+    store.append("sqrt", [9.0], 3.0)
+    store.close()
+    with open(path, "r+b") as log:
+        log.truncate(log.seek(0, 2) - 3)      # crash in the middle of the second record
+    with open(path + ".idx", "wb"):
+        pass
+
+    reopened = HistoryStore(path)
+    try:
+        assert len(reopened) == 1
+        reopened.append("sqrt", [16.0], 4.0)
+        assert [text for _, text in numbered(reopened)] == ["sqrt(4.0) = 2.0", "sqrt(16.0) = 4.0"]
+        assert [record.result for _, record in reopened.search("sqrt")] == [2.0, 4.0]
+    finally:
+        reopened.close()
@@ -0,0 +1,31 @@
+"""
+Tests for instrument.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+from instrument import MAX_EXPRESSION_KEYS, Instrumentation
+
+
+def test_counts_errors_and_prometheus_text():
+    metrics = Instrumentation()
+    metrics.record("sqrt", 0.001)
+    metrics.record("sqrt", 0.003, error=ValueError())
+    snapshot = metrics.snapshot()["sqrt"]
+    assert snapshot["calls"] == 2
+    assert snapshot["errors"] == {"ValueError": 1}
+    text = metrics.prometheus()
+    assert 'calculator_calls_total{operation="sqrt"} 2' in text
+    assert 'type="ValueError"' in text
+
+
+def test_expression_and_batch_keys_are_capped():
+    metrics = Instrumentation()
+    for i in range(3 * MAX_EXPRESSION_KEYS):
+        metrics.record(f"expression:x + {i}", 0.001)
+        metrics.record(f"batch:x * {i}", 0.001)
+    metrics.record("sqrt", 0.001)
+    assert len(metrics.metrics) == 2 * (MAX_EXPRESSION_KEYS + 1) + 1     # + one "other" per kind
+    assert metrics.metrics["batch:other"].calls == 2 * MAX_EXPRESSION_KEYS
+    assert metrics.metrics["expression:other"].calls == 2 * MAX_EXPRESSION_KEYS
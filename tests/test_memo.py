@@ -0,0 +1,63 @@
+"""
+Tests for memo.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import math
+
+import pytest
+
+import memo
+from expression import FUNCTIONS, cached_expression
+from operations import OPERATIONS, calculate
+
+
+@pytest.fixture(autouse=True)
+def restore_functions():
+    yield
+    memo.disable()
+
+
+def test_hits_and_restore():
+    original = OPERATIONS["sin"].func
+    memo.enable(default_size=8)
+    calculate("sin", 0.5)
+    calculate("sin", 0.5)
+    assert memo.stats()["sin"]["hits"] == 1
+    memo.disable()
+    assert OPERATIONS["sin"].func is original and not memo.enabled()
+
+
+def test_signed_zero_and_nan_keys():
+    memo.enable(default_size=8)
+    assert math.copysign(1, calculate("sin", 0.0)) == 1
+    assert math.copysign(1, calculate("sin", -0.0)) == -1
+    calculate("sin", math.nan)
+    calculate("sin", math.nan)
+    assert memo.stats()["sin"]["size"] == 3
+
+
+def test_unknown_operations_are_refused():
+    with pytest.raises(ValueError):
+        memo.enable(sizes={"addition": 4})
+
+
+def test_expressions_go_through_the_caches():
+    memo.enable(default_size=8)
+    f = cached_expression("sin(x) + 1")
+    assert f(x=0.5) == f(x=0.5)
+    assert memo.stats()["sin"]["hits"] == 1
+    memo.disable()
+    assert FUNCTIONS["sin"] is OPERATIONS["sin"].func is math.sin
+    assert cached_expression("sin(x) + 1") is not f      # recompiled without the cache
+
+
+def test_batch_switch(tmp_path, capsys):
+    from batch import main
+    path = tmp_path / "lines.txt"
+    path.write_text("factorial(20) + 1\nfactorial(20) * 2\n")
+    assert main(["--batch", str(path), "--memoize", "16"]) == 0
+    assert capsys.readouterr().out.splitlines() == ["2432902008176640001", "4865804016353280000"]
+    assert memo.stats()["factorial"]["hits"] == 1 and memo.stats()["sin"]["maxsize"] == 16
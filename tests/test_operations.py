@@ -0,0 +1,45 @@
+"""
+Tests for operations.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import pytest
+
+from operations import BY_ID, MENUS, OPERATIONS, OperationError, calculate, parse_operands
+
+
+def test_operation_ids_are_unique_and_stable():
+    assert len(BY_ID) == len(OPERATIONS)
+    assert BY_ID[9].name == "log10"
+    assert BY_ID[23].name == "quantile"
+
+
+def test_calculate_rounds_and_checks():
+    assert calculate("log10", 1000.0) == 3.0
+    assert calculate("division", 1.0, 3.0) == 0.333333
+    with pytest.raises(OperationError):
+        calculate("division", 1.0, 0.0)
+    with pytest.raises(OperationError):
+        calculate("sqrt", -1.0)
+    with pytest.raises(OperationError):
+        calculate("variance", [1.0])
+
+
+def test_parse_operands_by_arity():
+    assert parse_operands(OPERATIONS["power"], ["2", "3", "4"]) == (2.0, 3.0)
+    assert parse_operands(OPERATIONS["addition"], ["1", "2", "3"]) == ([1.0, 2.0, 3.0],)
+    assert parse_operands(OPERATIONS["factorial"], ["5"]) == (5,)
+    with pytest.raises(ValueError):
+        parse_operands(OPERATIONS["power"], ["2"])
+
+
+def test_n_ary_sums_and_products_do_not_lose_precision_or_overflow():
+    assert calculate("addition", [0.1] * 10) == 1.0
+    assert calculate("multiplication", [1e200, 1e200, 1e-300]) == 1e100
+
+
+def test_menus_only_list_registered_operations():
+    for group in MENUS.values():
+        assert all(operation.name in OPERATIONS for operation in group.values())
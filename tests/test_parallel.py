@@ -0,0 +1,20 @@
+"""
+Tests for parallel.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+from parallel import ParallelEvaluator, chunked
+
+
+def test_chunked():
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_results_keep_the_input_order():
+    expressions = [f"{i} * 2" for i in range(50)] + ["1 / 0"]
+    with ParallelEvaluator(workers=2, chunk_size=7, max_pending=2) as pool:
+        lines = list(pool.evaluate(expressions))
+    assert lines[:50] == [f"{i * 2}\n" for i in range(50)]
+    assert lines[50].startswith("error:")
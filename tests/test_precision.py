@@ -0,0 +1,28 @@
+"""
+Tests for precision.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+from decimal import Decimal
+
+from precision import CONSTANT_CACHE_SIZE, PrecisionMath, pi
+
+
+def test_pi_digits():
+    assert str(pi(30)) == "3.14159265358979323846264338328"
+
+
+def test_decimal_and_fraction_modes_are_exact():
+    decimal = PrecisionMath(30)
+    assert decimal.add([decimal.number("0.1")] * 3) == Decimal("0.3")
+    assert str(decimal.sin(Decimal(1))) == "0.841470984807896506652502321630"
+    fraction = PrecisionMath(30, mode="fraction")
+    assert str(fraction.divide(fraction.number(1), fraction.number(3))) == "1/3"
+
+
+def test_constant_cache_is_bounded():
+    for digits in range(20, 20 + 3 * CONSTANT_CACHE_SIZE):
+        PrecisionMath(digits).sin(Decimal(1))
+    assert pi.cache_info().currsize <= CONSTANT_CACHE_SIZE
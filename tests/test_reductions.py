@@ -0,0 +1,37 @@
+"""
+Tests for reductions.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import math
+import sys
+
+from reductions import StreamingProduct, stream_sum
+
+
+def test_sum_is_compensated():
+    assert stream_sum([1e16, 1.0, -1e16] * 1000) == 1000.0
+    assert stream_sum(["0.1"] * 10) == 1.0
+
+
+
+def test_products_do_not_overflow_or_underflow_midway():
+    assert StreamingProduct().add([1e200, 1e200, 1e-300]).value == 1e100
+    assert StreamingProduct().add([2.0, -3.0, 0.5]).value == -3.0
+    huge = StreamingProduct().add([1e300] * 3)
+    assert huge.log10 == 900.0 and str(huge).endswith("e+900")
+
+
+def test_leading_digits_of_a_huge_product():
+    product = StreamingProduct().add([float(i) for i in range(1, 20001)])
+    limit = sys.get_int_max_str_digits()
+    sys.set_int_max_str_digits(0)
+    try:
+        exact = str(math.factorial(20000))
+    finally:
+        sys.set_int_max_str_digits(limit)
+    text = str(product)
+    assert text.startswith(f"≈ {exact[0]}.{exact[1:12]}")
+    assert text.endswith(f"e+{len(exact) - 1}")
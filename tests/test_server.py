@@ -0,0 +1,64 @@
+"""
+Tests for server.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import asyncio
+import json
+from fractions import Fraction
+
+from calculator_oops import ScientificCalculator
+from guard import Guard
+from server import CalculatorServer, encode_result, respond
+
+
+def ask(*lines):
+    async def session():
+        calc = ScientificCalculator()
+        with Guard(workers=1, timeout=5) as guard:
+            return [json.loads(await respond(calc, line, guard)) for line in lines]
+    return asyncio.run(session())
+
+
+def test_requests_and_errors():
+    responses = ask('{"id": 1, "op": "sqrt", "args": [2]}',
+                    '{"id": 2, "expr": "x ** 2", "vars": {"x": 1.5}}',
+                    '{"id": 3, "op": "nope"}',
+                    '{"id": 4, "expr": "9 ** 9 ** 9 ** 9"}',
+                    'not json')
+    assert responses[0] == {"id": 1, "result": 1.414214}
+    assert responses[1] == {"id": 2, "result": 2.25}
+    assert responses[2] == {"id": 3, "error": "Unknown operation 'nope'"}
+    assert responses[3]["id"] == 4 and responses[3]["error"].startswith("Result would have")
+    assert responses[4] == {"id": None, "error": "Invalid JSON"}
+
+
+def test_encode_result():
+    assert encode_result(float("inf")) == "inf"
+    assert encode_result(10 ** 100) == 10 ** 100
+    assert encode_result(-(10 ** 5000)) == "≈ -1.00000000000000e+5000"
+    assert encode_result([1.5, Fraction(1, 3)]) == [1.5, "1/3"]
+
+
+def test_pipelined_requests_over_tcp():
+    async def session():
+        server = CalculatorServer(port=0, guard=Guard(workers=1))
+        await server.start()
+        host, port = server.address
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(b'{"id": 1, "op": "addition", "args": [1, 2]}\n{"id": 2, "op": "history"}\n')
+        await writer.drain()
+        lines = [json.loads(await reader.readline()) for _ in range(2)]
+        writer.close()
+        await server.shutdown()
+        return lines
+    assert asyncio.run(session()) == [{"id": 1, "result": 3.0}, {"id": 2, "result": ["1.0 + 2.0 = 3.0"]}]
+
+
+def test_huge_and_overflowing_results_get_clean_answers():
+    responses = ask('{"id": 1, "expr": "2 ** x", "vars": {"x": 10000000}}',
+                    '{"id": 2, "expr": "2.0 ** 10000"}')
+    assert responses[0] == {"id": 1, "result": "≈ 9.04981730636080e+3010299"}
+    assert responses[1] == {"id": 2, "error": "Numerical result out of range"}
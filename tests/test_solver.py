@@ -0,0 +1,40 @@
+"""
+Tests for solver.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import math
+
+import pytest
+
+from solver import SolverError, brent, differentiate, integrate, solve
+
+
+def test_newton_from_a_guess():
+    assert solve("x**2 - 2", guess=1) == pytest.approx(math.sqrt(2), abs=1e-12)
+
+
+def test_brent_inside_a_bracket():
+    assert solve("cos(x) - x", bracket=(0, 1)) == pytest.approx(0.7390851332151607, abs=1e-12)
+    assert brent(lambda x: x ** 3 - 8, 0.0, 5.0) == pytest.approx(2.0, abs=1e-12)
+
+
+def test_bracket_without_a_sign_change_is_an_error():
+    with pytest.raises(SolverError):
+        solve("x**2 + 1", bracket=(0, 1))
+
+
+def test_gauss_kronrod_integrals():
+    result = integrate("sin(x)", 0, math.pi)
+    assert result.value == pytest.approx(2.0, abs=1e-12)
+    assert result.error < 1e-9
+    assert integrate("exp(-x**2)", -math.inf, math.inf).value == pytest.approx(math.sqrt(math.pi), rel=1e-10)
+    assert integrate("1 / sqrt(x)", 0, 1).value == pytest.approx(2.0, rel=1e-6)
+
+
+def test_exact_derivatives():
+    assert differentiate("x**3", 2) == 12.0
+    assert differentiate("sin(x) * y", 0, y=3) == 3.0
+    assert differentiate("log(x)", 4) == 0.25
@@ -0,0 +1,66 @@
+"""
+Tests for stats.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import math
+
+import pytest
+
+from stats import QuantileSketch, RunningStats
+
+
+@pytest.mark.parametrize("bad", [math.inf, -math.inf, math.nan])
+def test_non_finite_values_are_rejected(bad):
+    stats = RunningStats().add([1.0, 2.0])
+    with pytest.raises(ValueError):
+        stats.add([3.0, bad])
+    assert stats.count == 2 and stats.sketch.count == 2
+    with pytest.raises(ValueError):
+        QuantileSketch().add([bad])
+
+
+def test_registry_median_and_quantile_are_exact():
+    from stats import median, quantile
+    assert median([1.0, 2.0, 3.0]) == 2.0
+    assert median([4.0, 1.0, 3.0, 2.0]) == 2.5
+    assert quantile([0.5, 10.0, 20.0, 30.0]) == 20.0
+    assert quantile([0.25, 1.0, 2.0, 3.0, 4.0, 5.0]) == 2.0
+    assert quantile([1.0, 7.0]) == 7.0
+
+
+def test_merged_chunks_match_the_whole():
+    values = [(i * 7919 % 1000) / 7.0 - 50 for i in range(5000)]
+    whole = RunningStats().add(values)
+    merged = RunningStats()
+    for start in (3000, 0, 4500, 1200):      # any order, uneven chunks
+        stop = {3000: 4500, 0: 1200, 4500: 5000, 1200: 3000}[start]
+        merged.merge(RunningStats().add(values[start:stop]))
+    assert merged.count == whole.count
+    assert merged.mean == pytest.approx(whole.mean, rel=1e-12)
+    assert merged.variance() == pytest.approx(whole.variance(), rel=1e-12)
+    assert (merged.minimum, merged.maximum) == (whole.minimum, whole.maximum)
+
+
+def test_variance_is_stable_for_a_large_offset():
+    stats = RunningStats().add([1e9 + 4, 1e9 + 7, 1e9 + 13, 1e9 + 16])
+    assert stats.mean == 1e9 + 10
+    assert stats.variance() == 30.0
+
+
+def test_sketch_quantiles_are_within_the_relative_accuracy():
+    values = [float(i) for i in range(1, 10001)]
+    stats = RunningStats().add(values)
+    for q in (0.1, 0.5, 0.9, 0.99):
+        exact = values[round(q * (len(values) - 1))]
+        assert stats.quantile(q) == pytest.approx(exact, rel=0.011)
+
+
+def test_summarize_reads_a_file(tmp_path):
+    from stats import summarize
+    path = tmp_path / "data.txt"
+    path.write_text("1 2, 3\n4\n")
+    summary = summarize(str(path)).summary()
+    assert summary["count"] == 4 and summary["mean"] == 2.5 and summary["max"] == 4.0
@@ -0,0 +1,37 @@
+"""
+Tests for sweep.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import pytest
+
+from sweep import arange, linspace, run_sweep
+
+
+def test_grid_sizes():
+    assert len(arange(0, 0.3, 0.1)) == 3        # rounding in 0.3 / 0.1 is tolerated
+    assert len(arange(0, 1, 0.25)) == 4
+    assert len(arange(1, 0, -0.5)) == 2
+    grid = linspace(0, 1, 5)
+    assert [x for chunk in grid.chunks(2) for x in chunk] == [0.0, 0.25, 0.5, 0.75, 1.0]
+    with pytest.raises(ValueError):
+        arange(0, 1, 0)
+
+
+def test_csv_output(tmp_path):
+    path = str(tmp_path / "table.csv")
+    assert run_sweep("x ** 2", linspace(0, 2, 3), path) == (3, 0)
+    with open(path, encoding="utf-8") as stream:
+        assert stream.read().splitlines() == ["x,x ** 2", "0,0.0", "1,1.0", "2,4.0"]
+
+
+def test_npy_output_counts_undefined_points(tmp_path):
+    from columnar import ColumnReader
+    path = str(tmp_path / "table.npy")
+    assert run_sweep("log", linspace(0, 1, 2), path, chunk_size=1) == (2, 1)
+    with ColumnReader(path, "npy") as reader:
+        values = [value for chunk in reader.chunks() for value in chunk]
+    assert (reader.rows, reader.width) == (2, 2)
+    assert values[0] == 0.0 and values[1] != values[1] and values[2:] == [1.0, 0.0]
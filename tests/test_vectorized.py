@@ -0,0 +1,27 @@
+"""
+Tests for vectorized.py
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import math
+
+import pytest
+
+from vectorized import evaluate_batch
+
+
+def test_domain_errors_become_nan_rows():
+    result = evaluate_batch("log(x)", {"x": [1.0, 0.0, -1.0]})
+    assert list(result.values)[0] == 0.0
+    assert all(math.isnan(value) for value in list(result.values)[1:])
+    assert [bool(error) for error in result.errors] == [False, True, True]
+
+
+def test_factorial_of_a_constant():
+    pytest.importorskip("numpy")
+    result = evaluate_batch("x * factorial(5)", {"x": [1.0, 2.0]})
+    assert list(result.values) == [120.0, 240.0]
+    result = evaluate_batch("x * factorial(171)", {"x": [1.0]})
+    assert [bool(error) for error in result.errors] == [True]
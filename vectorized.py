@@ -0,0 +1,207 @@
+"""
+Vectorized Batch Evaluation for the Scientific Calculator
+
+Evaluates one expression over whole columns of variable values. With
+NumPy installed, the expression tree is compiled into NumPy ufunc calls
+and run chunk by chunk over float64 arrays; without NumPy a plain Python
+loop over the compiled scalar expression is used instead.
+
+With approximate=True, sin, cos, tan, exp and log are read from the
+lookup tables in approx.py (about 1e-12 error) instead of calling the
+exact ufuncs; this only applies on the NumPy path.
+
+Domain errors (log of a non-positive number, division by zero, overflow)
+never raise. The affected rows get NaN as value and True in the error
+mask, and every other row is computed normally.
+
+Author: Vishwa Desai
+License: MIT
+"""
+
+import math
+from array import array
+from collections import namedtuple
+
+from expression import (BinOp, Call, CONSTANTS, ExpressionError, FUNCTIONS, Name,
+                        Number, UnaryOp, cached_expression)
+
+# values: float64 results (NaN where errors is True)
+# errors: boolean mask, True where the row hit a domain error
+BatchResult = namedtuple("BatchResult", "values errors")
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+def load_numpy():
+    """Imports NumPy on first use, returns None when it is not installed"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+# NUMPY COMPILER
+def _numpy_functions(np):
+    """Vectorized counterparts of expression.FUNCTIONS"""
+
+    def log(x, base=None):
+        if base is None:
+            return np.log(x)
+        return np.log(x) / np.log(base)
+
+    def factorial(x):
+        # No ufunc for this one: integral arguments go through the
+        # factorial engine element by element, anything else is a NaN
+        def scalar(value):
+            if value < 0 or value != value or not float(value).is_integer():
+                return math.nan
+            try:
+                return float(FUNCTIONS["factorial"](int(value)))
+            except (ArithmeticError, ValueError):
+                return math.inf
+        # A scalar argument gives a Python float back, not an array
+        return np.asarray(np.frompyfunc(scalar, 1, 1)(x), dtype=np.float64)
+
+    return {
+        "sin": np.sin,
+        "cos": np.cos,
+        "tan": np.tan,
+        "log": log,
+        "log10": np.log10,
+        "sqrt": np.sqrt,
+        "abs": np.abs,
+        "exp": np.exp,
+        "pow": np.power,
+        "factorial": factorial,
+    }
+
+
+def _numpy_operators(np):
+    """Vectorized counterparts of expression.BINARY_OPERATORS"""
+    return {
+        "+": np.add,
+        "-": np.subtract,
+        "*": np.multiply,
+        "/": np.true_divide,
+        "//": np.floor_divide,
+        "%": np.mod,
+        "**": np.power,
+    }
+
+
+def compile_numpy(tree, variables, np, approximate=False):
+    """
+    Compiles an expression tree into a function of a tuple of column
+    arrays (in `variables` order) that returns a float64 array.
+    """
+    slots = {name: i for i, name in enumerate(variables)}
+    functions = _numpy_functions(np)
+    if approximate:
+        from approx import numpy_functions
+        functions.update(numpy_functions(np))
+    operators = _numpy_operators(np)
+
+    def build(node):
+        if isinstance(node, Number):
+            value = float(node.value)
+            return lambda cols: value
+        if isinstance(node, Name):
+            if node.id in CONSTANTS:
+                value = CONSTANTS[node.id]
+                return lambda cols: value
+            slot = slots[node.id]
+            return lambda cols: cols[slot]
+        if isinstance(node, UnaryOp):
+            operand = build(node.operand)
+            if node.op == "-":
+                return lambda cols: np.negative(operand(cols))
+            return operand
+        if isinstance(node, BinOp):
+            func = operators[node.op]
+            left = build(node.left)
+            right = build(node.right)
+            return lambda cols: func(left(cols), right(cols))
+        if isinstance(node, Call):
+            func = functions[node.func]
+            args = [build(arg) for arg in node.args]
+            return lambda cols: func(*[arg(cols) for arg in args])
+        raise ExpressionError(f"Cannot compile node {node!r}")
+
+    return build(tree)
+
+
+# INPUT HELPERS
+def _column_length(columns):
+    lengths = {len(column) for column in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"All columns must have the same length, got {sorted(lengths)}")
+    return lengths.pop() if lengths else 1
+
+
+def _as_float_array(column, np):
+    """Zero-copy view for float64 buffers, converting copy otherwise"""
+    if isinstance(column, array) and column.typecode == "d":
+        return np.frombuffer(column, dtype=np.float64)
+    return np.asarray(column, dtype=np.float64)
+
+
+# BATCH EVALUATION
+def evaluate_batch(expression, columns=None, chunk_size=DEFAULT_CHUNK_SIZE, approximate=False):
+    """
+    Evaluates `expression` for every row of `columns`.
+
+    columns maps variable names to equally long sequences (NumPy arrays,
+    array.array or lists). Returns a BatchResult; with NumPy the values
+    are a float64 ndarray and errors a bool ndarray, otherwise they are
+    array('d') and a bytearray of 0/1 flags. approximate=True uses the
+    table-based functions of approx.py.
+    """
+    compiled = cached_expression(expression)
+    columns = dict(columns or {})
+    missing = [name for name in compiled.variables if name not in columns]
+    if missing:
+        raise ExpressionError(f"Missing column(s) for variable(s) {missing}")
+
+    np = load_numpy()
+    if np is None:
+        return _evaluate_python(compiled, columns)
+
+    length = _column_length(columns)
+    inputs = [_as_float_array(columns[name], np) for name in compiled.variables]
+    func = compile_numpy(compiled.tree, compiled.variables, np, approximate)
+
+    values = np.empty(length, dtype=np.float64)
+    with np.errstate(all="ignore"):
+        for start in range(0, length, chunk_size):
+            stop = min(start + chunk_size, length)
+            chunk = tuple(column[start:stop] for column in inputs)
+            values[start:stop] = func(chunk)
+
+    errors = ~np.isfinite(values)
+    values[errors] = np.nan
+    return BatchResult(values, errors)
+
+
+def _evaluate_python(compiled, columns):
+    """Scalar fallback used when NumPy is not installed"""
+    length = _column_length(columns)
+    inputs = [columns[name] for name in compiled.variables]
+    rows = zip(*inputs) if inputs else ((),) * length
+    evaluate = compiled.evaluate
+    nan = math.nan
+    isfinite = math.isfinite
+
+    values = array("d", bytes(8 * length))
+    errors = bytearray(length)
+    for i, row in enumerate(rows):
+        try:
+            value = float(evaluate(row))
+        except (ArithmeticError, ValueError, TypeError):
+            value = nan
+        if isfinite(value):
+            values[i] = value
+        else:
+            values[i] = nan
+            errors[i] = 1
+    return BatchResult(values, errors)